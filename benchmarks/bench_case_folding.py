@@ -0,0 +1,78 @@
+"""Case-insensitive matching: lowercasing a window at a time compared to lowercasing the whole text first.
+
+Run with `python benchmarks/bench_case_folding.py [megabytes]`, it prints MB/s and the peak memory of both on an
+ASCII-heavy and a non-ASCII corpus (Greek, Cyrillic, German and Turkish words, including "İ" which lowercases to two
+characters), and checks that every reported column points at the match in the original text.
+"""
+import os, sys, random, time, tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import TermMatcher
+from core import TermMatching
+
+ASCII_WORDS = ["INFO", "WARN", "ERROR", "DEBUG", "request", "Response", "user", "Session", "timeout", "connection",
+               "started", "finished", "FAILED", "retry", "cache", "database", "query", "worker", "queue", "disk"]
+NON_ASCII_WORDS = ["ΣΦΑΛΜΑ", "σύνδεση", "ОШИБКА", "соединение", "Größe", "STRASSE", "Fehler", "İSTANBUL", "İşlem",
+                   "bağlantı", "hata", "ǅungla", "café", "ΑΙΤΗΜΑ", "Anfrage", "запрос", "user", "timeout"]
+ASCII_TERMS = ["error", "timeout", "failed", "session"]
+NON_ASCII_TERMS = ["σφαλμα", "ошибка", "größe", "i̇şlem", "bağlantı", "ǆungla", "timeout"]
+
+def generate_text(megabytes, words, rng) -> str:
+    lines = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        line = f"2024-01-01 12:00:{rng.randint(0, 59):02d} " + " ".join(rng.choice(words) for _ in range(rng.randint(4, 14)))
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+    return "\n".join(lines)
+
+def find_with_whole_copy(search_terms, text) -> dict:
+    #lowercase the whole text in one piece, like every case-insensitive search did before the windows
+    window_size = TermMatching.FOLD_WINDOW_SIZE
+    TermMatching.FOLD_WINDOW_SIZE = len(text)
+    try:
+        return TermMatcher(search_terms, False).find_positions(text)
+    finally:
+        TermMatching.FOLD_WINDOW_SIZE = window_size
+
+def find_in_windows(search_terms, text) -> dict:
+    return TermMatcher(search_terms, False).find_positions(text)
+
+def measure(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, result
+
+def check_columns(text, positions):
+    """Raise SystemExit unless every match starts at its column of the original line."""
+    lines = text.splitlines()
+    for search_term, term_positions in positions.items():
+        for line, column in term_positions:
+            #lowercasing never makes the text shorter, so the term's length of the original line covers the match
+            found = lines[line - 1][column - 1:column - 1 + len(search_term)]
+            if not found.lower().startswith(search_term.lower()):
+                raise SystemExit(f"{search_term!r} isn't at line {line}, column {column}: {found!r}")
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    rng = random.Random(42)
+    print(f"{'corpus':<10} {'engine':<12} {'MB/s':>8} {'peak MB':>9} {'matches':>9}")
+    for corpus_name, words, search_terms in [("ascii", ASCII_WORDS, ASCII_TERMS), ("non-ascii", NON_ASCII_WORDS, NON_ASCII_TERMS)]:
+        text = generate_text(megabytes, words, rng)
+        size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+        results = []
+        for engine_name, function in [("whole copy", find_with_whole_copy), ("windows", find_in_windows)]:
+            seconds, peak, positions = measure(function, search_terms, text)
+            results.append(positions)
+            match_count = sum(len(term_positions) for term_positions in positions.values())
+            print(f"{corpus_name:<10} {engine_name:<12} {size_mb / seconds:>8.1f} {peak / (1024 * 1024):>9.1f} {match_count:>9}")
+        if results[0] != results[1]:
+            raise SystemExit(f"results differ on the {corpus_name} corpus")
+        check_columns(text, results[1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Cold and warm run timings of search_files with and without the content index.
+
+Run with `python benchmarks/bench_content_index.py [file_count]`, the corpus is generated in a temporary directory.
+"""
+import os, sys, random, tempfile, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools', 'search_files')))
+import search_files
+from bench_term_matcher import generate_text
+
+SEARCH_TERMS = "OutOfMemoryError\nconnection refused\ncache miss"
+
+def run_search(source_directory, target_directory, use_index) -> float:
+    start = time.perf_counter()
+    search_files.run_search(source_directory, target_directory, SEARCH_TERMS, False, workers=1, use_index=use_index)
+    return time.perf_counter() - start
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as source_directory, tempfile.TemporaryDirectory() as target_directory:
+        for i in range(file_count):
+            with open(os.path.join(source_directory, f"service_{i:05d}.log"), "w", encoding="utf-8") as f:
+                f.write(generate_text(0.1, rng))
+                if i % 50 == 0:
+                    f.write("\nconnection refused")
+
+        print(f"corpus: {file_count} files of 0.1 MB")
+        print(f"{'no index':<24}{run_search(source_directory, target_directory, False):>8.2f} s")
+        print(f"{'cold index (build)':<24}{run_search(source_directory, target_directory, True):>8.2f} s")
+        print(f"{'warm index':<24}{run_search(source_directory, target_directory, True):>8.2f} s")
+
+        #change 5% of the files, only those are tokenized again
+        for i in range(0, file_count, 20):
+            with open(os.path.join(source_directory, f"service_{i:05d}.log"), "a", encoding="utf-8") as f:
+                f.write("\ncache miss")
+        print(f"{'warm index, 5% changed':<24}{run_search(source_directory, target_directory, True):>8.2f} s")
+
+if __name__ == "__main__":
+    main()
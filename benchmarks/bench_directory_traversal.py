@@ -0,0 +1,66 @@
+"""Enumeration time of the old os.walk() / os.listdir() + isfile() listings compared to iter_files().
+
+Run with `python benchmarks/bench_directory_traversal.py [file_count]`, the tree is generated in a temporary directory.
+Network shares make every stat much more expensive, so the difference there is larger than on a local disk.
+"""
+import os, sys, tempfile, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.DirectoryTraversal import iter_files
+
+FILE_EXTENSIONS = [".txt", ".log"]
+NAME_SUFFIXES = [".txt", ".log", ".csv", ".json", ".bak"]
+
+def walk_listing(directory) -> list:
+    #collect_valid_files_from_directory() with subdirectories before iter_files()
+    collected_files = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            _, file_extension = os.path.splitext(file)
+            if file_extension.lower() in FILE_EXTENSIONS:
+                collected_files.append(os.path.join(root, file))
+    return collected_files
+
+def flat_listing(directory) -> list:
+    #the search_files listing before iter_files(): one isfile() stat per entry
+    files = []
+    for file in os.listdir(directory):
+        _, ext = os.path.splitext(file)
+        if ext.lower() in [".txt", ".csv", ".log", ".md", ".rtf"] and os.path.isfile(os.path.join(directory, file)):
+            files.append(file)
+    return files
+
+def generate_tree(directory, file_count):
+    per_directory = 200
+    for i in range(file_count):
+        subdirectory = os.path.join(directory, f"d{i // per_directory:04d}")
+        if i % per_directory == 0:
+            os.mkdir(subdirectory)
+        open(os.path.join(subdirectory, f"f{i:07d}{NAME_SUFFIXES[i % len(NAME_SUFFIXES)]}"), "w").close()
+
+def measure(function) -> tuple:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as flat_directory:
+        generate_tree(directory, file_count)
+        for i in range(file_count // 5):
+            open(os.path.join(flat_directory, f"f{i:07d}{NAME_SUFFIXES[i % len(NAME_SUFFIXES)]}"), "w").close()
+
+        walk_seconds, walked = measure(lambda: walk_listing(directory))
+        scan_seconds, scanned = measure(lambda: list(iter_files(directory, FILE_EXTENSIONS)))
+        if walked != scanned:
+            raise SystemExit("recursive listings differ")
+        flat_seconds, flat = measure(lambda: flat_listing(flat_directory))
+        flat_scan_seconds, flat_scanned = measure(lambda: list(iter_files(flat_directory, [".txt", ".csv", ".log", ".md", ".rtf"], max_depth=0)))
+        if flat != [os.path.basename(path) for path in flat_scanned]:
+            raise SystemExit("flat listings differ")
+
+        print(f"{'listing':<34}{'old s':>8}{'iter_files s':>14}")
+        print(f"{f'recursive, {file_count} files':<34}{walk_seconds:>8.3f}{scan_seconds:>14.3f}")
+        print(f"{f'flat, {file_count // 5} files':<34}{flat_seconds:>8.3f}{flat_scan_seconds:>14.3f}")
+
+if __name__ == "__main__":
+    main()
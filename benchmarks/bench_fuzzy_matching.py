@@ -0,0 +1,84 @@
+"""Throughput of the fuzzy FuzzyMatcher at edit distances 1 to 3 compared to exact matching and a plain dynamic program.
+
+Run with `python benchmarks/bench_fuzzy_matching.py [megabytes]`, it prints MB/s and the number of matches for a sparse
+term (a misspelled exception name) and a set of typical log terms, with typos mixed into the generated log.
+The plain dynamic program (one column of the edit distance matrix per character) only runs on a small part of the
+text, it is far too slow for the whole corpus.
+"""
+import os, sys, random, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import FuzzyMatcher, TermMatcher
+
+WORDS = ["INFO", "WARN", "ERROR", "DEBUG", "request", "response", "user", "session", "timeout", "connection",
+         "started", "finished", "failed", "retry", "cache", "database", "query", "worker", "queue", "disk"]
+#one line in this many contains the rare exception, with a typo in every other one
+SPARSE_EVERY = 2000
+TERM_SETS = [
+    ("sparse", ["OutOfMemoryError"]),
+    ("log terms", ["connection refused", "database", "timeout"]),
+]
+DISTANCES = [1, 2, 3]
+DYNAMIC_PROGRAM_BYTES = 256 * 1024
+
+def add_typo(word, rng) -> str:
+    index = rng.randrange(len(word))
+    edit = rng.choice(["insert", "delete", "replace"])
+    if edit == "insert":
+        return word[:index] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[index:]
+    if edit == "delete":
+        return word[:index] + word[index + 1:]
+    return word[:index] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[index + 1:]
+
+def generate_text(megabytes, rng) -> str:
+    lines = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        words = [add_typo(word, rng) if rng.random() < 0.05 else word for word in rng.choices(WORDS, k=rng.randint(4, 14))]
+        if len(lines) % SPARSE_EVERY == 0:
+            words.append(add_typo("OutOfMemoryError", rng) if rng.random() < 0.5 else "OutOfMemoryError")
+        line = f"2024-01-01 12:00:{rng.randint(0, 59):02d} " + " ".join(words)
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+def dynamic_program(text, search_terms, max_distance) -> int:
+    #the naive approach: a full column of the edit distance matrix per character and term
+    match_count = 0
+    for search_term in search_terms:
+        term = search_term.lower()
+        for line in text.lower().splitlines():
+            column = list(range(len(term) + 1))
+            for char in line:
+                new_column = [0]
+                for index, term_char in enumerate(term, 1):
+                    new_column.append(min(column[index] + 1, new_column[index - 1] + 1, column[index - 1] + (term_char != char)))
+                column = new_column
+                if column[-1] <= max_distance:
+                    match_count += 1
+    return match_count
+
+def measure(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rng = random.Random(42)
+    text = generate_text(megabytes, rng)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    sample = text[:DYNAMIC_PROGRAM_BYTES]
+    sample_mb = len(sample.encode("utf-8")) / (1024 * 1024)
+    print(f"{size_mb:.1f} MB, the dynamic program on the first {sample_mb:.2f} MB")
+    print(f"{'terms':<11}{'matcher':<16}{'MB/s':>9}{'matches':>10}")
+    for name, search_terms in TERM_SETS:
+        seconds, positions = measure(TermMatcher(search_terms, False).find_positions, text)
+        print(f"{name:<11}{'exact':<16}{size_mb / seconds:>9.1f}{sum(map(len, positions.values())):>10}")
+        for max_distance in DISTANCES:
+            seconds, positions = measure(FuzzyMatcher(search_terms, False, max_distance).find_positions, text)
+            print(f"{name:<11}{f'fuzzy {max_distance}':<16}{size_mb / seconds:>9.1f}{sum(map(len, positions.values())):>10}")
+        seconds, _ = measure(dynamic_program, sample, search_terms, 1)
+        print(f"{name:<11}{'dynamic program':<16}{sample_mb / seconds:>9.2f}{'-':>10}")
+
+if __name__ == "__main__":
+    main()
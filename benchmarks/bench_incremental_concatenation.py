@@ -0,0 +1,46 @@
+"""Time of a full concatenation compared to incremental updates after a few log files grew.
+
+Run with `python benchmarks/bench_incremental_concatenation.py [file_count]`, the logs are generated in a temporary directory.
+"""
+import os, sys, tempfile, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools', 'concatenate_files')))
+import concatenate_files
+
+LINES_PER_FILE = 2000
+GROWING_FILES = 10
+
+def write_log(path, first_line, line_count, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for line in range(first_line, first_line + line_count):
+            f.write(f"2024-05-01 12:00:{line % 60:02d} INFO worker-{line % 8} request {line} handled in {line % 97} ms\n")
+
+def measure(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as target:
+        paths = [os.path.join(source, f"service_{i:05d}.log") for i in range(file_count)]
+        for path in paths:
+            write_log(path, 0, LINES_PER_FILE)
+
+        def full():
+            concatenate_files.run_concatenation(source, target, ".log", False)
+
+        def incremental():
+            concatenate_files.run_concatenation(source, target, ".log", False, incremental=True)
+
+        print(f"{file_count} files of {LINES_PER_FILE} lines, {GROWING_FILES} of them grow by 100 lines")
+        print(f"{'run':<26}{'seconds':>9}")
+        print(f"{'full':<26}{measure(full):>9.3f}")
+        print(f"{'incremental, first run':<26}{measure(incremental):>9.3f}")
+        print(f"{'incremental, unchanged':<26}{measure(incremental):>9.3f}")
+        for path in paths[::file_count // GROWING_FILES or 1][:GROWING_FILES]:
+            write_log(path, LINES_PER_FILE, 100, mode="a")
+        print(f"{'incremental, appended':<26}{measure(incremental):>9.3f}")
+
+if __name__ == "__main__":
+    main()
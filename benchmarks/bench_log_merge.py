@@ -0,0 +1,67 @@
+"""Merging sorted logs by timestamp with a heap compared to reading all lines and sorting them.
+
+Run with `python benchmarks/bench_log_merge.py [file_count] [lines_per_file]`, the logs are generated in a temporary
+directory. It prints the time and the peak memory of both and checks that they produce the same timeline.
+"""
+import os, sys, random, hashlib, datetime, tempfile, time, tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import TextUtilities as TU
+from core.LogMerging import TimestampParser, get_merge_chunk_size, iter_file_records, merge_records
+
+def write_log(path, line_count, rng):
+    time = datetime.datetime(2024, 5, 1) + datetime.timedelta(milliseconds=rng.randint(0, 60000))
+    with open(path, "w", encoding="utf-8") as f:
+        for line in range(line_count):
+            time += datetime.timedelta(milliseconds=rng.randint(0, 2000))
+            f.write(f"{time:%Y-%m-%d %H:%M:%S}.{time.microsecond // 1000:03d} INFO request {line} handled\n")
+
+#both return the digest of the timeline, it isn't kept in memory
+
+def merge_with_heap(paths) -> bytes:
+    hasher = hashlib.blake2b()
+    parser = TimestampParser()
+    chunk_size = get_merge_chunk_size(len(paths))
+    merge_records([(iter_file_records(path, "utf-8", parser, chunk_size), None) for path in paths], lambda text: hasher.update(text.encode("utf-8")))
+    return hasher.digest()
+
+def merge_by_sorting(paths) -> bytes:
+    #what a separate pass over the concatenated result does: every line in memory, then one sort
+    parser = TimestampParser()
+    lines = []
+    for number, path in enumerate(paths):
+        lines.extend((parser.parse(line), number, line) for line in TU.read_text_file(path).splitlines())
+    lines.sort(key=lambda item: item[:2])
+    return hashlib.blake2b("".join(line + "\n" for _, _, line in lines).encode("utf-8")).digest()
+
+def measure(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, result
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    lines_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as source:
+        paths = [os.path.join(source, f"service_{i:04d}.log") for i in range(file_count)]
+        for path in paths:
+            write_log(path, lines_per_file, rng)
+        size_mb = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+
+        print(f"{file_count} files of {lines_per_file} lines, {size_mb:.1f} MB")
+        print(f"{'method':<10}{'seconds':>9}{'MB/s':>8}{'peak MB':>9}")
+        results = []
+        for name, function in [("heap", merge_with_heap), ("sort", merge_by_sorting)]:
+            seconds, peak, digest = measure(function, paths)
+            results.append(digest)
+            print(f"{name:<10}{seconds:>9.3f}{size_mb / seconds:>8.1f}{peak / (1024 * 1024):>9.1f}")
+        if results[0] != results[1]:
+            raise SystemExit("the merged timelines differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Reading a file and then searching it compared to reading the next files ahead while the current one is searched.
+
+Run with `python benchmarks/bench_read_ahead.py [file_count] [megabytes_per_second]`, the logs are generated in a
+temporary directory. Slow storage (a spinning disk or a network share) is emulated by sleeping for as long as
+reading the bytes would take at `megabytes_per_second`, which blocks the reading thread like real I/O does.
+It prints the wall time, the queue depth and the stall times for a few read-ahead budgets and thread counts.
+"""
+import os, sys, random, time, tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import TermMatcher
+from core import TextUtilities as TU
+from core.ReadAhead import ReadAhead, read_file_bytes
+
+WORDS = ["INFO", "WARN", "ERROR", "request", "response", "user", "session", "timeout", "connection", "database"]
+FILE_SIZE = 2 * 1024 * 1024
+SEARCH_TERMS = ["connection refused", "OutOfMemoryError"]
+#(budget, threads), None reads every file right before it is searched
+SETTINGS = [None, (8 * 1024 * 1024, 1), (32 * 1024 * 1024, 1), (32 * 1024 * 1024, 4)]
+
+def write_log(path, rng):
+    with open(path, "w", encoding="utf-8") as f:
+        size = 0
+        while size < FILE_SIZE:
+            line = " ".join(rng.choices(WORDS, k=12)) + "\n"
+            f.write(line)
+            size += len(line)
+
+def slow_read(path, megabytes_per_second) -> tuple:
+    data, _ = read_file_bytes(path)
+    time.sleep(len(data) / (megabytes_per_second * 1024 * 1024))
+    return data, len(data)
+
+def search(data, matcher) -> int:
+    text, _ = TU.decode_text_bytes(data)
+    return sum(map(len, matcher.find_positions(text).values()))
+
+def run(paths, matcher, megabytes_per_second, setting) -> tuple:
+    start = time.perf_counter()
+    match_count = 0
+    if setting is None:
+        for path in paths:
+            data, _ = slow_read(path, megabytes_per_second)
+            match_count += search(data, matcher)
+        return time.perf_counter() - start, match_count, None
+    budget, threads = setting
+    pipeline = ReadAhead(paths, lambda path: slow_read(path, megabytes_per_second), budget, threads)
+    for data in pipeline:
+        match_count += search(data, matcher)
+    return time.perf_counter() - start, match_count, pipeline.summary()
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    megabytes_per_second = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+    rng = random.Random(42)
+    matcher = TermMatcher(SEARCH_TERMS, False)
+    with tempfile.TemporaryDirectory() as source:
+        paths = [os.path.join(source, f"service_{i:03d}.log") for i in range(file_count)]
+        for path in paths:
+            write_log(path, rng)
+        size_mb = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+
+        print(f"{file_count} files, {size_mb:.1f} MB, storage emulated at {megabytes_per_second:g} MB/s")
+        print(f"{'read-ahead':<16}{'seconds':>9}{'MB/s':>8}{'mean depth':>12}{'stall s':>9}{'backpressure s':>16}")
+        results = set()
+        for setting in SETTINGS:
+            seconds, match_count, summary = run(paths, matcher, megabytes_per_second, setting)
+            results.add(match_count)
+            name = "off" if setting is None else f"{setting[0] // (1024 * 1024)} MB x {setting[1]}"
+            if summary is None:
+                print(f"{name:<16}{seconds:>9.2f}{size_mb / seconds:>8.1f}{'-':>12}{'-':>9}{'-':>16}")
+            else:
+                print(f"{name:<16}{seconds:>9.2f}{size_mb / seconds:>8.1f}{summary['mean_queue_depth']:>12.1f}{summary['consumer_stall_seconds']:>9.2f}{summary['reader_backpressure_seconds']:>16.2f}")
+        if len(results) != 1:
+            raise SystemExit("the match counts differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Throughput of the combined-pattern RegexMatcher compared to the literal TermMatcher.
+
+Run with `python benchmarks/bench_regex_matcher.py [megabytes]`, it prints MB/s for a growing number of terms,
+once with the literal terms escaped as regular expressions and once with real patterns (all case-sensitive).
+"""
+import os, re, sys, random, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import TermMatcher, RegexMatcher
+from core.TermMatching import compile_combined_pattern
+from bench_term_matcher import generate_text, generate_terms
+
+TERM_COUNTS = [1, 10, 50, 100]
+
+def generate_patterns(count, rng) -> list:
+    patterns = [r"ERROR \w+", r"id=00\d{4}", r"\d{2}:\d{2}:5\d", r"time(out)?"]
+    while len(patterns) < count:
+        patterns.append(f"id={rng.randint(0, 999):03d}\\d{{3}}")
+    return patterns[:count]
+
+def throughput(matcher, text, size_mb) -> float:
+    start = time.perf_counter()
+    matcher.find_positions(text)
+    return size_mb / (time.perf_counter() - start)
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    rng = random.Random(42)
+    text = generate_text(megabytes, rng)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+    print(f"corpus: {size_mb:.1f} MB")
+    print(f"{'terms':>6} {'literal MB/s':>13} {'escaped regex MB/s':>19} {'patterns MB/s':>14} {'compile ms':>11} {'cached ms':>10}")
+    for term_count in TERM_COUNTS:
+        search_terms = generate_terms(term_count, rng)
+        patterns = generate_patterns(term_count, rng)
+        escaped = [re.escape(search_term) for search_term in search_terms]
+
+        compile_combined_pattern.cache_clear()
+        start = time.perf_counter()
+        regex_matcher = RegexMatcher(patterns, True)
+        compile_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        RegexMatcher(patterns, True)
+        cached_ms = (time.perf_counter() - start) * 1000
+
+        literal = throughput(TermMatcher(search_terms, True), text, size_mb)
+        escaped_regex = throughput(RegexMatcher(escaped, True), text, size_mb)
+        real_patterns = throughput(regex_matcher, text, size_mb)
+        print(f"{term_count:>6} {literal:>13.1f} {escaped_regex:>19.1f} {real_patterns:>14.1f} {compile_ms:>11.2f} {cached_ms:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Peak memory and time of the search report: nested lists joined into one string vs. MatchStore and write_report().
+
+Run with `python benchmarks/bench_report_writer.py [million_matches]`, the positions are generated, no files are searched.
+"""
+import os, sys, tempfile, time, tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools', 'search_files')))
+import search_files
+from core.MatchStore import MatchStore
+
+SEARCH_TERMS = ["ERROR", "timeout", "never found"]
+FILE_COUNT = 200
+
+def generate_file_positions(match_count):
+    #every file has matches of the first term on every line and of the second one on every tenth line
+    per_file = match_count // FILE_COUNT
+    for i in range(FILE_COUNT):
+        yield f"service_{i:05d}.log", {
+            SEARCH_TERMS[0]: [(line, 17) for line in range(1, per_file + 1)],
+            SEARCH_TERMS[1]: [(line, 40) for line in range(1, per_file + 1, 10)]
+        }
+
+def add_positions_to_results(results, search_term, file, positions):
+    #results = {search_term: {file: [(line, column), ...]}}
+    if positions:
+        results[search_term].setdefault(file, []).extend(positions)
+
+def joined_report(path, match_count):
+    #the report before MatchStore: every position in a nested dict, every report line in one list
+    results = {search_term: {} for search_term in SEARCH_TERMS}
+    for file, file_positions in generate_file_positions(match_count):
+        for search_term in SEARCH_TERMS:
+            add_positions_to_results(results, search_term, file, file_positions.get(search_term, []))
+
+    report_lines = [search_files.LINE]
+    for search_term, file_dictionary in results.items():
+        report_lines.append(f"Search term:\t{search_term}\n")
+        for file, positions in file_dictionary.items():
+            report_lines.append(f"{file}:")
+            report_lines.extend(f"\tLine {line}, Column {column}" for line, column in positions)
+        report_lines.append(search_files.LINE)
+    with open(path, "w") as f:
+        f.write("\n".join(report_lines))
+
+def streamed_report(path, match_count):
+    match_store = MatchStore()
+    for file, file_positions in generate_file_positions(match_count):
+        for search_term in SEARCH_TERMS:
+            match_store.add(search_term, file, file_positions.get(search_term))
+    with open(path, "w") as f:
+        search_files.write_report(f, [search_files.LINE], SEARCH_TERMS, match_store)
+    match_store.close()
+
+def measure(function, path, match_count) -> tuple:
+    #tracemalloc slows allocations down a lot, so time and memory are measured in separate runs
+    start = time.perf_counter()
+    function(path, match_count)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(path, match_count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / (1024 * 1024)
+
+def main():
+    match_count = int(float(sys.argv[1]) * 1000 * 1000) if len(sys.argv) > 1 else 2 * 1000 * 1000
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{match_count} matches in {FILE_COUNT} files")
+        print(f"{'report':<10}{'seconds':>9}{'peak MB':>9}")
+        for name, function in [("joined", joined_report), ("streamed", streamed_report)]:
+            seconds, peak = measure(function, os.path.join(directory, name + ".txt"), match_count)
+            print(f"{name:<10}{seconds:>9.2f}{peak:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Throughput of the single-pass TermMatcher compared to one rescan per search term.
+
+Run with `python benchmarks/bench_term_matcher.py [megabytes]`, it prints MB/s for a growing number of terms.
+Both ways TermMatcher can search (str.find() per term and the combined regex) are measured for every count,
+the last line tells where the regex starts to win and FIND_TERM_LIMIT, which picks between them.
+"""
+import os, sys, random, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import TermMatcher
+from core import TermMatching
+
+TERM_COUNTS = [1, 2, 4, 8, 16, 50, 100, 200]
+REPEATS = 3
+WORDS = ["INFO", "WARN", "ERROR", "DEBUG", "request", "response", "user", "session", "timeout", "connection",
+         "started", "finished", "failed", "retry", "cache", "database", "query", "worker", "queue", "disk"]
+
+def per_term_rescan(text, search_terms, case_sensitive):
+    #the search loop before TermMatcher: lowercase and split the whole text again for every search term
+    results = {}
+    for search_term in search_terms:
+        text_to_search = text if case_sensitive else text.lower()
+        search_term_to_find = search_term if case_sensitive else search_term.lower()
+        positions = []
+        for line_num, line in enumerate(text_to_search.splitlines(), start=1):
+            start = 0
+            while True:
+                idx = line.find(search_term_to_find, start)
+                if idx == -1:
+                    break
+                positions.append((line_num, idx + 1))
+                start = idx + 1
+        if positions:
+            results[search_term] = positions
+    return results
+
+def generate_text(megabytes, rng) -> str:
+    lines = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        line = f"2024-01-01 12:00:{rng.randint(0, 59):02d} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+        line += f" id={rng.randint(0, 10 ** 6):06d}"
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+def generate_terms(count, rng) -> list:
+    terms = []
+    while len(terms) < count:
+        term = f"id={rng.randint(0, 10 ** 6):06d}" if len(terms) >= len(WORDS) else WORDS[len(terms)]
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+def create_matcher(search_terms, find_term_limit) -> TermMatcher:
+    #the limit is read when the matcher is created
+    default_limit = TermMatching.FIND_TERM_LIMIT
+    TermMatching.FIND_TERM_LIMIT = find_term_limit
+    try:
+        return TermMatcher(search_terms, False)
+    finally:
+        TermMatching.FIND_TERM_LIMIT = default_limit
+
+def measure(function, *args) -> tuple:
+    #the best of REPEATS runs, single runs are too noisy to compare the two ways of TermMatcher
+    seconds = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function(*args)
+        seconds.append(time.perf_counter() - start)
+    return min(seconds), result
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    rng = random.Random(42)
+    text = generate_text(megabytes, rng)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+    print(f"corpus: {size_mb:.1f} MB, {text.count(chr(10)) + 1} lines")
+    print(f"{'terms':>6} {'rescan MB/s':>12} {'find MB/s':>10} {'regex MB/s':>11} {'matcher MB/s':>13} {'speedup':>8}")
+    crossover = None
+    for term_count in TERM_COUNTS:
+        search_terms = generate_terms(term_count, rng)
+        rescan_seconds, expected = measure(per_term_rescan, text, search_terms, False)
+        find_seconds, found = measure(lambda: create_matcher(search_terms, term_count).find_positions(text))
+        regex_seconds, regex_found = measure(lambda: create_matcher(search_terms, 0).find_positions(text))
+        matcher_seconds, actual = measure(lambda: TermMatcher(search_terms, False).find_positions(text))
+        if not actual == found == regex_found == expected:
+            raise SystemExit(f"results differ for {term_count} terms")
+        if crossover is None and regex_seconds < find_seconds:
+            crossover = term_count
+        print(f"{term_count:>6} {size_mb / rescan_seconds:>12.1f} {size_mb / find_seconds:>10.1f} {size_mb / regex_seconds:>11.1f} {size_mb / matcher_seconds:>13.1f} {rescan_seconds / matcher_seconds:>7.1f}x")
+    crossover_text = f"{crossover} terms" if crossover is not None else f"none up to {TERM_COUNTS[-1]} terms"
+    print(f"regex faster than str.find() from: {crossover_text}, FIND_TERM_LIMIT: {TermMatching.FIND_TERM_LIMIT}")
+
+if __name__ == "__main__":
+    main()
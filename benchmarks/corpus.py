@@ -0,0 +1,108 @@
+"""Deterministic synthetic corpus for the benchmarks: the same seed and scale always produce the same bytes.
+
+Run with `python benchmarks/corpus.py DIRECTORY [scale] [seed]` to generate it, run_suite.py generates it into a temporary directory.
+
+-"small/": many small log files, their encodings rotate through ENCODINGS.
+-"huge/": a few large log files.
+-"tree/": a deep directory tree of small files, DEPTH levels below it with BRANCHES subdirectories each.
+-Every line contains a DENSE_TERM match, SPARSE_TERM occurs about once per SPARSE_EVERY lines.
+"""
+import os, sys, random
+
+ENCODINGS = ["utf-8", "utf-8-sig", "cp1252", "latin-1"]
+#text every encoding can store, "€" only exists in the UTF-8 encodings and cp1252
+EXTRA_WORDS = {
+    "utf-8": ["café", "Größe", "€", "naïve", "Ωmega"],
+    "utf-8-sig": ["café", "Größe", "€", "naïve", "Ωmega"],
+    "cp1252": ["café", "Größe", "€", "naïve", "déjà"],
+    #U+0081 can't be decoded as cp1252, so these files really fall back to latin-1
+    "latin-1": ["café", "Größe", "naïve", "déjà", "\x81"]
+}
+WORDS = ["INFO", "WARN", "DEBUG", "request", "response", "user", "session", "timeout", "connection",
+         "started", "finished", "retry", "cache", "database", "query", "worker", "queue", "disk"]
+
+DENSE_TERM = "request"
+SPARSE_TERM = "OutOfMemoryError"
+SPARSE_EVERY = 5000
+FILE_EXTENSION = ".log"
+
+#sizes at scale 1
+SMALL_FILE_COUNT = 2000
+SMALL_FILE_LINES = 40
+HUGE_FILE_COUNT = 3
+HUGE_FILE_MEGABYTES = 16
+DEPTH = 5
+BRANCHES = 3
+TREE_FILES_PER_DIRECTORY = 4
+
+def generate_line(rng, encoding, line_number) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(4, 12))]
+    words[rng.randrange(len(words))] = DENSE_TERM
+    if rng.random() < 0.1:
+        words.append(rng.choice(EXTRA_WORDS[encoding]))
+    if line_number % SPARSE_EVERY == SPARSE_EVERY // 2:
+        words.append(SPARSE_TERM)
+    return f"2024-05-01 12:{line_number // 60 % 60:02d}:{line_number % 60:02d} " + " ".join(words) + f" id={rng.randint(0, 10 ** 6):06d}\n"
+
+def write_log(path, rng, encoding, line_count=None, byte_count=None):
+    """Write a log file of `line_count` lines (or about `byte_count` bytes), "\r\n" line breaks in the cp1252 files."""
+    newline = "\r\n" if encoding == "cp1252" else "\n"
+    with open(path, "w", encoding=encoding, newline=newline) as f:
+        line_number = 0
+        written = 0
+        while (line_count is not None and line_number < line_count) or (byte_count is not None and written < byte_count):
+            line = generate_line(rng, encoding, line_number)
+            f.write(line)
+            written += len(line)
+            line_number += 1
+
+def generate_corpus(directory, scale=1.0, seed=42) -> dict:
+    """Generate the corpus into the existing `directory` and return {"small", "huge", "tree"} with the paths of each part."""
+    rng = random.Random(seed)
+    parts = {"small": [], "huge": [], "tree": []}
+
+    small_directory = os.path.join(directory, "small")
+    os.mkdir(small_directory)
+    for i in range(max(int(SMALL_FILE_COUNT * scale), 1)):
+        path = os.path.join(small_directory, f"service_{i:05d}{FILE_EXTENSION}")
+        write_log(path, rng, ENCODINGS[i % len(ENCODINGS)], line_count=SMALL_FILE_LINES)
+        parts["small"].append(path)
+
+    huge_directory = os.path.join(directory, "huge")
+    os.mkdir(huge_directory)
+    for i in range(HUGE_FILE_COUNT):
+        path = os.path.join(huge_directory, f"archive_{i}{FILE_EXTENSION}")
+        write_log(path, rng, ENCODINGS[i % len(ENCODINGS)], byte_count=int(HUGE_FILE_MEGABYTES * scale * 1024 * 1024))
+        parts["huge"].append(path)
+
+    tree_directory = os.path.join(directory, "tree")
+    #breadth-first, every directory gets BRANCHES subdirectories until DEPTH levels exist
+    level = [tree_directory]
+    os.mkdir(tree_directory)
+    for depth in range(DEPTH + 1):
+        next_level = []
+        for subdirectory in level:
+            for i in range(TREE_FILES_PER_DIRECTORY):
+                path = os.path.join(subdirectory, f"part_{i}{FILE_EXTENSION}")
+                write_log(path, rng, ENCODINGS[(depth + i) % len(ENCODINGS)], line_count=10)
+                parts["tree"].append(path)
+            if depth < DEPTH:
+                for branch in range(BRANCHES):
+                    child = os.path.join(subdirectory, f"level{depth + 1}_{branch}")
+                    os.mkdir(child)
+                    next_level.append(child)
+        level = next_level
+
+    return parts
+
+def main():
+    if len(sys.argv) < 2:
+        raise SystemExit("usage: python benchmarks/corpus.py DIRECTORY [scale] [seed]")
+    directory = sys.argv[1]
+    os.makedirs(directory, exist_ok=True)
+    parts = generate_corpus(directory, float(sys.argv[2]) if len(sys.argv) > 2 else 1.0, int(sys.argv[3]) if len(sys.argv) > 3 else 42)
+    for name, paths in parts.items():
+        print(f"{name:<6}{len(paths):>7} files{sum(os.path.getsize(path) for path in paths) / (1024 * 1024):>9.1f} MB")
+
+if __name__ == "__main__":
+    main()
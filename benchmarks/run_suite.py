@@ -0,0 +1,223 @@
+"""Benchmark suite: times enumeration, decoding, matching, report generation and concatenation separately.
+
+Run with `python benchmarks/run_suite.py [--scale 0.2] [--output results.json] [--compare baseline.json]`.
+The corpus (corpus.py) is generated into a temporary directory, everything runs offline and without a GUI.
+
+-Every benchmark runs `--repeat` times, the fastest and the median time are kept.
+-The results are written as JSON, `--compare` prints the ratio to an earlier result file and exits with 1 if a
+ benchmark got slower than `--tolerance` allows (e.g. to check a change to TU.read_text_file or the concatenation).
+"""
+import os, sys, json, time, argparse, platform, statistics, subprocess, tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools', 'search_files')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools', 'concatenate_files')))
+import search_files, concatenate_files
+from core import TermMatcher
+from core import TextUtilities as TU
+from core.DirectoryTraversal import iter_files
+from core.MatchStore import MatchStore
+from corpus import DENSE_TERM, SPARSE_TERM, FILE_EXTENSION, generate_corpus
+
+RESULTS_VERSION = 1
+SPARSE_TERMS = [SPARSE_TERM, "connection refused", "disk full"]
+
+class Corpus:
+    """The generated corpus and what the benchmarks prepare from it outside of the timed part."""
+
+    def __init__(self, directory, parts):
+        self.directory = directory
+        self.parts = parts
+        self.target_directory = os.path.join(directory, "target")
+        os.mkdir(self.target_directory)
+        self._texts = {}
+
+    def part_directory(self, part) -> str:
+        return os.path.join(self.directory, part)
+
+    def part_size(self, part) -> int:
+        return sum(os.path.getsize(path) for path in self.parts[part])
+
+    def texts(self, part) -> list:
+        if part not in self._texts:
+            self._texts[part] = [TU.read_text_file(path) for path in self.parts[part]]
+        return self._texts[part]
+
+    def clear_target(self):
+        for name in os.listdir(self.target_directory):
+            os.remove(os.path.join(self.target_directory, name))
+
+#every benchmark returns the number of bytes it processed, 0 if a rate doesn't make sense
+
+def enumerate_tree(corpus) -> int:
+    list(iter_files(corpus.part_directory("tree"), [FILE_EXTENSION]))
+    return 0
+
+def enumerate_small(corpus) -> int:
+    list(iter_files(corpus.part_directory("small"), [FILE_EXTENSION], max_depth=0))
+    return 0
+
+def decode_small(corpus) -> int:
+    for path in corpus.parts["small"]:
+        TU.read_text_file(path)
+    return corpus.part_size("small")
+
+def decode_huge(corpus) -> int:
+    for path in corpus.parts["huge"]:
+        TU.read_text_file(path)
+    return corpus.part_size("huge")
+
+def match_sparse(corpus) -> int:
+    matcher = TermMatcher(SPARSE_TERMS, False)
+    for text in corpus.texts("huge"):
+        matcher.find_positions(text)
+    return corpus.part_size("huge")
+
+def match_dense(corpus) -> int:
+    matcher = TermMatcher([DENSE_TERM, "request re"], False)
+    for text in corpus.texts("huge"):
+        matcher.find_positions(text)
+    return corpus.part_size("huge")
+
+def match_small(corpus) -> int:
+    #a matcher per file, like every worker of a search gets one for its files
+    for text in corpus.texts("small"):
+        TermMatcher([DENSE_TERM], False).find_positions(text)
+    return corpus.part_size("small")
+
+def report_dense(corpus) -> int:
+    #a match on every line of the huge files, stored and streamed into the report like run_search() does
+    match_store = MatchStore()
+    matcher = TermMatcher([DENSE_TERM], False)
+    for path, text in zip(corpus.parts["huge"], corpus.texts("huge")):
+        match_store.add(DENSE_TERM, os.path.basename(path), matcher.find_positions(text).get(DENSE_TERM))
+    with open(os.path.join(corpus.target_directory, "report.txt"), "w") as f:
+        search_files.write_report(f, [search_files.LINE], [DENSE_TERM], match_store)
+    match_store.close()
+    return 0
+
+def concatenate_small(corpus) -> int:
+    concatenate_files.run_concatenation(corpus.part_directory("small"), corpus.target_directory, FILE_EXTENSION, False, workers=1)
+    return corpus.part_size("small")
+
+def concatenate_tree(corpus) -> int:
+    concatenate_files.run_concatenation(corpus.part_directory("tree"), corpus.target_directory, FILE_EXTENSION, True, workers=1)
+    return corpus.part_size("tree")
+
+def concatenate_huge(corpus) -> int:
+    concatenate_files.run_concatenation(corpus.part_directory("huge"), corpus.target_directory, FILE_EXTENSION, False, workers=1)
+    return corpus.part_size("huge")
+
+def search_small(corpus) -> int:
+    search_files.run_search(corpus.part_directory("small"), corpus.target_directory, "\n".join(SPARSE_TERMS), False, workers=1)
+    return corpus.part_size("small")
+
+#(name, function), the part in front of the dot is the group `--only` selects
+BENCHMARKS = [
+    ("enumeration.tree", enumerate_tree),
+    ("enumeration.small", enumerate_small),
+    ("decoding.small", decode_small),
+    ("decoding.huge", decode_huge),
+    ("matching.sparse", match_sparse),
+    ("matching.dense", match_dense),
+    ("matching.small", match_small),
+    ("report.dense", report_dense),
+    ("concatenation.small", concatenate_small),
+    ("concatenation.tree", concatenate_tree),
+    ("concatenation.huge", concatenate_huge),
+    ("search.small", search_small)
+]
+
+def run_benchmark(function, corpus, repeat) -> dict:
+    seconds = []
+    processed_bytes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processed_bytes = function(corpus)
+        seconds.append(time.perf_counter() - start)
+        corpus.clear_target()
+    result = {
+        "seconds_min": min(seconds),
+        "seconds_median": statistics.median(seconds),
+        "repeat": repeat,
+        "bytes": processed_bytes
+    }
+    if processed_bytes:
+        result["mb_per_second"] = processed_bytes / (1024 * 1024) / min(seconds)
+    return result
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(baseline, results, tolerance) -> bool:
+    """Print the fastest times next to the baseline's, return False if a benchmark is slower than `tolerance` allows."""
+    passed = True
+    print(f"\n{'benchmark':<28}{'baseline s':>12}{'current s':>12}{'ratio':>8}")
+    for name, result in results.items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            print(f"{name:<28}{'-':>12}{result['seconds_min']:>12.4f}{'new':>8}")
+            continue
+        ratio = result["seconds_min"] / baseline_result["seconds_min"]
+        slower = ratio > 1 + tolerance
+        passed = passed and not slower
+        print(f"{name:<28}{baseline_result['seconds_min']:>12.4f}{result['seconds_min']:>12.4f}{ratio:>7.2f}x{'  slower' if slower else ''}")
+    return passed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time the stages of the toolbox tools on a generated corpus.")
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size relative to the default (about 60 MB)")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the corpus generator")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark")
+    parser.add_argument("--only", action="append", metavar="GROUP", help="only run this group (e.g. \"matching\"), can be repeated")
+    parser.add_argument("--output", metavar="JSON", help="write the results to this file")
+    parser.add_argument("--compare", metavar="JSON", help="compare with the results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="with --compare: allowed slowdown (default: 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    benchmarks = [(name, function) for name, function in BENCHMARKS if not args.only or name.split(".")[0] in args.only]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = Corpus(directory, generate_corpus(directory, args.scale, args.seed))
+        print(f"{'benchmark':<28}{'min s':>10}{'median s':>10}{'MB/s':>10}")
+        for name, function in benchmarks:
+            result = run_benchmark(function, corpus, args.repeat)
+            results[name] = result
+            rate = f"{result['mb_per_second']:.1f}" if "mb_per_second" in result else "-"
+            print(f"{name:<28}{result['seconds_min']:>10.4f}{result['seconds_median']:>10.4f}{rate:>10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": RESULTS_VERSION,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "git_commit": get_git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "scale": args.scale,
+                "seed": args.seed,
+                "results": results
+            }, f, indent=2)
+
+    if baseline is not None:
+        if baseline.get("scale") != args.scale or baseline.get("seed") != args.seed:
+            print("\nthe baseline was measured on another corpus (scale or seed differ)")
+        return 0 if compare_results(baseline, results, args.tolerance) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
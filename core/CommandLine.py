@@ -0,0 +1,71 @@
+import sys, argparse
+from .Execution import ToolError
+from .Instrumentation import PROFILE_MODES
+from .ReadAhead import DEFAULT_READ_AHEAD_THREADS
+
+#exit codes of the command line tools (1 follows grep: the run worked, but nothing was found)
+EXIT_SUCCESS = 0
+EXIT_NOTHING_FOUND = 1
+EXIT_ERROR = 2
+
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+def create_argument_parser(prog, description, epilog=None, use_processes=False) -> argparse.ArgumentParser:
+    """Return a parser with the arguments every tool shares: the source and target directory, exclusions, the worker pool, read-ahead, file screening and instrumentation.
+
+    -`use_processes` is the tool's default pool type, --processes and --threads override it.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description=description, epilog=epilog)
+    parser.add_argument("source", help="directory the files are read from")
+    parser.add_argument("-o", "--target", help="directory the result file is written to (default: the source directory)")
+    parser.add_argument("-w", "--workers", type=int, help="number of parallel workers (default: number of CPUs, 1 runs serially)")
+    parser.add_argument("-x", "--exclude", action="append", metavar="GLOB", help="leave out files and directories whose name or relative path matches, can be repeated")
+    pool_type = parser.add_mutually_exclusive_group()
+    pool_type.add_argument("--processes", action="store_const", const=True, dest="use_processes", help="run the workers in processes" + (" (default)" if use_processes else ""))
+    pool_type.add_argument("--threads", action="store_const", const=False, dest="use_processes", help="run the workers in threads" + ("" if use_processes else " (default)"))
+    parser.set_defaults(use_processes=use_processes)
+    parser.add_argument("--read-ahead", type=parse_size, metavar="SIZE", help="read upcoming files on separate threads while the workers process the earlier ones, holding up to SIZE bytes, e.g. 64M (helps on slow disks and network shares)")
+    parser.add_argument("--read-ahead-threads", type=int, default=DEFAULT_READ_AHEAD_THREADS, metavar="N", help=f"threads reading ahead (default: {DEFAULT_READ_AHEAD_THREADS}, one keeps a spinning disk reading sequentially, network shares can use more)")
+    parser.add_argument("--max-size", type=parse_size, metavar="SIZE", help="skip files larger than this, e.g. 500K, 100M or 2G (default: no limit)")
+    parser.add_argument("--include-binary", action="store_true", help="also read files that look binary (NUL bytes or many control characters at the start)")
+    parser.add_argument("--compressed", action="store_true", help="also read .gz, .bz2 and .xz files and the members of .zip archives, decompressed while being read (by default they are left out)")
+    parser.add_argument("--stats", action="store_true", help="write the time per stage and counters to \"<result>.summary.json\"")
+    parser.add_argument("--profile", choices=PROFILE_MODES, help="also profile the run: cprofile writes \"<result>.prof\" (use -w 1 to include the reading), sampling adds the busiest functions of all threads to the summary")
+    return parser
+
+def parse_size(string) -> int:
+    """Parse a size argument like "4096", "500K", "100M" or "2G" (factors of 1024) into bytes."""
+    number = string.strip().upper()
+    if number.endswith("B"):
+        number = number[:-1]
+    factor = SIZE_SUFFIXES.get(number[-1:], 1)
+    if number[-1:] in SIZE_SUFFIXES:
+        number = number[:-1]
+    try:
+        size = float(number)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {string!r}")
+    if size < 0:
+        raise argparse.ArgumentTypeError("the size can't be negative")
+    return int(size * factor)
+
+def read_multiline_argument(values, stdin=None) -> str:
+    """Join the repeated argument `values` into the newline separated text the GUI's text fields hold.
+
+    -Without values (or with the single value "-") the lines are read from `stdin` instead, unless it is a terminal.
+    """
+    if stdin is None:
+        stdin = sys.stdin
+    if values and values != ["-"]:
+        return "\n".join(values)
+    if stdin is None or stdin.isatty():
+        return ""
+    return stdin.read()
+
+def run_tool(function, *args, **kwargs) -> tuple:
+    """Call `function` and return (exit_code, result), a ToolError is printed to stderr and exits with EXIT_ERROR."""
+    try:
+        return EXIT_SUCCESS, function(*args, **kwargs)
+    except ToolError as e:
+        print(f"{e.title}: {e.message}", file=sys.stderr)
+        return EXIT_ERROR, None
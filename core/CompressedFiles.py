@@ -0,0 +1,70 @@
+import os, bz2, gzip, lzma, zlib, zipfile
+
+#compressed files are decompressed while they are read, the extension in front ("a.log.gz") decides whether they are read
+STREAM_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+ZIP_EXTENSION = ".zip"
+COMPRESSED_EXTENSIONS = frozenset([*STREAM_OPENERS, ZIP_EXTENSION])
+#the files inside a zip archive are read as "archive.zip!member.log"
+MEMBER_SEPARATOR = "!"
+
+#what reading a damaged or truncated compressed file can raise besides OSError
+READ_ERRORS = (OSError, EOFError, zlib.error, lzma.LZMAError, zipfile.BadZipFile)
+
+def split_member_path(path) -> tuple:
+    """Split "directory/archive.zip!member.log" into ("directory/archive.zip", "member.log"), any other path into (path, None)."""
+    index = path.lower().find(ZIP_EXTENSION + MEMBER_SEPARATOR)
+    if index < 0:
+        return path, None
+    index += len(ZIP_EXTENSION)
+    return path[:index], path[index + len(MEMBER_SEPARATOR):]
+
+def get_stream_opener(path):
+    """Return the open() of the decompressing module for a ".gz", ".bz2" or ".xz" file, None for any other path."""
+    lower_path = path.lower()
+    for extension, opener in STREAM_OPENERS.items():
+        if lower_path.endswith(extension):
+            return opener
+    return None
+
+def is_compressed(path) -> bool:
+    return get_stream_opener(path) is not None or split_member_path(path)[1] is not None
+
+def get_base_name(path) -> str:
+    """os.path.basename() that keeps the member of a zip archive: "directory/archive.zip!logs/a.log" is "archive.zip!logs/a.log"."""
+    archive_path, member = split_member_path(path)
+    if member is None:
+        return os.path.basename(path)
+    return os.path.basename(archive_path) + MEMBER_SEPARATOR + member
+
+def stat_source(path) -> os.stat_result:
+    """os.stat() of the file on disk, for a zip member that of its archive."""
+    return os.stat(split_member_path(path)[0])
+
+def open_binary(path) -> tuple:
+    """Open `path` for reading bytes and return (file, size), compressed files and zip members are decompressed as they are read.
+
+    -`size` is the size on disk, for a zip member its uncompressed size.
+    -Only a plain file is opened with open(), so only it can be memory-mapped. The decompressing files can seek,
+     but seeking backwards starts decompressing from the beginning again.
+    -Raises one of READ_ERRORS if the file can't be opened.
+    """
+    archive_path, member = split_member_path(path)
+    if member is not None:
+        #the member keeps the archive's file open until it is closed itself
+        with zipfile.ZipFile(archive_path) as archive:
+            info = archive.getinfo(member)
+            return archive.open(info), info.file_size
+    opener = get_stream_opener(path)
+    if opener is None:
+        f = open(path, "rb")
+        return f, os.fstat(f.fileno()).st_size
+    size = os.path.getsize(path)
+    return opener(path, "rb"), size
+
+def list_zip_members(path) -> list:
+    """Return the names of the files in the zip archive `path` in archive order, an empty list if it can't be read."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return [info.filename for info in archive.infolist() if not info.is_dir()]
+    except (OSError, zipfile.BadZipFile):
+        return []
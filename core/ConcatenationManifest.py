@@ -0,0 +1,90 @@
+import os, json, zlib
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+#the last bytes of a file are fingerprinted, if they are still in place the file was only appended to
+TAIL_FINGERPRINT_SIZE = 4096
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def crc32_of_stream(f, length=None, crc=0) -> int:
+    """Continue `crc` with the next `length` bytes of the binary file `f` (all remaining bytes if None)."""
+    while length is None or length > 0:
+        data = f.read(HASH_CHUNK_SIZE if length is None else min(length, HASH_CHUNK_SIZE))
+        if not data:
+            break
+        crc = zlib.crc32(data, crc)
+        if length is not None:
+            length -= len(data)
+    return crc
+
+def read_tail(f, size) -> bytes:
+    """Return the up to TAIL_FINGERPRINT_SIZE bytes in front of byte `size` of the binary file `f`."""
+    start = max(size - TAIL_FINGERPRINT_SIZE, 0)
+    f.seek(start)
+    return f.read(size - start)
+
+class ConcatenationManifest:
+    """What an incremental concatenation has written into its output file, stored as JSON next to it.
+
+    -`files` maps every concatenated path to {"size", "mtime_ns", "crc32", "tail_crc32", "encoding", "sections"},
+     "crc32" covers the whole content and is continued with zlib.crc32() when only a tail was appended,
+     "tail_crc32" covers the last TAIL_FINGERPRINT_SIZE bytes and "sections" lists the [start, end) byte ranges
+     of the file's sections in the output.
+    -`last_section_path` is the file of the last section in the output and `last_section_end` the offset of that
+     section's closing separator, appended lines of that file extend the section in place.
+    -`skipped` maps the files the last run skipped without reading them (see FileScreen) to the reason.
+    -`output_size` is the size the output had when the manifest was saved. If the output is missing or has
+     another size (edited, or a run that stopped before saving) the manifest is discarded and the output rebuilt.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.path = output_path + MANIFEST_SUFFIX
+        self.files = {}
+        self.output_size = 0
+        self.last_section_path = None
+        self.last_section_end = None
+        self.skipped = {}
+        self.valid = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION or os.path.getsize(self.output_path) != data["output_size"]:
+                return
+            self.files = data["files"]
+            self.output_size = data["output_size"]
+            self.last_section_path = data.get("last_section_path")
+            self.last_section_end = data.get("last_section_end")
+            self.skipped = data.get("skipped", {})
+            self.valid = True
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+    def reset(self):
+        self.files = {}
+        self.output_size = 0
+        self.last_section_path = None
+        self.last_section_end = None
+        self.skipped = {}
+
+    def save(self, output_size, last_section_path, last_section_end):
+        """Write the manifest through a temporary file, so an interrupted save leaves the previous one intact."""
+        self.output_size = output_size
+        self.last_section_path = last_section_path
+        self.last_section_end = last_section_end
+        data = {
+            "version": MANIFEST_VERSION,
+            "output_size": output_size,
+            "last_section_path": last_section_path,
+            "last_section_end": last_section_end,
+            "skipped": self.skipped,
+            "files": self.files
+        }
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temporary_path, self.path)
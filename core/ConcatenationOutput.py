@@ -0,0 +1,226 @@
+import io, os, json, zlib
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_MODES = (COMPRESSION_GZIP, COMPRESSION_ZSTD)
+COMPRESSION_SUFFIXES = {COMPRESSION_GZIP: ".gz", COMPRESSION_ZSTD: ".zst"}
+COMPRESSION_LEVELS = {COMPRESSION_GZIP: range(0, 10), COMPRESSION_ZSTD: range(1, 23)}
+DEFAULT_COMPRESSION_LEVELS = {COMPRESSION_GZIP: 6, COMPRESSION_ZSTD: 3}
+
+#a compressed part is a series of independent gzip members or zstd frames ("blocks"), a new one starts with the next
+#section once this many bytes went into the current one, so a reader of the index only decompresses from that block on
+BLOCK_SIZE = 8 * 1024 * 1024
+#the first bytes of the current block are kept, a rollback into them writes them again
+BLOCK_HEAD_SIZE = 64 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+
+def load_zstandard():
+    """Return the optional "zstandard" module, None if it isn't installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+def get_index_path(path) -> str:
+    return os.path.splitext(path)[0] + INDEX_SUFFIX
+
+class ConcatenationOutput:
+    """The result of a concatenation: one text file, or numbered parts, optionally compressed with gzip or zstd.
+
+    -`path` is the result file ("Result_....txt"). With `part_size` (bytes on disk) the output is split into
+     "Result_....part001.txt", "...part002.txt" and so on, a new part starts with the first section after the
+     current one reached `part_size`, so a section is never split. Every part starts with `part_header`.
+    -With `compression` (one of COMPRESSION_MODES) ".gz" or ".zst" is appended to the names and the text is
+     compressed while it is written, zstd uses `threads` threads (the "zstandard" package must be installed).
+    -write() takes text like a file opened in text mode ("\n" becomes os.linesep) and writes it as UTF-8.
+    -start_section(path) and end_section() bracket the section of a source file. If the output is compressed or
+     split, close() writes an index ("Result_....index.json") with the part, offset and length of every section.
+    -tell(), seek() and truncate() only support going back to an earlier position (e.g. TU.copy_text_file() removing
+     what a failed encoding wrote), in compressed output no further back than BLOCK_HEAD_SIZE into the current block.
+    """
+
+    def __init__(self, path, compression=None, compression_level=None, part_size=None, threads=0, part_header=""):
+        if compression is not None and compression not in COMPRESSION_MODES:
+            raise ValueError(f"unknown compression: {compression}")
+        if compression is not None and compression_level is None:
+            compression_level = DEFAULT_COMPRESSION_LEVELS[compression]
+        if compression is not None and compression_level not in COMPRESSION_LEVELS[compression]:
+            raise ValueError(f"invalid {compression} compression level: {compression_level}")
+        self.path = path
+        self.compression = compression
+        self.compression_level = compression_level
+        self.part_size = part_size
+        self.part_header = part_header
+        self.index_path = get_index_path(path) if compression is not None or part_size is not None else None
+        self.paths = []
+        self.sections = []
+        self.size = 0
+        self._zstd_context = None
+        if compression == COMPRESSION_ZSTD:
+            self._zstd_context = load_zstandard().ZstdCompressor(level=compression_level, threads=threads)
+        self._file = None
+        self._section = None
+        self._seek_position = None
+        self._open_part()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open_part(self):
+        if self.part_size is None:
+            path = self.path
+        else:
+            root, extension = os.path.splitext(self.path)
+            path = f"{root}.part{len(self.paths) + 1:03d}{extension}"
+        path += COMPRESSION_SUFFIXES.get(self.compression, "")
+        self.paths.append(path)
+        self._file = open(path, "wb", buffering=WRITE_BUFFER_SIZE)
+        #uncompressed position in the part, and where the current block starts in the part and in the compressed file
+        self._position = 0
+        self._block_start = 0
+        self._block_file_start = 0
+        self._block_head = b""
+        self._compressor = None
+        #uncompressed position up to which the compressor has written everything to the file
+        self._flushed_position = 0
+        self._section_count = 0
+        self.write(self.part_header)
+
+    def _close_part(self):
+        self._end_block()
+        self.size += self._file.tell()
+        self._file.close()
+        self._file = None
+
+    def _end_block(self):
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+            self._compressor = None
+        self._block_start = self._position
+        self._block_file_start = self._file.tell()
+        self._block_head = b""
+        self._flushed_position = self._position
+
+    def _part_file_size(self) -> int:
+        """Return the size of the current part on disk, what the compressor holds back is flushed first if it can fill the part."""
+        if self._compressor is not None and self._position > self._flushed_position:
+            #the compressor holds back at most about what went into it since the last flush
+            if self._file.tell() + (self._position - self._flushed_position) >= self.part_size:
+                if self.compression == COMPRESSION_GZIP:
+                    self._file.write(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+                else:
+                    self._file.write(self._compressor.flush(load_zstandard().COMPRESSOBJ_FLUSH_BLOCK))
+                self._flushed_position = self._position
+        return self._file.tell()
+
+    def _new_compressor(self):
+        if self.compression == COMPRESSION_GZIP:
+            return zlib.compressobj(self.compression_level, zlib.DEFLATED, 31)
+        return self._zstd_context.compressobj()
+
+    def write(self, text):
+        if os.linesep != "\n":
+            text = text.replace("\n", os.linesep)
+        data = text.encode("utf-8")
+        if not data:
+            return
+        if self.compression is None:
+            self._file.write(data)
+        else:
+            if self._compressor is None:
+                self._compressor = self._new_compressor()
+            if len(self._block_head) < BLOCK_HEAD_SIZE:
+                self._block_head += data[:BLOCK_HEAD_SIZE - len(self._block_head)]
+            self._file.write(self._compressor.compress(data))
+        self._position += len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, position):
+        if position > self._position:
+            raise io.UnsupportedOperation("the output can only go back to an earlier position")
+        self._seek_position = position
+
+    def truncate(self):
+        """Remove everything behind the position given to seek(), including the sections that started there."""
+        position = self._seek_position if self._seek_position is not None else self._position
+        self._seek_position = None
+        if self.compression is None:
+            self._file.seek(position)
+            self._file.truncate()
+            self._position = position
+        else:
+            if position < self._block_start or position - self._block_start > len(self._block_head):
+                raise io.UnsupportedOperation("compressed output can only go back into the start of the current block")
+            head = self._block_head[:position - self._block_start]
+            self._file.seek(self._block_file_start)
+            self._file.truncate()
+            self._compressor = None
+            self._block_head = b""
+            self._position = self._block_start
+            self._flushed_position = self._block_start
+            if head:
+                self._compressor = self._new_compressor()
+                self._block_head = head
+                self._file.write(self._compressor.compress(head))
+                self._position += len(head)
+        part = os.path.basename(self.paths[-1])
+        while self.sections and self.sections[-1]["part"] == part and self.sections[-1]["offset"] >= position:
+            self.sections.pop()
+            self._section_count -= 1
+        if self._section is not None and self._section["offset"] >= position:
+            self._section = None
+
+    def start_section(self, source_path, streamed=False):
+        """Mark that the section of `source_path` starts with the next write().
+
+        -A new part starts here if the current one already holds a section and reached `part_size`.
+        -A compressed `streamed` section (copied in chunks, it may have to be removed again) or one behind a full
+         block starts a new block.
+        """
+        if self.part_size is not None and self._section_count > 0 and self._part_file_size() >= self.part_size:
+            self._close_part()
+            self._open_part()
+        if self.compression is not None and self._position > self._block_start and (streamed or self._position - self._block_start >= BLOCK_SIZE):
+            self._end_block()
+        self._section = {"path": source_path, "part": os.path.basename(self.paths[-1]), "offset": self._position}
+        if self.compression is not None:
+            self._section["block_offset"] = self._block_file_start
+            self._section["block_skip"] = self._position - self._block_start
+        self.sections.append(self._section)
+        self._section_count += 1
+
+    def end_section(self):
+        if self._section is not None:
+            self._section["length"] = self._position - self._section["offset"]
+            self._section = None
+
+    def close(self):
+        if self._file is None:
+            return
+        self._close_part()
+        if self.index_path is not None:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "compression": self.compression,
+                    "parts": [os.path.basename(path) for path in self.paths],
+                    "sections": self.sections
+                }, f, indent=1)
+
+    def remove(self):
+        """Close the output and delete all its files."""
+        self.close()
+        for path in self.paths + ([self.index_path] if self.index_path is not None else []):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,152 @@
+import os, sqlite3
+
+INDEX_FILE_NAME = ".search_files_index.sqlite3"
+SCHEMA_VERSION = "1"
+
+TOKENIZE_CHUNK_SIZE = 1024 * 1024
+
+def extract_trigrams(text) -> set:
+    """Return the distinct three character substrings of the whitespace separated words of the lowercased `text`.
+
+    -Log text repeats the same words over and over, so every distinct word is only sliced up once.
+    -The text is processed in slices (overlapping by two characters), so no lowercased copy of all of it is made.
+    """
+    trigrams = set()
+    for start in range(0, len(text), TOKENIZE_CHUNK_SIZE):
+        for word in set(text[start:start + TOKENIZE_CHUNK_SIZE + 2].lower().split()):
+            trigrams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return trigrams
+
+def get_term_trigrams(search_term) -> set:
+    """Return the trigrams every file containing `search_term` must have, or None if the term can't be filtered.
+
+    -Only ASCII terms are filtered: their lowercase form is found in the lowercased text in any case mode,
+     while non-ASCII lowercasing can depend on the surrounding characters (e.g. the final sigma).
+    -Trigrams containing whitespace are not indexed, so a term needs a word of at least three characters.
+    """
+    if not search_term.isascii():
+        return None
+    trigrams = extract_trigrams(search_term)
+    return trigrams if trigrams else None
+
+class ContentIndex:
+    """Trigram index of the files of one directory, stored in an SQLite database.
+
+    -Files are keyed by name, size and modification time, only new or changed files have to be tokenized again.
+    -The index only narrows a search down to candidate files, the candidates still have to be searched.
+    -A database with an unknown schema version or one that can't be read is deleted and rebuilt.
+    """
+
+    def __init__(self, database_path):
+        self.database_path = database_path
+        self.rebuilt = False
+        try:
+            self._connect()
+            self._validate()
+        except sqlite3.DatabaseError:
+            self._rebuild()
+
+    @classmethod
+    def for_directory(cls, directory):
+        return cls(os.path.join(directory, INDEX_FILE_NAME))
+
+    def _connect(self):
+        self.connection = sqlite3.connect(self.database_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+    def _validate(self):
+        tables = {row[0] for row in self.connection.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        if not tables:
+            self._create_schema()
+            return
+
+        version = None
+        if "meta" in tables:
+            row = self.connection.execute("SELECT value FROM meta WHERE key='schema_version'").fetchone()
+            version = row[0] if row else None
+        if version != SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(f"unexpected index schema version: {version}")
+
+        #touches the tables, a damaged database fails here
+        self.connection.execute("SELECT COUNT(*) FROM files").fetchone()
+        self.connection.execute("SELECT trigram FROM trigrams LIMIT 1").fetchone()
+
+    def _create_schema(self):
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                CREATE TABLE files (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL);
+                CREATE TABLE trigrams (trigram TEXT NOT NULL, file_id INTEGER NOT NULL, PRIMARY KEY (trigram, file_id)) WITHOUT ROWID;
+                CREATE INDEX trigrams_by_file ON trigrams (file_id);
+            """)
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('schema_version', ?)", (SCHEMA_VERSION,))
+
+    def _rebuild(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        for suffix in ["", "-wal", "-shm", "-journal"]:
+            try:
+                os.remove(self.database_path + suffix)
+            except FileNotFoundError:
+                pass
+        self.rebuilt = True
+        self._connect()
+        self._create_schema()
+
+    def stale_files(self, file_stats) -> set:
+        """Return the names from `file_stats` ({name: (size, mtime_ns)}) that are missing from the index or changed."""
+        try:
+            indexed = {name: (size, mtime_ns) for name, size, mtime_ns in self.connection.execute("SELECT name, size, mtime_ns FROM files")}
+        except sqlite3.DatabaseError:
+            self._rebuild()
+            return set(file_stats)
+        return {name for name, stat in file_stats.items() if indexed.get(name) != tuple(stat)}
+
+    def candidate_files(self, search_terms) -> set:
+        """Return the indexed names that may contain any of `search_terms`, or None if every file is a candidate."""
+        candidates = set()
+        try:
+            for search_term in search_terms:
+                trigrams = get_term_trigrams(search_term)
+                if trigrams is None:
+                    return None
+                placeholders = ",".join("?" * len(trigrams))
+                rows = self.connection.execute(
+                    f"SELECT files.name FROM trigrams JOIN files ON files.id = trigrams.file_id "
+                    f"WHERE trigrams.trigram IN ({placeholders}) GROUP BY trigrams.file_id HAVING COUNT(*) = ?",
+                    (*trigrams, len(trigrams))
+                )
+                candidates.update(row[0] for row in rows)
+        except sqlite3.DatabaseError:
+            return None
+        return candidates
+
+    def store_file(self, name, size, mtime_ns, trigrams):
+        """Replace the indexed trigrams of `name`."""
+        with self.connection:
+            row = self.connection.execute("SELECT id FROM files WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                file_id = self.connection.execute(
+                    "INSERT INTO files (name, size, mtime_ns) VALUES (?, ?, ?)", (name, size, mtime_ns)
+                ).lastrowid
+            else:
+                file_id = row[0]
+                self.connection.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (size, mtime_ns, file_id))
+                self.connection.execute("DELETE FROM trigrams WHERE file_id = ?", (file_id,))
+            self.connection.executemany(
+                "INSERT INTO trigrams (trigram, file_id) VALUES (?, ?)", ((trigram, file_id) for trigram in trigrams)
+            )
+
+    def remove_files_except(self, names):
+        """Drop every indexed file that is not in `names` (e.g. deleted files)."""
+        names = set(names)
+        with self.connection:
+            removed = [(file_id,) for file_id, name in self.connection.execute("SELECT id, name FROM files") if name not in names]
+            self.connection.executemany("DELETE FROM trigrams WHERE file_id = ?", removed)
+            self.connection.executemany("DELETE FROM files WHERE id = ?", removed)
+
+    def close(self):
+        self.connection.close()
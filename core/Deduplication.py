@@ -0,0 +1,82 @@
+import os, hashlib, collections, zipfile
+from .CompressedFiles import get_stream_opener, split_member_path
+
+#files are hashed in pieces of this size, so memory use doesn't depend on the file size
+HASH_CHUNK_SIZE = 1024 * 1024
+DIGEST_SIZE = 16
+
+def hash_stream(f, data=b"") -> bytes:
+    """Return the digest of `data` followed by the remaining bytes of the binary file `f`."""
+    hasher = hashlib.blake2b(data, digest_size=DIGEST_SIZE)
+    while True:
+        data = f.read(HASH_CHUNK_SIZE)
+        if not data:
+            break
+        hasher.update(data)
+    return hasher.digest()
+
+def hash_bytes(data) -> bytes:
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+def find_size_collisions(files) -> set:
+    """Return the files of `files` that can have an identical copy among them, only they are hashed.
+
+    -Files are grouped by their content size: the size on disk, for a zip member its uncompressed size (the
+     directory of every archive is read once).
+    -The content size of a ".gz", ".bz2" or ".xz" file is only known once it is decompressed, if there is one every
+     file is returned. The trailer of a ".gz" file only holds the size of its last member, two copies of the same
+     content split into members differently would end up in different groups.
+    -Files that can't be stat'ed (or archives that can't be read) are left out.
+    """
+    files_by_size = collections.defaultdict(list)
+    unknown_size = False
+    member_sizes = {}
+    for file in files:
+        archive_path, member = split_member_path(file)
+        try:
+            if member is not None:
+                if archive_path not in member_sizes:
+                    member_sizes[archive_path] = {}
+                    with zipfile.ZipFile(archive_path) as archive:
+                        member_sizes[archive_path] = {info.filename: info.file_size for info in archive.infolist()}
+                size = member_sizes[archive_path][member]
+            elif get_stream_opener(file) is not None:
+                unknown_size = True
+                size = None
+            else:
+                size = os.stat(file).st_size
+        except (OSError, KeyError, zipfile.BadZipFile):
+            continue
+        files_by_size[size].append(file)
+    if unknown_size:
+        all_files = [file for same_size in files_by_size.values() for file in same_size]
+        return set(all_files) if len(all_files) > 1 else set()
+    return {file for same_size in files_by_size.values() if len(same_size) > 1 for file in same_size}
+
+class DuplicateIndex:
+    """Remember the first file of every content digest and what writing its later copies as references saved.
+
+    -add() records a file once its content was written, find_original() returns that file for a later copy.
+    """
+
+    def __init__(self):
+        self._originals = {}
+        self.duplicate_count = 0
+        self.saved_bytes = 0
+
+    def find_original(self, digest) -> str:
+        """Return the first file with the content `digest`, None if there is none (or `digest` is None)."""
+        if digest is None:
+            return None
+        original = self._originals.get(digest)
+        return None if original is None else original[0]
+
+    def add(self, file, digest, length):
+        """Record `file` as the original of `digest`, `length` is how many bytes its content took in the result."""
+        if digest is not None and digest not in self._originals:
+            self._originals[digest] = (file, length)
+
+    def add_duplicate(self, digest):
+        """Count a copy of `digest` that was written as a reference instead of its content."""
+        self.duplicate_count += 1
+        self.saved_bytes += self._originals[digest][1]
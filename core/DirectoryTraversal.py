@@ -0,0 +1,115 @@
+import os, re, fnmatch
+from .CompressedFiles import COMPRESSED_EXTENSIONS, ZIP_EXTENSION, MEMBER_SEPARATOR, list_zip_members
+
+#what iter_files() does with symbolic links
+SYMLINKS_SKIP = "skip"      #ignore links to files and directories
+SYMLINKS_FILES = "files"    #include links to files, don't descend into linked directories (like os.walk)
+SYMLINKS_FOLLOW = "follow"  #include links to files and descend into linked directories (each directory only once)
+SYMLINK_POLICIES = (SYMLINKS_SKIP, SYMLINKS_FILES, SYMLINKS_FOLLOW)
+
+def get_extension(name) -> str:
+    """Return the lowercased extension of the file `name` the way os.path.splitext() finds it ("" if there is none)."""
+    index = name.rfind(".")
+    if index <= 0:
+        return ""
+    #leading dots belong to the name (".bashrc" has no extension)
+    if name[0] == "." and index < len(name) - len(name.lstrip(".")):
+        return ""
+    return name[index:].lower()
+
+def compile_exclude_patterns(exclude_patterns):
+    """Compile glob patterns (e.g. "*.bak", "node_modules", "archive/*") into one regex, None if there are none."""
+    patterns = [pattern for pattern in exclude_patterns if pattern]
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(os.path.normcase(pattern)) for pattern in patterns))
+
+def iter_files(directory, file_extensions=None, max_depth=None, exclude_patterns=(), symlinks=SYMLINKS_FILES, compressed=False):
+    """Yield the paths of the files in `directory` (and its subdirectories) lazily, in the order os.walk() visits them.
+
+    -os.scandir() entries already know their type on most systems, so only names with a matching extension
+     (looked up in a frozenset) and directories cost an is_file() / is_dir() call, which seldom needs a stat.
+    -`max_depth` limits the descent: 0 only lists `directory` itself, None descends into every subdirectory.
+    -A file or directory is left out if its name or its path relative to `directory` matches one of the
+     `exclude_patterns` globs, excluded directories are not descended into.
+    -`symlinks` is one of SYMLINK_POLICIES.
+    -With `compressed` (and `file_extensions`) a ".gz", ".bz2" or ".xz" file is listed if the extension in front
+     of it matches ("a.log.gz") and a ".zip" archive is listed as "archive.zip!member" for each member that matches.
+    -If `directory` itself can't be read the OSError is raised, unreadable subdirectories are skipped like os.walk() does.
+    """
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValueError(f"unknown symlink policy: {symlinks}")
+    if file_extensions is not None:
+        file_extensions = frozenset(extension.lower() for extension in file_extensions)
+    exclude = compile_exclude_patterns(exclude_patterns)
+
+    visited = set()
+    if symlinks == SYMLINKS_FOLLOW:
+        stat = os.stat(directory)
+        visited.add((stat.st_dev, stat.st_ino))
+
+    #depth-first, the subdirectories of a directory are visited in the order they were listed
+    stack = [(directory, "", 0)]
+    while stack:
+        path, relative_path, depth = stack.pop()
+        subdirectories = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if exclude is not None:
+                        if exclude.match(os.path.normcase(name)) or (relative_path and exclude.match(os.path.normcase(os.path.join(relative_path, name)))):
+                            continue
+                    try:
+                        if file_extensions is not None and get_extension(name) not in file_extensions:
+                            if compressed and get_extension(name) in COMPRESSED_EXTENSIONS and entry.is_file():
+                                if symlinks != SYMLINKS_SKIP or not entry.is_symlink():
+                                    yield from _iter_compressed_file(entry.path, name, file_extensions, exclude)
+                                continue
+                            if max_depth is None or depth < max_depth:
+                                if entry.is_dir():
+                                    subdirectories.append(entry)
+                            continue
+                        if entry.is_file():
+                            if symlinks == SYMLINKS_SKIP and entry.is_symlink():
+                                continue
+                            yield entry.path
+                        elif (max_depth is None or depth < max_depth) and entry.is_dir():
+                            subdirectories.append(entry)
+                    except OSError:
+                        continue
+        except OSError:
+            if depth == 0:
+                raise
+            continue
+
+        #under SYMLINKS_FOLLOW every directory is identified by its device and inode, so link cycles end
+        descend = []
+        for entry in subdirectories:
+            try:
+                if entry.is_symlink() and symlinks != SYMLINKS_FOLLOW:
+                    continue
+                if symlinks == SYMLINKS_FOLLOW:
+                    stat = os.stat(entry.path)
+                    if (stat.st_dev, stat.st_ino) in visited:
+                        continue
+                    visited.add((stat.st_dev, stat.st_ino))
+            except OSError:
+                continue
+            descend.append((entry.path, os.path.join(relative_path, entry.name), depth + 1))
+        stack.extend(reversed(descend))
+
+def _iter_compressed_file(path, name, file_extensions, exclude):
+    """Yield the compressed file `path` or the members of the zip archive `path` iter_files() lists, see there."""
+    extension = get_extension(name)
+    if extension != ZIP_EXTENSION:
+        if get_extension(name[:-len(extension)]) in file_extensions:
+            yield path
+        return
+    for member in list_zip_members(path):
+        member_name = member.rsplit("/", 1)[-1]
+        if get_extension(member_name) not in file_extensions:
+            continue
+        if exclude is not None and (exclude.match(os.path.normcase(member_name)) or exclude.match(os.path.normcase(member))):
+            continue
+        yield path + MEMBER_SEPARATOR + member
@@ -0,0 +1,135 @@
+import os, itertools, functools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class ToolError(Exception):
+    """A run of a tool that can't go ahead, e.g. because of invalid input.
+
+    -The GUI shows `title` and `message` in a message box, the command line prints them to stderr.
+    """
+
+    def __init__(self, title, message):
+        super().__init__(f"{title}: {message}")
+        self.title = title
+        self.message = message
+
+#marks the end of the items in map_in_order()
+_NO_ITEM = object()
+
+#how often map_in_order() looks for a new read-ahead result while it waits for its workers
+READ_AHEAD_POLL_SECONDS = 0.01
+
+#the keyword arguments map_in_order() passes to every call in a worker process, set once per process
+_worker_shared = {}
+
+def _set_worker_shared(shared):
+    _worker_shared.clear()
+    _worker_shared.update(shared)
+
+def _call_with_worker_shared(function, item):
+    return function(item, **_worker_shared)
+
+def default_worker_count() -> int:
+    return os.cpu_count() or 1
+
+def map_in_order(function, items, workers=None, use_processes=False, progress_callback=None, cancel_event=None, with_items=False, shared=None, read_ahead=None):
+    """Apply `function` to every item on a pool of workers and yield the results in the order of `items`.
+
+    -`items` may be any iterable (e.g. a lazy directory traversal), it is only consumed as far as the pool needs items.
+    -`workers` defaults to the number of CPUs, with 1 (or less) everything runs in the calling thread.
+    -`use_processes` selects a ProcessPoolExecutor (function, items and results must be picklable) instead of threads.
+    -At most two items per worker are in flight, so finished results don't pile up while the caller consumes them.
+    -`progress_callback(done, total)` is called from the calling thread whenever futures complete,
+     `total` is None as long as a lazy iterable hasn't been consumed to the end.
+    -Once `cancel_event` (a threading.Event) is set, no further items are started and the iteration ends early,
+     the items already running are finished first.
+    -With `with_items` (item, result) pairs are yielded instead of the results.
+    -`shared` ({name: value}) are keyword arguments of every call, e.g. a compiled matcher. Worker processes get
+     them once when they start instead of with every item, so only `function` (by name) and the item are pickled
+     per call.
+    -`read_ahead` is the ReadAhead (with `hold_results`) that `items` comes from. Every item is released after its
+     result was yielded, so the items in flight count against the read-ahead budget. While items are in flight a new
+     one is only taken once it is read, the results of the others don't wait for the budget they hold.
+    """
+    total = len(items) if hasattr(items, "__len__") else None
+    items = iter(items)
+    if workers is None:
+        workers = default_worker_count()
+
+    #a pool is only worth starting for more than one item
+    first_items = list(itertools.islice(items, 2))
+    call = function if not shared else functools.partial(function, **shared)
+    if workers <= 1 or len(first_items) <= 1:
+        if len(first_items) <= 1:
+            total = len(first_items)
+        done = 0
+        for item in itertools.chain(first_items, items):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            result = call(item)
+            done += 1
+            if progress_callback is not None:
+                progress_callback(done, total)
+            yield (item, result) if with_items else result
+            if read_ahead is not None:
+                read_ahead.release()
+        if progress_callback is not None and total is None:
+            progress_callback(done, done)
+        return
+
+    #the items taken already, the read-ahead only tells about the ones after them
+    taken_items = deque(first_items)
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    max_in_flight = workers * 2
+    submitted = 0
+    done = 0
+    exhausted = False
+    pending = deque()
+    running = set()
+
+    if use_processes and shared:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_set_worker_shared, initargs=(shared,))
+        submit = functools.partial(executor.submit, _call_with_worker_shared, function)
+    else:
+        executor = executor_class(max_workers=workers)
+        submit = functools.partial(executor.submit, call)
+
+    with executor:
+        try:
+            while not exhausted or pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+
+                #keep the pool busy
+                waiting_for_read_ahead = False
+                while not exhausted and len(pending) < max_in_flight:
+                    if read_ahead is not None and pending and not taken_items and not read_ahead.ready():
+                        waiting_for_read_ahead = True
+                        break
+                    item = taken_items.popleft() if taken_items else next(items, _NO_ITEM)
+                    if item is _NO_ITEM:
+                        exhausted = True
+                        total = submitted
+                        if progress_callback is not None:
+                            progress_callback(done, total)
+                        break
+                    future = submit(item)
+                    pending.append((item, future))
+                    running.add(future)
+                    submitted += 1
+
+                if running:
+                    finished, running = wait(running, timeout=READ_AHEAD_POLL_SECONDS if waiting_for_read_ahead else None, return_when=FIRST_COMPLETED)
+                    done += len(finished)
+                    if progress_callback is not None and finished:
+                        progress_callback(done, total)
+
+                #hand out results strictly in submission order
+                while pending and pending[0][1].done():
+                    item, future = pending.popleft()
+                    yield (item, future.result()) if with_items else future.result()
+                    if read_ahead is not None:
+                        read_ahead.release()
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,73 @@
+#the first bytes of a file decide whether it is text, a NUL byte or too many control characters mean it isn't
+BINARY_SAMPLE_SIZE = 8 * 1024
+BINARY_CONTROL_RATIO = 0.1
+#control characters that do occur in text files: backspace, tab, line breaks, form feed and the escape of ANSI colors
+_TEXT_CONTROL_BYTES = b"\b\t\n\r\f\x1b"
+_CONTROL_BYTES = bytes(byte for byte in range(32) if byte not in _TEXT_CONTROL_BYTES) + b"\x7f"
+
+#why a file was skipped
+SKIP_BINARY = "binary"
+SKIP_TOO_LARGE = "too_large"
+SKIP_REASONS = (SKIP_BINARY, SKIP_TOO_LARGE)
+
+def is_binary_sample(sample) -> bool:
+    """Return True if the bytes `sample` (the start of a file) contain a NUL byte or more than BINARY_CONTROL_RATIO control characters."""
+    if b"\x00" in sample:
+        return True
+    control_count = len(sample) - len(sample.translate(None, _CONTROL_BYTES))
+    return control_count > len(sample) * BINARY_CONTROL_RATIO
+
+def format_size(size) -> str:
+    for unit in ["bytes", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.1f}".rstrip("0").rstrip(".") + " " + unit
+
+class FileScreen:
+    """Decide from its size and first bytes whether a file is read as text at all, before it is read completely.
+
+    -A file larger than `max_file_size` bytes (None: no limit) is skipped as SKIP_TOO_LARGE.
+    -With `skip_binary` a file whose first BINARY_SAMPLE_SIZE bytes look binary (is_binary_sample()) is skipped as
+     SKIP_BINARY. "latin-1" accepts any byte, so otherwise a mislabeled archive or memory dump is decoded completely.
+    -Plain attributes only, so it can be passed to the worker processes.
+    """
+
+    def __init__(self, max_file_size=None, skip_binary=True):
+        if max_file_size is not None and max_file_size < 0:
+            raise ValueError(f"negative file size limit: {max_file_size}")
+        self.max_file_size = max_file_size
+        self.skip_binary = skip_binary
+
+    def check_size(self, size) -> str:
+        """Return SKIP_TOO_LARGE if `size` is above the limit, otherwise None."""
+        if self.max_file_size is not None and size > self.max_file_size:
+            return SKIP_TOO_LARGE
+        return None
+
+    def check(self, f, size) -> str:
+        """Return why the open binary file `f` of `size` bytes is skipped, None if it is read.
+
+        -The sample is read from the current position of `f` (e.g. behind the part an earlier run already read),
+         `f` is moved back there afterwards.
+        """
+        reason = self.check_size(size)
+        if reason is not None or not self.skip_binary:
+            return reason
+        position = f.tell()
+        sample = f.read(BINARY_SAMPLE_SIZE)
+        f.seek(position)
+        return SKIP_BINARY if is_binary_sample(sample) else None
+
+    def describe(self, reason) -> str:
+        if reason == SKIP_TOO_LARGE:
+            return f"larger than {format_size(self.max_file_size)}"
+        return reason
+
+    def describe_counts(self, skipped_files) -> str:
+        """Summarize the [(file, reason), ...] `skipped_files` like "3 files (2 binary, 1 larger than 100 MB)"."""
+        counts = {}
+        for _, reason in skipped_files:
+            counts[reason] = counts.get(reason, 0) + 1
+        details = ", ".join(f"{count} {self.describe(reason)}" for reason, count in counts.items())
+        return f"{len(skipped_files)} file{'' if len(skipped_files) == 1 else 's'} ({details})"
@@ -0,0 +1,93 @@
+import os, sys, select, struct, ctypes, ctypes.util
+
+#inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+def _load_inotify():
+    """Return libc if it provides inotify (Linux), otherwise None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class DirectoryWatcher:
+    """Wait for files in one directory to be written, created, moved or deleted.
+
+    -On Linux the directory is watched with inotify (through ctypes), the process sleeps in select() until the
+     kernel reports a change. Everywhere else, or if inotify isn't available, wait() just sleeps and asks the
+     caller to check every file (polling).
+    -wait() returns the set of names that changed, an empty set if nothing did, or None if every file has to be
+     checked (polling, or the kernel's event queue overflowed).
+    """
+
+    def __init__(self, directory, use_inotify=True):
+        self.directory = directory
+        self._fd = None
+        libc = _load_inotify() if use_inotify else None
+        if libc is None:
+            return
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(fd)
+            return
+        self._fd = fd
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def wait(self, timeout, cancel_event=None):
+        """Block for up to `timeout` seconds (less if `cancel_event` is set) and return what changed meanwhile."""
+        if self._fd is None:
+            if cancel_event is not None:
+                cancel_event.wait(timeout)
+            else:
+                select.select([], [], [], timeout)
+            return None
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                return None
+            if name:
+                changed.add(os.fsdecode(name))
+        return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,186 @@
+import os, sys, json, time, threading, contextlib, collections
+from .TextUtilities import UTF8_SAMPLE_SIZE, get_encodings_to_try
+
+#what RunStats can profile besides its stages
+PROFILE_CPROFILE = "cprofile"    #every call of the thread that created the RunStats (use one worker to include the reading)
+PROFILE_SAMPLING = "sampling"    #the stacks of all threads every SAMPLING_INTERVAL seconds, worker processes are not seen
+PROFILE_MODES = (PROFILE_CPROFILE, PROFILE_SAMPLING)
+
+SAMPLING_INTERVAL = 0.005
+SAMPLING_TOP_COUNT = 30
+
+_NO_STAGE = contextlib.nullcontext()
+_END = object()
+
+class _StageTimer:
+    __slots__ = ("stages", "name", "start")
+
+    def __init__(self, stages, name):
+        self.stages = stages
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stages[self.name] = self.stages.get(self.name, 0.0) + time.perf_counter() - self.start
+
+class RunStats:
+    """Stage timers and counters of one tool run, written as a JSON summary next to the result file.
+
+    -`with stats.stage("decode"):` adds the time spent inside to the stage, stats.count("bytes_read", n) adds to a counter.
+    -A disabled RunStats hands out one shared no-op context manager and ignores counts, so the instrumented code
+     paths cost next to nothing when the summary isn't wanted.
+    -Worker functions measure into their own RunStats and return as_dict(), merge() adds that to the run's stats.
+     Stages measured in parallel workers add up to more than the wall time of the run.
+    -`profile` (one of PROFILE_MODES) also profiles the run, write_summary() stops the profiler and writes its output.
+    """
+
+    def __init__(self, enabled=True, profile=None):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"unknown profile mode: {profile}")
+        self.enabled = enabled or profile is not None
+        self.stages = {}
+        self.counters = {}
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._profiler = None
+        if profile == PROFILE_CPROFILE:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif profile == PROFILE_SAMPLING:
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NO_STAGE
+        return _StageTimer(self.stages, name)
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_decoded_file(self, data, encoding):
+        """Count the bytes and the encoding of a decoded file, a fallback is any encoding but the first one tried."""
+        if not self.enabled:
+            return
+        self.count("bytes_read", len(data))
+        self.count(f"encoding.{encoding}")
+        if encoding != get_encodings_to_try(data[:UTF8_SAMPLE_SIZE])[0]:
+            self.count("encoding_fallbacks")
+
+    def timed_iter(self, name, iterable):
+        """Pass `iterable` through while adding the time spent producing its items (e.g. a lazy listing) to the stage."""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iter(iterable))
+
+    def _timed_iter(self, name, iterator):
+        while True:
+            with self.stage(name):
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def merge(self, data):
+        """Add the {"stages", "counters"} of as_dict() (e.g. returned by a worker), None is ignored."""
+        if not self.enabled or data is None:
+            return
+        for name, seconds in data["stages"].items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, value in data["counters"].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> dict:
+        return {"stages": self.stages, "counters": self.counters}
+
+    def stop_profiler(self, result_file_path=None) -> dict:
+        """Stop the profiler and return what the summary says about it, a cProfile run is saved as "<result>.prof"."""
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return None
+        if isinstance(profiler, SamplingProfiler):
+            profiler.stop()
+            return {"mode": PROFILE_SAMPLING, **profiler.top()}
+        profiler.disable()
+        if result_file_path is None:
+            return None
+        profile_path = os.path.splitext(result_file_path)[0] + ".prof"
+        profiler.dump_stats(profile_path)
+        return {"mode": PROFILE_CPROFILE, "path": profile_path}
+
+    def write_summary(self, result_file_path, **fields) -> str:
+        """Write "<result>.summary.json" next to the result file and return its path, None if disabled.
+
+        -`fields` (e.g. the tool and its options) come first, followed by the wall time, the stages and the counters.
+        """
+        profile = self.stop_profiler(result_file_path)
+        if not self.enabled:
+            return None
+        summary = dict(fields)
+        summary.update(
+            result_file=result_file_path,
+            started=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            wall_seconds=time.perf_counter() - self._start,
+            stages=self.stages,
+            counters=self.counters
+        )
+        if profile is not None:
+            summary["profile"] = profile
+        summary_path = os.path.splitext(result_file_path)[0] + ".summary.json"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary_path
+
+class SamplingProfiler:
+    """Sample the stacks of all threads of the process every SAMPLING_INTERVAL seconds on a daemon thread.
+
+    -top() counts how often a function was on top of a stack ("self") and anywhere in it ("total"),
+     so it shows where threads spend their time, including waiting, at a fixed small overhead.
+    """
+
+    def __init__(self, interval=SAMPLING_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.self_counts = collections.Counter()
+        self.total_counts = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.samples += 1
+                self.self_counts[_describe_frame(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    function = _describe_frame(frame)
+                    if function not in seen:
+                        seen.add(function)
+                        self.total_counts[function] += 1
+                    frame = frame.f_back
+
+    def top(self, count=SAMPLING_TOP_COUNT) -> dict:
+        return {
+            "samples": self.samples,
+            "interval": self.interval,
+            "self": self.self_counts.most_common(count),
+            "total": self.total_counts.most_common(count)
+        }
+
+def _describe_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
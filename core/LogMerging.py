@@ -0,0 +1,164 @@
+import re, heapq, datetime
+from .CompressedFiles import READ_ERRORS
+from .TextUtilities import iter_text_chunks
+
+#a line starting with a timestamp like "2024-01-31 12:00:00", "2024-01-31T12:00:00.123" or "2024-01-31 12:00:00,123"
+DEFAULT_TIMESTAMP_PATTERN = r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?"
+#all files are read at the same time, each gets this share of the budget (within the limits) as its read chunk
+MERGE_BUFFER_BUDGET = 16 * 1024 * 1024
+MIN_MERGE_CHUNK_SIZE = 4 * 1024
+MAX_MERGE_CHUNK_SIZE = 256 * 1024
+#merged lines are written in batches of this many records
+WRITE_BATCH_RECORDS = 4096
+#a record is passed on in pieces of about this many characters, e.g. all of a file whose lines have no timestamp
+MAX_RECORD_SIZE = 1024 * 1024
+
+class TimestampParser:
+    """Find the timestamp at the start of a line and turn it into a sort key.
+
+    -`pattern` is a regular expression matched at the start of every line (DEFAULT_TIMESTAMP_PATTERN if None), if it
+     has groups the first one is the timestamp.
+    -Without `time_format` the timestamp text is the key, which sorts correctly for fixed-width fields from the year
+     down (ISO 8601). With a strptime() `time_format` (e.g. "%d/%b/%Y:%H:%M:%S") it is parsed into a datetime.
+    -Raises ValueError for an invalid pattern.
+    """
+
+    def __init__(self, pattern=None, time_format=None):
+        try:
+            self._regex = re.compile(pattern or DEFAULT_TIMESTAMP_PATTERN)
+        except re.error as e:
+            raise ValueError(f"invalid timestamp pattern: {e}")
+        self._group = 1 if self._regex.groups else 0
+        self.time_format = time_format
+        #consecutive lines mostly share their timestamp, it is only parsed once
+        self._last_timestamp = None
+        self._last_key = None
+
+    def parse(self, line):
+        """Return the sort key of `line`, None if it doesn't start with a timestamp (e.g. a line of a stack trace)."""
+        match = self._regex.match(line)
+        if match is None:
+            return None
+        timestamp = match.group(self._group)
+        if self.time_format is None:
+            return timestamp
+        if timestamp != self._last_timestamp:
+            try:
+                self._last_key = datetime.datetime.strptime(timestamp, self.time_format)
+            except ValueError:
+                self._last_key = None
+            self._last_timestamp = timestamp
+        return self._last_key
+
+def get_merge_chunk_size(file_count) -> int:
+    return max(MIN_MERGE_CHUNK_SIZE, min(MAX_MERGE_CHUNK_SIZE, MERGE_BUFFER_BUDGET // max(file_count, 1)))
+
+def iter_records(chunks, parser):
+    """Yield (key, lines) for every record of a log arriving as text pieces: a line with a timestamp and the lines without one behind it.
+
+    -Lines in front of the first timestamp form a record with the key None.
+    -`lines` are without their line breaks, only the lines of one piece and of the current record are held in memory.
+    -A record is yielded in several pieces with the same key once it reaches MAX_RECORD_SIZE characters, so a
+     log without timestamps (or a pattern that doesn't find them) isn't held as a whole.
+    """
+    parse = parser.parse
+    key = None
+    record = []
+    record_size = 0
+    partial = []
+    for chunk in chunks:
+        lines = chunk.split("\n")
+        if len(lines) == 1:
+            partial.append(chunk)
+            continue
+        if partial:
+            partial.append(lines[0])
+            lines[0] = "".join(partial)
+        partial = [lines.pop()]
+        for line in lines:
+            line_key = parse(line)
+            if line_key is not None:
+                if record:
+                    yield key, record
+                key, record, record_size = line_key, [], 0
+            record.append(line)
+            record_size += len(line) + 1
+            if record_size >= MAX_RECORD_SIZE:
+                yield key, record
+                record, record_size = [], 0
+    line = "".join(partial)
+    if line:
+        line_key = parse(line)
+        if line_key is not None:
+            if record:
+                yield key, record
+            key, record = line_key, []
+        record.append(line)
+    if record:
+        yield key, record
+
+def iter_file_records(path, encoding, parser, chunk_size):
+    """iter_records() of the file `path`, read `chunk_size` bytes at a time (see TU.iter_text_chunks()).
+
+    -Bytes that aren't valid in `encoding` are replaced, a merged line can't be taken back once it is written.
+    """
+    return iter_records(iter_text_chunks(path, encoding, chunk_size, errors="replace"), parser)
+
+def merge_records(sources, write, cancel_event=None) -> dict:
+    """Merge the records of sorted logs by their keys and write their lines with write(text).
+
+    -`sources` are (records, tag) pairs, `records` yields (key, lines) like iter_records() and `tag` (None for none)
+     is put in front of every line of the source.
+    -A heap holds the next record of every source, so memory grows with the number of sources, not their length
+     (iter_records() splits long records). Records with the same key keep the order of `sources` (the pieces of a
+     split record stay together, each counts as a record), records without a key (before the first timestamp of
+     their source) come first. A source that isn't sorted is merged in its own order.
+    -A source that fails while it is read (one of READ_ERRORS) ends there.
+    -Stops once `cancel_event` is set. Returns the counts of "merged_records", "merged_lines" and "out_of_order_records".
+    """
+    counts = {"merged_records": 0, "merged_lines": 0, "out_of_order_records": 0}
+    #heap entries are ((has_key, key, source_number), lines, records, tag), the source number makes every sort key unique
+    heap = []
+    for number, (records, tag) in enumerate(sources):
+        try:
+            for key, lines in records:
+                heap.append(((key is not None, key, number), lines, records, tag))
+                break
+        except READ_ERRORS:
+            pass
+    heapq.heapify(heap)
+
+    batch = []
+    while heap:
+        sort_key, lines, records, tag = heap[0]
+        counts["merged_records"] += 1
+        counts["merged_lines"] += len(lines)
+        if tag is None:
+            batch.append("\n".join(lines))
+        else:
+            batch.append(tag + ("\n" + tag).join(lines))
+        if len(batch) >= WRITE_BATCH_RECORDS:
+            write("\n".join(batch) + "\n")
+            batch = []
+            if cancel_event is not None and cancel_event.is_set():
+                return counts
+
+        try:
+            next_record = next(records, None)
+        except READ_ERRORS:
+            next_record = None
+        if next_record is None:
+            heapq.heappop(heap)
+            continue
+        key, lines = next_record
+        if key is not None and sort_key[0] and key < sort_key[1]:
+            counts["out_of_order_records"] += 1
+        entry = ((key is not None, key, sort_key[2]), lines, records, tag)
+        #the source stays on top of the heap (without moving anything) while its next record comes before those of both children
+        if (len(heap) > 1 and heap[1][0] < entry[0]) or (len(heap) > 2 and heap[2][0] < entry[0]):
+            heapq.heapreplace(heap, entry)
+        else:
+            heap[0] = entry
+    if batch:
+        write("\n".join(batch) + "\n")
+    return counts
@@ -0,0 +1,117 @@
+import tempfile, itertools
+from array import array
+
+#buffered positions of all search terms together are written to the temporary file beyond this many values
+MAX_BUFFERED_VALUES = 4 * 1024 * 1024
+READ_BLOCK_VALUES = 256 * 1024
+
+class MatchStore:
+    """Positions of the matches per search term and file, packed as array("I") (line, column) pairs.
+
+    -In memory only the (file, match count) list of every search term and a bounded buffer of positions are kept,
+     the buffers are appended to one temporary file once they hold more than MAX_BUFFERED_VALUES values together.
+    -Positions come back in the order they were added, so a report can stream them term by term.
+    -Lines and columns must fit into an unsigned int (4 bytes on all common platforms).
+    -Context snippets of the matches can be stored along with the positions, they are spilled as UTF-8 behind
+     an array("I") of their lengths and count as a value per 4 bytes.
+    -Searches that only count matches store just the (file, match count) with add_count().
+    -With `with_distances` the positions are (line, column, distance) triples of a fuzzy search, packed the same way.
+    """
+
+    def __init__(self, with_distances=False):
+        self.with_distances = with_distances
+        self._position_size = 3 if with_distances else 2
+        self._files = {}
+        self._buffers = {}
+        self._spilled = {}
+        self._snippet_buffers = {}
+        self._spilled_snippets = {}
+        self._buffered_values = 0
+        self._spill_file = None
+        self.has_snippets = False
+
+    def add(self, search_term, file, positions, snippets=None):
+        """Append the [(line, column), ...] (or (line, column, distance)) `positions` of `search_term` in `file`, files without positions are skipped.
+
+        -`snippets` are the context snippets of the positions (one each), iter_snippets() returns them.
+        """
+        if not positions:
+            return
+        self._files.setdefault(search_term, []).append((file, len(positions)))
+        self._buffers.setdefault(search_term, array("I")).extend(itertools.chain.from_iterable(positions))
+        self._buffered_values += self._position_size * len(positions)
+        if snippets is not None:
+            self.has_snippets = True
+            self._snippet_buffers.setdefault(search_term, []).extend(snippets)
+            self._buffered_values += len(snippets) + sum(map(len, snippets)) // 4
+        if self._buffered_values > MAX_BUFFERED_VALUES:
+            self._spill()
+
+    def add_count(self, search_term, file, match_count):
+        """Record that `search_term` occurs `match_count` times in `file` without storing positions, a count of 0 is skipped."""
+        if match_count:
+            self._files.setdefault(search_term, []).append((file, match_count))
+
+    def files(self, search_term) -> list:
+        """Return [(file, match_count), ...] of `search_term` in the order the files were added."""
+        return self._files.get(search_term, [])
+
+    def match_count(self, search_term) -> int:
+        return sum(count for _, count in self.files(search_term))
+
+    def iter_positions(self, search_term):
+        """Yield the (line, column) (or (line, column, distance)) positions of `search_term` in the order they were added."""
+        size = self._position_size
+        for offset, value_count in self._spilled.get(search_term, []):
+            while value_count:
+                block = array("I")
+                self._spill_file.seek(offset)
+                block.fromfile(self._spill_file, min(value_count, READ_BLOCK_VALUES - READ_BLOCK_VALUES % size))
+                offset += len(block) * block.itemsize
+                value_count -= len(block)
+                yield from zip(*(block[value::size] for value in range(size)))
+        buffer = self._buffers.get(search_term)
+        if buffer:
+            yield from zip(*(buffer[value::size] for value in range(size)))
+
+    def iter_snippets(self, search_term):
+        """Yield the snippets of `search_term` in the order they were added, they line up with iter_positions()."""
+        for offset, count in self._spilled_snippets.get(search_term, []):
+            lengths = array("I")
+            self._spill_file.seek(offset)
+            lengths.fromfile(self._spill_file, count)
+            data = self._spill_file.read(sum(lengths))
+            start = 0
+            for length in lengths:
+                yield data[start:start + length].decode("utf-8", "surrogatepass")
+                start += length
+        yield from self._snippet_buffers.get(search_term, [])
+
+    def _spill(self):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile()
+        self._spill_file.seek(0, 2)
+        for search_term, buffer in self._buffers.items():
+            if buffer:
+                self._spilled.setdefault(search_term, []).append((self._spill_file.tell(), len(buffer)))
+                buffer.tofile(self._spill_file)
+        for search_term, snippets in self._snippet_buffers.items():
+            if snippets:
+                encoded = [snippet.encode("utf-8", "surrogatepass") for snippet in snippets]
+                self._spilled_snippets.setdefault(search_term, []).append((self._spill_file.tell(), len(encoded)))
+                array("I", map(len, encoded)).tofile(self._spill_file)
+                self._spill_file.write(b"".join(encoded))
+        self._buffers = {}
+        self._snippet_buffers = {}
+        self._buffered_values = 0
+
+    def close(self):
+        """Delete the temporary file, the stored positions are gone afterwards."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._files = {}
+        self._buffers = {}
+        self._spilled = {}
+        self._snippet_buffers = {}
+        self._spilled_snippets = {}
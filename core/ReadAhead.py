@@ -0,0 +1,216 @@
+import time, threading
+from collections import deque
+from .CompressedFiles import is_compressed, open_binary
+
+#every item counts with at least this many bytes against the budget, so empty or skipped files can't be read ahead without limit
+MIN_ITEM_COST = 4 * 1024
+DEFAULT_READ_AHEAD_THREADS = 1
+
+_NO_ITEM = object()
+
+def read_file_bytes(path, screen=None, max_size=None) -> tuple:
+    """Read the file `path` in one piece and return (data, skip_reason), for a consumer that doesn't open it again.
+
+    -Compressed files and zip members are decompressed while they are read (see open_binary()).
+    -`screen` (a FileScreen) checks the file before it is read, a skipped file returns (None, skip_reason).
+    -A file with more than `max_size` (decompressed) bytes or one that can't be read returns (None, None),
+     the consumer reads it itself (e.g. in chunks) and reports the error.
+    """
+    try:
+        f, size = open_binary(path)
+        with f:
+            skip_reason = None if screen is None else screen.check(f, size)
+            if skip_reason is not None:
+                return None, skip_reason
+            if max_size is not None and is_compressed(path):
+                #the decompressed size isn't known in advance
+                data = f.read(max_size + 1)
+                if len(data) > max_size:
+                    return None, None
+                return data, None
+            if max_size is not None and size > max_size:
+                return None, None
+            return f.read(), None
+    except Exception:
+        return None, None
+
+class ReadAhead:
+    """Read upcoming items on reader threads while the caller processes the earlier ones, within a memory budget.
+
+    -read(item) runs on one of `threads` reader threads and returns (result, size), `size` is the number of bytes
+     `result` holds (e.g. the bytes of a file). Iterating yields the results in the order of `items`.
+    -The readers stop reading ahead while the results waiting for the caller hold `budget` bytes (backpressure),
+     the budget is exceeded by at most one item per reader (an item larger than the budget still passes alone).
+     A result stops counting once it is handed out, the caller keeps it as long as it needs it. With `hold_results`
+     it counts until the caller calls release() for it instead, so results that are still being processed (e.g. by
+     the workers of map_in_order(), see its `read_ahead`) stay within the budget as well.
+    -`items` is consumed by the readers, one at a time, so it may be a lazy directory traversal. An exception of
+     `items` or read() is raised by the iteration at its place.
+    -Once `cancel_event` is set no more items are read, the iteration ends after the ones that were already read.
+    -ready() tells whether taking the next result would return at once, so a caller that holds results doesn't wait
+     for a reader that waits for the budget those results hold.
+    -summary() reports the queue depth (results waiting when the caller asks for the next one), how long the caller
+     waited for data (the reads are the bottleneck) and how long the readers waited for the budget (the caller is),
+     to tune the budget and the number of threads per kind of storage.
+    -The readers stop when the iteration ends or the iterator is closed, close() stops them without iterating.
+    """
+
+    def __init__(self, items, read, budget, threads=DEFAULT_READ_AHEAD_THREADS, cancel_event=None, hold_results=False):
+        if budget <= 0:
+            raise ValueError(f"the read-ahead budget must be larger than 0: {budget}")
+        if threads < 1:
+            raise ValueError(f"the read-ahead needs at least one thread: {threads}")
+        self.budget = budget
+        self.threads = threads
+        self._items = iter(items)
+        self._read = read
+        self._cancel_event = cancel_event
+        self.hold_results = hold_results
+        #the costs of the results handed out but not released yet, oldest first
+        self._held = deque()
+        self._condition = threading.Condition()
+        #{number: (result, cost, error)} of the items read but not handed out yet, the bytes they and the running reads hold
+        self._results = {}
+        self._buffered = 0
+        self._next_number = 0
+        self._taken_number = 0
+        self._exhausted = False
+        self._closed = False
+        self._item_count = 0
+        self._byte_count = 0
+        self._max_buffered = 0
+        self._depth_sum = 0
+        self._max_depth = 0
+        self._stall_count = 0
+        self._stall_seconds = 0.0
+        self._backpressure_seconds = 0.0
+        self._read_seconds = 0.0
+        self._readers = [threading.Thread(target=self._run, name=f"read-ahead-{number}", daemon=True) for number in range(threads)]
+        for reader in self._readers:
+            reader.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._buffered >= self.budget and not self._closed:
+                    wait_start = time.perf_counter()
+                    while self._buffered >= self.budget and not self._closed:
+                        self._condition.wait()
+                    self._backpressure_seconds += time.perf_counter() - wait_start
+                if self._closed or self._exhausted:
+                    return
+                if self._cancel_event is not None and self._cancel_event.is_set():
+                    self._finish()
+                    return
+                number = self._next_number
+                try:
+                    item = next(self._items, _NO_ITEM)
+                except Exception as e:
+                    self._results[number] = (None, 0, e)
+                    self._next_number += 1
+                    self._finish()
+                    return
+                if item is _NO_ITEM:
+                    self._finish()
+                    return
+                self._next_number += 1
+                #the item holds a share of the budget while it is read
+                self._buffered += MIN_ITEM_COST
+
+            read_start = time.perf_counter()
+            try:
+                result, size = self._read(item)
+                error = None
+            except Exception as e:
+                result, size, error = None, 0, e
+            read_seconds = time.perf_counter() - read_start
+
+            with self._condition:
+                cost = max(size, MIN_ITEM_COST)
+                self._results[number] = (result, cost, error)
+                self._buffered += cost - MIN_ITEM_COST
+                self._max_buffered = max(self._max_buffered, self._buffered)
+                self._item_count += 1
+                self._byte_count += size
+                self._read_seconds += read_seconds
+                self._condition.notify_all()
+
+    def _finish(self):
+        #called with the condition held: no more items are taken, the caller ends after the ones already taken
+        self._exhausted = True
+        self._condition.notify_all()
+
+    def __iter__(self):
+        try:
+            while True:
+                with self._condition:
+                    number = self._taken_number
+                    if number not in self._results and not (self._exhausted and number >= self._next_number):
+                        self._stall_count += 1
+                        wait_start = time.perf_counter()
+                        while number not in self._results and not (self._exhausted and number >= self._next_number):
+                            self._condition.wait()
+                        self._stall_seconds += time.perf_counter() - wait_start
+                    if number not in self._results:
+                        return
+                    depth = len(self._results)
+                    self._depth_sum += depth
+                    self._max_depth = max(self._max_depth, depth)
+                    result, cost, error = self._results.pop(number)
+                    self._taken_number += 1
+                    if self.hold_results and error is None:
+                        self._held.append(cost)
+                    else:
+                        self._buffered -= cost
+                        self._condition.notify_all()
+                if error is not None:
+                    raise error
+                yield result
+        finally:
+            #also when the caller stops early (e.g. cancelled) and drops the iterator
+            self.close()
+
+    def ready(self) -> bool:
+        """Return whether the next result is read already or the iteration is about to end."""
+        with self._condition:
+            number = self._taken_number
+            return number in self._results or (self._exhausted and number >= self._next_number)
+
+    def release(self):
+        """Stop counting the oldest result that was handed out but not released, with `hold_results`."""
+        with self._condition:
+            self._buffered -= self._held.popleft()
+            self._condition.notify_all()
+
+    def close(self):
+        """Stop the readers, a read that is running is finished first."""
+        with self._condition:
+            self._closed = True
+            self._finish()
+        for reader in self._readers:
+            if reader is not threading.current_thread():
+                reader.join()
+
+    def summary(self) -> dict:
+        """Return the settings and measurements of the read-ahead for the run summary."""
+        with self._condition:
+            taken = self._taken_number
+            return {
+                "budget": self.budget,
+                "threads": self.threads,
+                "items_read": self._item_count,
+                "bytes_read": self._byte_count,
+                "read_seconds": self._read_seconds,
+                "max_buffered_bytes": self._max_buffered,
+                "max_queue_depth": self._max_depth,
+                "mean_queue_depth": self._depth_sum / taken if taken else 0.0,
+                "consumer_stalls": self._stall_count,
+                "consumer_stall_seconds": self._stall_seconds,
+                "reader_backpressure_seconds": self._backpressure_seconds
+            }
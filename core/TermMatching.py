@@ -0,0 +1,863 @@
+import re, heapq, bisect, functools
+
+#trie key under which a node stores the search terms ending at it (term characters are never empty)
+_TERMS_KEY = ""
+
+#line boundaries recognized by str.splitlines()
+_LINE_BREAKS = re.compile(r"\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+_UNUSUAL_LINE_BREAK_CHARS = "\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+_UNUSUAL_LINE_BREAKS = re.compile(f"[{_UNUSUAL_LINE_BREAK_CHARS}]")
+
+#chunked searches carry an unfinished line over to the next chunk up to this length
+MAX_PENDING_LINE_LENGTH = 4 * 1024 * 1024
+
+#case-insensitive searches lowercase this many characters of complete lines at a time instead of a copy of the whole text
+FOLD_WINDOW_SIZE = 1024 * 1024
+
+#TermMatcher finds up to this many distinct terms with str.find() one after another, the combined regex only pays off above it
+#(for rare terms from about 8 to 16 terms, for frequent ones much later, see benchmarks/bench_term_matcher.py)
+FIND_TERM_LIMIT = 16
+
+class LineTracker:
+    """Translate ascending indexes of `text` into 1-based (line, column) positions.
+
+    -Lines are numbered the way `text.splitlines()` splits them.
+    -Indexes must be passed in ascending order and must not point into a line break.
+    -Texts that only contain "\\n" (and "\\r\\n") line breaks are counted with str.count().
+    """
+
+    def __init__(self, text):
+        self.text = text
+        #substring tests are several times faster than searching the character class or counting
+        self.simple = not any(char in text for char in _UNUSUAL_LINE_BREAK_CHARS) and ("\r" not in text or text.count("\r") == text.count("\r\n"))
+        self.line = 1
+        self.line_start = 0
+        self.index = 0
+
+    def position(self, index) -> tuple:
+        if self.simple:
+            breaks = self.text.count("\n", self.index, index)
+            if breaks:
+                self.line += breaks
+                self.line_start = self.text.rfind("\n", self.index, index) + 1
+        else:
+            for line_break in _LINE_BREAKS.finditer(self.text, self.index, index):
+                self.line += 1
+                self.line_start = line_break.end()
+        self.index = index
+        return self.line, index - self.line_start + 1
+
+    def positions(self, indexes, line_offset=0, column_offset=0) -> list:
+        """Return the positions of ascending `indexes` from the start of the text at once, like the collectors shift them.
+
+        -The lines are counted from `line_offset`, the columns of the first line from `column_offset`.
+        -Doesn't use or change the state of position(), it saves a method call per index.
+        """
+        text = self.text
+        count, rfind = text.count, text.rfind
+        line = 1 + line_offset
+        #the index before the start of the current line, the first line continues one of `column_offset` characters
+        before = -1 - column_offset
+        previous = 0
+        positions = []
+        append = positions.append
+        if self.simple:
+            for index in indexes:
+                breaks = count("\n", previous, index)
+                if breaks:
+                    line += breaks
+                    before = rfind("\n", previous, index)
+                previous = index
+                append((line, index - before))
+        else:
+            for index in indexes:
+                for line_break in _LINE_BREAKS.finditer(text, previous, index):
+                    line += 1
+                    before = line_break.end() - 1
+                previous = index
+                append((line, index - before))
+        return positions
+
+class Matcher:
+    """Base class of the matchers, subclasses provide prepare_text(), iter_matches() and max_term_length.
+
+    -prepare_text() turns the original text into the text that iter_matches() searches (e.g. lowercased),
+     `folds_case` tells that it makes a copy, the text is then prepared in windows of FOLD_WINDOW_SIZE characters.
+    -iter_matches() yields (index, search_terms, distance, end) in ascending order of the index, `end` is the index
+     behind the match and `distance` is None for exact matches. A matcher with `reports_distances` (FuzzyMatcher)
+     reports (line, column, distance) positions.
+    -The position finders optionally fill `lengths` ({search_term: [length, ...]} alongside the positions) with the
+     number of characters of every match, for the context snippets (see extract_snippets()).
+    -Positions always refer to the original text, even where preparing it changed its length (see IndexTranslator).
+    """
+
+    max_term_length = 0
+    folds_case = False
+    reports_distances = False
+
+    def find_positions(self, text, max_matches=None, lengths=None) -> dict:
+        """Return {search_term: [(line, column), ...]} for every search term that occurs in `text`.
+
+        -With `max_matches` only the first `max_matches` positions of every search term are returned,
+         the search stops as soon as every search term has them.
+        -If `lengths` is a dict the length of every match is added to it, in the order of the positions.
+        """
+        positions = {}
+        self._scan(text, self._get_position_collector(positions, max_matches, lengths))
+        return positions
+
+    def add_positions(self, text, positions, line_offset=0) -> int:
+        """Add the positions in `text` to `positions` and return the line offset after it.
+
+        -`text` starts a new line after `line_offset` lines (e.g. the lines appended to a log file since the last read),
+         the positions are counted from the start of the whole file.
+        """
+        return self._scan(text, self._get_position_collector(positions), line_offset)
+
+    def count_matches(self, text, files_only=False) -> dict:
+        """Return {search_term: match_count} for every search term that occurs in `text`, without working out positions.
+
+        -With `files_only` every count is 1, the search stops as soon as every search term occurred.
+        """
+        counts = {}
+        self._scan(text, functools.partial(self._collect_counts, counts, files_only))
+        return counts
+
+    def find_positions_in_chunks(self, chunks, max_matches=None, lengths=None) -> dict:
+        """Like find_positions(), for a text that arrives in pieces (e.g. decoded from a memory-mapped file).
+
+        -Only complete lines are searched, the unfinished last line of a piece is carried over to the next one,
+         so only the current piece has to be held in memory and lines are lowercased as a whole.
+        -A line longer than MAX_PENDING_LINE_LENGTH is searched in parts overlapping by the longest term.
+        -The pieces must have their "\r\n" line breaks translated already (like text mode reading does).
+        -Once the search is complete (see `max_matches`) no further pieces are taken from `chunks`.
+        """
+        positions = {}
+        self._scan_chunks(chunks, self._get_position_collector(positions, max_matches, lengths))
+        return positions
+
+    def count_matches_in_chunks(self, chunks, files_only=False) -> dict:
+        """Like count_matches(), for a text that arrives in pieces, see find_positions_in_chunks()."""
+        counts = {}
+        self._scan_chunks(chunks, functools.partial(self._collect_counts, counts, files_only))
+        return counts
+
+    def _get_term_count(self) -> int:
+        return len(set(filter(None, self.search_terms)))
+
+    def _get_position_collector(self, positions, max_matches=None, lengths=None):
+        if max_matches is None:
+            return functools.partial(self._collect_positions, positions, lengths=lengths)
+        return functools.partial(self._collect_limited_positions, positions, max_matches, lengths=lengths)
+
+    def _scan(self, text, collect, line_offset=0) -> int:
+        """Pass `text` to collect(text, line_offset) or, if it is lowercased, in windows to _scan_chunks()."""
+        #the windows end behind complete lines, which needs translated line breaks like the chunked search
+        if self.folds_case and len(text) > FOLD_WINDOW_SIZE and "\r" not in text:
+            windows = (text[start:start + FOLD_WINDOW_SIZE] for start in range(0, len(text), FOLD_WINDOW_SIZE))
+            return self._scan_chunks(windows, collect, line_offset)
+        return collect(text, line_offset)
+
+    def _scan_chunks(self, chunks, collect, line_offset=0) -> int:
+        """Pass the complete lines of `chunks` to collect(text, line_offset, column_offset, match_end) and return the line offset after them.
+
+        -collect() returns the line offset after the text, or None once it doesn't need any more text, the scan then
+         stops and returns None.
+        """
+        column_offset = 0
+        pending = ""
+
+        for chunk in chunks:
+            text = pending + chunk
+            end = _complete_lines_end(text)
+            if end:
+                line_offset = collect(text[:end], line_offset, column_offset)
+                column_offset = 0
+                pending = text[end:]
+            elif len(text) > MAX_PENDING_LINE_LENGTH and len(text) >= self.max_term_length:
+                #matches have to start in the head, the tail lets them run past it and is searched again next time
+                split = len(text) - max(self.max_term_length - 1, 0)
+                if collect(text, line_offset, column_offset, split) is None:
+                    return None
+                column_offset += split
+                pending = text[split:]
+            else:
+                pending = text
+            if line_offset is None:
+                return None
+
+        if pending:
+            line_offset = collect(pending, line_offset, column_offset)
+        return line_offset
+
+    def _iter_original_matches(self, text):
+        """Yield (index, search_terms, distance, end) of the matches in the original `text`, translated from the prepared text if needed."""
+        prepared_text = self.prepare_text(text)
+        if len(prepared_text) == len(text):
+            return self.iter_matches(prepared_text)
+        translator = IndexTranslator(text, prepared_text)
+        return (
+            (translator.original_index(index), search_terms, distance, translator.original_end(end))
+            for index, search_terms, distance, end in self.iter_matches(prepared_text)
+        )
+
+    def _collect_positions(self, positions, text, line_offset=0, column_offset=0, match_end=None, lengths=None) -> int:
+        """Add the positions found in the original `text` to `positions` and return the line offset after `text`.
+
+        -`line_offset` lines precede `text`, its first line already had `column_offset` characters before it.
+        -Matches starting at or after `match_end` (an index of `text`) are ignored.
+        -The match lengths are added to `lengths` unless it is None.
+        """
+        line_tracker = LineTracker(text)
+        for index, search_terms, distance, end in self._iter_original_matches(text):
+            if match_end is not None and index >= match_end:
+                break
+            line, column = line_tracker.position(index)
+            position = (line + line_offset, column + column_offset if line == 1 else column)
+            if distance is not None:
+                position += (distance,)
+            for search_term in search_terms:
+                if search_term in positions:
+                    positions[search_term].append(position)
+                else:
+                    positions[search_term] = [position]
+                if lengths is not None:
+                    lengths.setdefault(search_term, []).append(end - index)
+        line, _ = line_tracker.position(len(text))
+        return line_offset + line - 1
+
+    def _collect_limited_positions(self, positions, max_matches, text, line_offset=0, column_offset=0, match_end=None, lengths=None) -> int:
+        """_collect_positions() that keeps up to `max_matches` positions per search term and returns None once all terms have them."""
+        term_count = self._get_term_count()
+        full_count = sum(1 for term_positions in positions.values() if len(term_positions) >= max_matches)
+        if full_count == term_count:
+            return None
+        line_tracker = LineTracker(text)
+        for index, search_terms, distance, end in self._iter_original_matches(text):
+            if match_end is not None and index >= match_end:
+                break
+            position = None
+            for search_term in search_terms:
+                term_positions = positions.setdefault(search_term, [])
+                if len(term_positions) >= max_matches:
+                    continue
+                if position is None:
+                    line, column = line_tracker.position(index)
+                    position = (line + line_offset, column + column_offset if line == 1 else column)
+                    if distance is not None:
+                        position += (distance,)
+                term_positions.append(position)
+                if lengths is not None:
+                    lengths.setdefault(search_term, []).append(end - index)
+                if len(term_positions) == max_matches:
+                    full_count += 1
+            if full_count == term_count:
+                return None
+        line, _ = line_tracker.position(len(text))
+        return line_offset + line - 1
+
+    def _collect_counts(self, counts, files_only, text, line_offset=0, column_offset=0, match_end=None) -> int:
+        """Add the number of matches in `text` to `counts`, with `files_only` only count the first and return None once every term occurred."""
+        term_count = self._get_term_count()
+        if files_only and len(counts) == term_count:
+            return None
+        for index, search_terms, _, _ in self._iter_original_matches(text):
+            if match_end is not None and index >= match_end:
+                break
+            for search_term in search_terms:
+                counts[search_term] = 1 if files_only else counts.get(search_term, 0) + 1
+            if files_only and len(counts) == term_count:
+                return None
+        return line_offset
+
+class TermMatcher(Matcher):
+    """Find every occurrence of many search terms in a single pass over a text.
+
+    -The terms are compiled once into a trie and into one regex that has the same shape as the trie.
+    -The regex jumps to the next index at which any term starts, the trie then lists all terms starting there,
+     grouped by their length (a term can be a prefix of another one).
+    -Up to FIND_TERM_LIMIT distinct terms are found with str.find() (and counted with str.count()) one term at a
+     time instead, a few scans at C speed beat the regex and its per-match overhead.
+    -Overlapping occurrences are reported, just like repeated str.find() calls starting one character later.
+    -Without `case_sensitive` the terms are lowercased once and the text a window at a time, the positions still
+     refer to the original text (a lowercase "i̇" found in "İ" is reported at the column of the "İ").
+    """
+
+    def __init__(self, search_terms, case_sensitive):
+        self.search_terms = list(search_terms)
+        self.case_sensitive = case_sensitive
+        self.folds_case = not case_sensitive
+        self.max_term_length = 0
+        self._trie = {}
+        #{term_to_find: search_terms}, the search terms share the list with their trie node
+        terms_to_find = {}
+
+        for search_term in self.search_terms:
+            if not search_term:
+                continue
+            term_to_find = search_term if case_sensitive else search_term.lower()
+            node = self._trie
+            for char in term_to_find:
+                node = node.setdefault(char, {})
+            terms_to_find[term_to_find] = node.setdefault(_TERMS_KEY, [])
+            terms_to_find[term_to_find].append(search_term)
+            self.max_term_length = max(self.max_term_length, len(term_to_find))
+
+        self._regex = None
+        self._terms_by_match = {}
+        #[(term_to_find, search_terms, overlaps_itself)] while the terms are few enough to be found one at a time
+        self._terms_to_find = None
+        if len(terms_to_find) <= FIND_TERM_LIMIT:
+            self._terms_to_find = [(term, terms, _overlaps_itself(term)) for term, terms in terms_to_find.items()]
+        else:
+            #the regex is greedy, so it always matches the longest term starting at an index,
+            #all other terms starting there are prefixes of it and are looked up instead of walking the trie
+            self._regex = re.compile(_trie_to_pattern(self._trie))
+            _collect_terms_by_match(self._trie, "", [], self._terms_by_match)
+
+    def prepare_text(self, text) -> str:
+        return text if self.case_sensitive else text.lower()
+
+    def iter_matches(self, text, start=0, end=None):
+        """Yield (index, search_terms, None, end) for every index of the (prepared) `text` at which search terms of one length start."""
+        if end is None:
+            end = len(text)
+        if self._terms_to_find is not None:
+            #the matches of every term in turn, merged by their index and then their length like the trie orders them
+            matches = heapq.merge(*(
+                _iter_found_matches(text, term, search_terms, start, end) for term, search_terms, _ in self._terms_to_find
+            ))
+            for index, length, search_terms in matches:
+                yield index, search_terms, None, index + length
+            return
+        search = self._regex.search
+        terms_by_match = self._terms_by_match
+        match = search(text, start, end)
+        while match is not None:
+            index = match.start()
+            for length, search_terms in terms_by_match[match.group()]:
+                yield index, search_terms, None, index + length
+            match = search(text, index + 1, end)
+
+    def _get_position_collector(self, positions, max_matches=None, lengths=None):
+        if self._terms_to_find is None:
+            return super()._get_position_collector(positions, max_matches, lengths)
+        return functools.partial(self._collect_found_positions, positions, max_matches, lengths=lengths)
+
+    def _collect_found_positions(self, positions, max_matches, text, line_offset=0, column_offset=0, match_end=None, lengths=None) -> int:
+        """The position collector for few search terms, it finds one term after the other and converts its indexes at once.
+
+        -Takes the arguments of _collect_positions(), `max_matches` limits the positions like _collect_limited_positions().
+        """
+        term_count = self._get_term_count()
+        if max_matches is not None and sum(1 for term_positions in positions.values() if len(term_positions) >= max_matches) == term_count:
+            return None
+        prepared_text = self.prepare_text(text)
+        translates = len(prepared_text) != len(text)
+        line_tracker = LineTracker(text)
+        full_count = 0
+
+        for term, search_terms, _ in self._terms_to_find:
+            limit = None if max_matches is None else max(max_matches - len(positions.get(search_terms[0], ())), 0)
+            indexes = _find_indexes(prepared_text, term, limit)
+            ends = [index + len(term) for index in indexes] if lengths is not None else None
+            if translates:
+                #the indexes of every term are ascending on their own, so every term needs its own translator
+                translator = IndexTranslator(text, prepared_text)
+                indexes = [translator.original_index(index) for index in indexes]
+                ends = [translator.original_end(end) for end in ends] if lengths is not None else None
+            if match_end is not None:
+                del indexes[bisect.bisect_left(indexes, match_end):]
+            if indexes:
+                term_positions = line_tracker.positions(indexes, line_offset, column_offset)
+                for search_term in search_terms:
+                    positions.setdefault(search_term, []).extend(term_positions)
+                    if lengths is not None:
+                        lengths.setdefault(search_term, []).extend(end - index for index, end in zip(indexes, ends))
+            if max_matches is not None and len(positions.get(search_terms[0], ())) >= max_matches:
+                full_count += len(set(search_terms))
+
+        if max_matches is not None and full_count == term_count:
+            return None
+        line, _ = line_tracker.position(len(text))
+        return line_offset + line - 1
+
+    def _collect_counts(self, counts, files_only, text, line_offset=0, column_offset=0, match_end=None) -> int:
+        """_collect_counts() that counts few search terms with str.count(), or str.find() where occurrences can overlap."""
+        if self._terms_to_find is None or match_end is not None:
+            return super()._collect_counts(counts, files_only, text, line_offset, column_offset, match_end)
+        term_count = self._get_term_count()
+        if files_only and len(counts) == term_count:
+            return None
+        #the number of matches doesn't depend on where they are, so the prepared text is counted as it is
+        prepared_text = self.prepare_text(text)
+        for term, search_terms, overlaps_itself in self._terms_to_find:
+            if files_only:
+                count = int(term in prepared_text)
+            elif overlaps_itself:
+                #str.count() skips the overlapping occurrences
+                count = len(_find_indexes(prepared_text, term))
+            else:
+                count = prepared_text.count(term)
+            if count:
+                for search_term in search_terms:
+                    counts[search_term] = 1 if files_only else counts.get(search_term, 0) + count
+        if files_only and len(counts) == term_count:
+            return None
+        return line_offset
+
+class RegexMatcher(Matcher):
+    """Find the matches of many regular expressions in a single pass over a text.
+
+    -All patterns are combined into one alternation with a named group per pattern and run with finditer(),
+     the name of the matched group attributes each match back to its pattern.
+    -Like finditer() the matches don't overlap, where several patterns match at the same index the first one wins.
+    -Patterns with groups of their own (e.g. for a numbered backreference or a named group) run as separate regexes
+     next to the combined one, taking turns like the alternatives of one regex would.
+    -Matches may span lines, except in chunked searches where a chunk always ends behind a line break.
+    -Empty matches are ignored. Without `case_sensitive` the patterns are compiled with re.IGNORECASE.
+    -Raises re.error if a pattern is invalid.
+    """
+
+    #chunked searches overlap the parts of overlong lines by this many characters
+    max_term_length = 4096
+
+    def __init__(self, search_terms, case_sensitive):
+        self.search_terms = list(search_terms)
+        self.case_sensitive = case_sensitive
+        self._regex, self._terms_by_group, self._separate = compile_combined_pattern(tuple(self.search_terms), case_sensitive)
+
+    def prepare_text(self, text) -> str:
+        return text
+
+    def iter_matches(self, text, start=0, end=None):
+        """Yield (index, [pattern], None, end) for every non-empty match in `text`."""
+        if end is None:
+            end = len(text)
+        if self._separate:
+            yield from self._iter_separate_matches(text, start, end)
+            return
+        if self._regex is None:
+            return
+        terms_by_group = self._terms_by_group
+        for match in self._regex.finditer(text, start, end):
+            if match.end() > match.start():
+                _, search_terms = terms_by_group[match.lastgroup]
+                yield match.start(), search_terms, None, match.end()
+
+    def _iter_separate_matches(self, text, start, end):
+        """iter_matches() with separate regexes: the leftmost match wins, at the same index the one of the earlier pattern."""
+        regexes = [regex for _, regex, _ in self._separate]
+        if self._regex is not None:
+            regexes.append(self._regex)
+        #the next match of every regex as (index, pattern number, end, search_terms), None once it has no more
+        upcoming = [(-1,)] * len(regexes)
+        position = start
+        while True:
+            for number, regex in enumerate(regexes):
+                if upcoming[number] is not None and upcoming[number][0] < position:
+                    upcoming[number] = self._search_separate(number, regex, text, position, end)
+            found = [match for match in upcoming if match is not None]
+            if not found:
+                return
+            #the pattern numbers are unique, so the search terms are never compared
+            index, _, match_end, search_terms = min(found)
+            yield index, search_terms, None, match_end
+            position = match_end
+
+    def _search_separate(self, number, regex, text, position, end):
+        match = regex.search(text, position, end)
+        while match is not None and match.end() == match.start():
+            #empty matches are ignored, like in iter_matches()
+            match = regex.search(text, match.start() + 1, end) if match.start() < end else None
+        if match is None:
+            return None
+        if number < len(self._separate):
+            pattern_number, _, search_terms = self._separate[number]
+        else:
+            pattern_number, search_terms = self._terms_by_group[match.lastgroup]
+        return match.start(), pattern_number, match.end(), search_terms
+
+class FuzzyMatcher(Matcher):
+    """Find the approximate occurrences of many search terms, with up to `max_distance` edits each.
+
+    -An edit inserts, deletes or replaces one character (Levenshtein distance). Positions are (line, column, distance).
+    -A term split into `max_distance` + 1 pieces keeps at least one of them unchanged in every match (pigeonhole
+     principle). The pieces of all terms are found in one pass like TermMatcher does, only the part of the line
+     around a piece is then checked with Myers' bit-parallel algorithm, which computes a whole column of the edit
+     distance matrix with a few integer operations per character.
+    -Every run of match ends within `max_distance` is reported once, at the start of the substring closest to the
+     term, an overlapping match only replaces it if it is closer. Matches don't span "\\n" line breaks.
+    -Terms not longer than `max_distance` would match everywhere, they raise ValueError. Without `case_sensitive`
+     the terms and the text are lowercased like in TermMatcher.
+    """
+
+    reports_distances = True
+
+    def __init__(self, search_terms, case_sensitive, max_distance):
+        if max_distance < 1:
+            raise ValueError(f"the distance of a fuzzy search must be at least 1: {max_distance}")
+        self.search_terms = list(search_terms)
+        self.case_sensitive = case_sensitive
+        self.folds_case = not case_sensitive
+        self.max_distance = max_distance
+        #every distinct term to find with the search terms it stands for, its bit masks per character and those of
+        #the reversed term (for the start of a match)
+        self._terms = []
+        self._search_terms = []
+        self._masks = []
+        self._reversed_masks = []
+        pieces = {}
+        for search_term in self.search_terms:
+            if not search_term:
+                continue
+            term_to_find = search_term if case_sensitive else search_term.lower()
+            if len(term_to_find) <= max_distance:
+                raise ValueError(f"\"{search_term}\" has to be longer than the distance of {max_distance}")
+            if term_to_find in self._terms:
+                self._search_terms[self._terms.index(term_to_find)].append(search_term)
+                continue
+            number = len(self._terms)
+            self._terms.append(term_to_find)
+            self._search_terms.append([search_term])
+            self._masks.append(_get_character_masks(term_to_find))
+            self._reversed_masks.append(_get_character_masks(term_to_find[::-1]))
+            bounds = [len(term_to_find) * piece // (max_distance + 1) for piece in range(max_distance + 2)]
+            for piece_start, piece_end in zip(bounds, bounds[1:]):
+                pieces.setdefault(term_to_find[piece_start:piece_end], []).append((number, piece_start))
+        self.max_term_length = max(map(len, self._terms), default=0) + max_distance
+        #the pieces are already prepared, so they are matched case-sensitively
+        self._piece_matcher = TermMatcher(pieces, True)
+        self._pieces = pieces
+
+    def prepare_text(self, text) -> str:
+        return text if self.case_sensitive else text.lower()
+
+    def iter_matches(self, text, start=0, end=None):
+        """Yield (index, search_terms, distance, end) for every approximate occurrence in the (prepared) `text`."""
+        if end is None:
+            end = len(text)
+        max_distance = self.max_distance
+        term_lengths = [len(term) for term in self._terms]
+        #per term the part of the current line that is still to be checked: [start, end, line_end]
+        spans = {}
+        #found matches wait in a heap until no later piece can lead to a match before them
+        found = []
+        line_start = line_end = start
+        for index, pieces, _, _ in self._piece_matcher.iter_matches(text, start, end):
+            if index >= line_end:
+                line_start = max(text.rfind("\n", start, index) + 1, start)
+                line_end = text.find("\n", index, end)
+                if line_end < 0:
+                    line_end = end
+            for piece in pieces:
+                for number, offset in self._pieces[piece]:
+                    term_start = index - offset
+                    window_start = term_start - max_distance
+                    if window_start < line_start:
+                        window_start = line_start
+                    window_end = term_start + term_lengths[number] + max_distance
+                    if window_end > line_end:
+                        window_end = line_end
+                    span = spans.get(number)
+                    #a window further away than the term length can't overlap a window of a later piece
+                    if span is not None and (span[2] != line_end or window_start > span[1] + term_lengths[number]):
+                        self._check_span(text, number, span[0], span[1], found)
+                        span = None
+                    if span is None:
+                        spans[number] = [window_start, window_end, line_end]
+                    else:
+                        if window_start < span[0]:
+                            span[0] = window_start
+                        if window_end > span[1]:
+                            span[1] = window_end
+            #checked spans of a term lie before the windows of later pieces, which start at most this far back
+            safe_index = index - self.max_term_length
+            for span in spans.values():
+                if span[0] < safe_index:
+                    safe_index = span[0]
+            while found and found[0][0] < safe_index:
+                match_start, number, distance, match_end = heapq.heappop(found)
+                yield match_start, self._search_terms[number], distance, match_end
+        for number, (span_start, span_end, _) in spans.items():
+            self._check_span(text, number, span_start, span_end, found)
+        while found:
+            match_start, number, distance, match_end = heapq.heappop(found)
+            yield match_start, self._search_terms[number], distance, match_end
+
+    def _check_span(self, text, number, start, end, found):
+        """Push (match_start, number, distance, match_end) of every match of term `number` in text[start:end] onto the heap `found`.
+
+        -Myers' algorithm keeps the vertical differences of the current column of the edit distance matrix as two
+         bit masks (+1 and -1), `score` is the bottom cell, the distance of the best match ending at the character.
+         The top row stays 0, so a match can start anywhere.
+        """
+        term = self._terms[number]
+        length = len(term)
+        max_distance = self.max_distance
+        #in the part around a single piece the exact term leaves too little room for another match beside it
+        if end - start <= length + 2 * max_distance and length > 3 * max_distance:
+            match_start = text.find(term, start, end)
+            if match_start >= 0:
+                heapq.heappush(found, (match_start, number, 0, match_start + length))
+                return
+        masks = self._masks[number]
+        all_bits = (1 << length) - 1
+        last_bit = 1 << (length - 1)
+        positive = all_bits
+        negative = 0
+        score = length
+        previous_score = score
+        #the end of the lowest score in the current valley of scores within max_distance, and that score
+        best_end = -1
+        best_score = 0
+        last_match = None
+        for index in range(start, end):
+            equal = masks.get(text[index], 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            horizontal_positive = negative | (~(horizontal | positive) & all_bits)
+            horizontal_negative = positive & horizontal
+            if horizontal_positive & last_bit:
+                score += 1
+            elif horizontal_negative & last_bit:
+                score -= 1
+            horizontal_positive = (horizontal_positive << 1) & all_bits
+            horizontal_negative = (horizontal_negative << 1) & all_bits
+            positive = horizontal_negative | (~(vertical | horizontal_positive) & all_bits)
+            negative = horizontal_positive & vertical
+            if score < previous_score:
+                if score <= max_distance:
+                    best_end, best_score = index, score
+            elif score > previous_score and best_end >= 0:
+                last_match = self._add_match(text, number, start, best_end, best_score, last_match, found)
+                best_end = -1
+            previous_score = score
+        if best_end >= 0:
+            last_match = self._add_match(text, number, start, best_end, best_score, last_match, found)
+        if last_match is not None:
+            heapq.heappush(found, last_match)
+
+    def _add_match(self, text, number, start, match_end, distance, last_match, found) -> tuple:
+        """Find where the match ending at `match_end` (its last character) starts and return it as (match_start, number, distance, end).
+
+        -`end` is the index behind the match, `last_match` (the previous match of the span, still held back) is pushed onto `found` unless the new match
+         overlaps it, then the closer one of both is kept.
+        """
+        match_start = self._find_match_start(text, number, start, match_end)
+        match = (match_start, number, distance, match_end + 1)
+        if last_match is None:
+            return match
+        if match_start >= last_match[3]:
+            heapq.heappush(found, last_match)
+            return match
+        return match if distance < last_match[2] else last_match
+
+    def _find_match_start(self, text, number, start, match_end) -> int:
+        """Return the start of the substring ending at `match_end` (not before `start`) closest to term `number`.
+
+        -The reversed term is matched backwards from `match_end` with the text side anchored there (every character
+         further back costs one more edit in the top row), the closest and then longest substring wins.
+        """
+        masks = self._reversed_masks[number]
+        length = len(self._terms[number])
+        all_bits = (1 << length) - 1
+        last_bit = 1 << (length - 1)
+        positive = all_bits
+        negative = 0
+        score = length
+        best_score = score
+        match_start = match_end
+        for index in range(match_end, max(match_end - length - self.max_distance, start - 1), -1):
+            equal = masks.get(text[index], 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            horizontal_positive = negative | (~(horizontal | positive) & all_bits)
+            horizontal_negative = positive & horizontal
+            if horizontal_positive & last_bit:
+                score += 1
+            elif horizontal_negative & last_bit:
+                score -= 1
+            horizontal_positive = ((horizontal_positive << 1) | 1) & all_bits
+            horizontal_negative = (horizontal_negative << 1) & all_bits
+            positive = horizontal_negative | (~(vertical | horizontal_positive) & all_bits)
+            negative = horizontal_positive & vertical
+            if score <= best_score:
+                best_score, match_start = score, index
+        return match_start
+
+def _get_character_masks(term) -> dict:
+    """Return {character: bit mask of the indexes at which it occurs in `term`}."""
+    masks = {}
+    for index, char in enumerate(term):
+        masks[char] = masks.get(char, 0) | 1 << index
+    return masks
+
+@functools.lru_cache(maxsize=32)
+def compile_combined_pattern(patterns, case_sensitive) -> tuple:
+    """Compile `patterns` into one regex and return (regex, {group_name: (number, [pattern])}, separate).
+
+    -Every pattern is compiled on its own first, so re.error names the pattern that is invalid.
+    -A pattern with groups can't join the combined regex: it would shift the numbers of the groups behind it (a
+     numbered backreference would point at another group) and two patterns can't use the same group name. These
+     are compiled on their own and returned as `separate`, [(number, regex, [pattern])].
+    -`number` is the position of a pattern among the non-empty ones, `regex` is None if all patterns are separate.
+    -The compiled patterns are cached, so repeated searches with the same patterns don't compile them again.
+    """
+    patterns = [pattern for pattern in patterns if pattern]
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    terms_by_group = {}
+    separate = []
+    alternatives = []
+    for number, pattern in enumerate(patterns):
+        regex = re.compile(pattern, flags)
+        if regex.groups:
+            separate.append((number, regex, [pattern]))
+            continue
+        #an empty group behind the pattern marks the alternative, a group around it would defeat the
+        #regex engine's quick check of the characters an alternative can start with
+        group_name = f"_search_term_{number}"
+        terms_by_group[group_name] = (number, [pattern])
+        alternatives.append(f"(?:{pattern})(?P<{group_name}>)")
+    if not alternatives:
+        return None, {}, separate
+    return re.compile("|".join(alternatives), flags), terms_by_group, separate
+
+class IndexTranslator:
+    """Translate indexes of the lowercased `prepared_text` back into indexes of the original `text`.
+
+    -Only needed if lowercasing changed the length, some characters lowercase to more than one ("İ" to "i̇").
+    -An index inside the lowercase form of such a character translates to the index of the character.
+    -Indexes must be passed in ascending order.
+    """
+
+    def __init__(self, text, prepared_text):
+        #for every expanding character: where its lowercase form starts and ends in `prepared_text`, and its index
+        self._starts = []
+        self._ends = []
+        self._indexes = []
+        shift = 0
+        expanding_chars = [char for char in set(text) if len(char.lower()) > 1]
+        for match in re.finditer("[" + re.escape("".join(expanding_chars)) + "]", text):
+            start = match.start() + shift
+            shift += len(match.group().lower()) - 1
+            self._starts.append(start)
+            self._ends.append(match.start() + shift + 1)
+            self._indexes.append(match.start())
+        #the number of expanding characters starting at or before the last index
+        self._passed = 0
+
+    def original_index(self, index) -> int:
+        while self._passed < len(self._starts) and self._starts[self._passed] <= index:
+            self._passed += 1
+        number = self._passed - 1
+        if number < 0:
+            return index
+        if index < self._ends[number]:
+            return self._indexes[number]
+        return index - (self._ends[number] - self._indexes[number] - 1)
+
+    def original_end(self, end) -> int:
+        """Translate the index behind a match, unlike original_index() the ends don't have to be ascending."""
+        number = bisect.bisect_right(self._starts, end - 1) - 1
+        if number < 0:
+            return end
+        if end - 1 < self._ends[number]:
+            return self._indexes[number] + 1
+        return end - (self._ends[number] - self._indexes[number] - 1)
+
+def iter_lines(chunks):
+    """Yield the lines of a text that arrives in pieces without their line breaks, numbered like str.splitlines() numbers them."""
+    pending = ""
+    for chunk in chunks:
+        text = pending + chunk
+        end = _complete_lines_end(text)
+        if end:
+            yield from text[:end].splitlines()
+            pending = text[end:]
+        else:
+            pending = text
+    if pending:
+        yield pending
+
+def extract_snippets(lines, positions, lengths, context) -> dict:
+    """Return {search_term: [snippet, ...]} with a snippet for every position of `positions` ({search_term: [(line, column), ...]}, a distance may follow).
+
+    -`lines` are the lines of the searched text (e.g. text.splitlines() or iter_lines()), they are consumed up to the last match.
+    -`lengths` ({search_term: [length, ...]}, see Matcher.find_positions()) holds the length of every match.
+    -A snippet holds the match and up to `context` characters of its line on either side, a match that runs past
+     the end of its line (a regular expression across lines) is cut off there.
+    """
+    snippets = {search_term: [""] * len(term_positions) for search_term, term_positions in positions.items()}
+    wanted = sorted(
+        (line, column, length, search_term, number)
+        for search_term, term_positions in positions.items()
+        for number, ((line, column, *_), length) in enumerate(zip(term_positions, lengths[search_term]))
+    )
+    if not wanted:
+        return snippets
+    wanted_index = 0
+    for line_number, line in enumerate(lines, 1):
+        while wanted[wanted_index][0] == line_number:
+            _, column, length, search_term, number = wanted[wanted_index]
+            snippets[search_term][number] = line[max(column - 1 - context, 0):column - 1 + length + context]
+            wanted_index += 1
+            if wanted_index == len(wanted):
+                return snippets
+    return snippets
+
+def _complete_lines_end(text) -> int:
+    """Return the index behind the last line break in `text`, 0 if it has none."""
+    end = text.rfind("\n") + 1
+    if _UNUSUAL_LINE_BREAKS.search(text, end):
+        for line_break in _LINE_BREAKS.finditer(text, end):
+            end = line_break.end()
+    return end
+
+def _trie_to_pattern(node) -> str:
+    branches = [re.escape(char) + _trie_to_pattern(child) for char, child in node.items() if char != _TERMS_KEY]
+    if not branches:
+        return ""
+    if len(branches) == 1 and _TERMS_KEY not in node:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if _TERMS_KEY in node else pattern
+
+
+def _overlaps_itself(term) -> bool:
+    #a term overlaps an occurrence of itself if a proper prefix of it is also a suffix of it (e.g. "abab")
+    return any(term.startswith(term[-length:]) for length in range(1, len(term)))
+
+def _find_indexes(text, term, limit=None) -> list:
+    #the indexes of the first `limit` (all if None) occurrences of `term` in `text`, overlapping ones included
+    indexes = []
+    if limit == 0:
+        return indexes
+    append = indexes.append
+    find = text.find
+    index = find(term)
+    while index != -1:
+        append(index)
+        if len(indexes) == limit:
+            break
+        index = find(term, index + 1)
+    return indexes
+
+def _iter_found_matches(text, term, search_terms, start, end):
+    #(index, length, search_terms) of every occurrence of `term` in text[start:end], overlapping ones included
+    find = text.find
+    length = len(term)
+    index = find(term, start, end)
+    while index != -1:
+        yield index, length, search_terms
+        index = find(term, index + 1, end)
+
+def _collect_terms_by_match(node, prefix, terms_of_prefixes, terms_by_match):
+    #{match: [(length, search_terms), ...]}, the terms ending at the matched prefixes grouped by their length
+    terms = node.get(_TERMS_KEY)
+    if terms:
+        terms_of_prefixes = terms_of_prefixes + [(len(prefix), terms)]
+        terms_by_match[prefix] = terms_of_prefixes
+    for char, child in node.items():
+        if char != _TERMS_KEY:
+            _collect_terms_by_match(child, prefix + char, terms_of_prefixes, terms_by_match)
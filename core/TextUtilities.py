@@ -1,22 +1,177 @@
-import os, subprocess, platform
-from tkinter import messagebox
+import os, io, subprocess, platform, codecs, mmap
+from .CompressedFiles import READ_ERRORS, is_compressed, open_binary
 
-def read_text_file(path) -> str:
-    encodings_to_try = ["utf-8", "utf-8-sig", "cp1252", "latin-1"]
+#the BOM and the first bytes of a file decide which of "utf-8", "utf-8-sig", "cp1252" and "latin-1" are tried
+UTF8_SAMPLE_SIZE = 64 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+def get_encodings_to_try(sample) -> list:
+    """Return the encodings worth trying for a file that starts with the bytes `sample`, most likely first.
+
+    -A UTF-8 BOM selects "utf-8-sig", which strips the BOM from the text.
+    -If the sample isn't valid UTF-8 the UTF-8 encodings are skipped, they would fail on the whole file anyway.
+    -"latin-1" accepts any byte, so it is always the last resort.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return ["utf-8-sig", "cp1252", "latin-1"]
+    try:
+        #a multi-byte character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(sample[:UTF8_SAMPLE_SIZE], final=False)
+        return ["utf-8", "cp1252", "latin-1"]
+    except UnicodeDecodeError:
+        return ["cp1252", "latin-1"]
+
+def decode_text_bytes(data) -> tuple:
+    """Decode the raw bytes of a text file and return (text, encoding).
 
-    for encoding in encodings_to_try:
+    -Line breaks are translated like reading in text mode ("\r\n" and "\r" become "\n").
+    """
+    for encoding in get_encodings_to_try(data[:UTF8_SAMPLE_SIZE]):
         try:
-            with open(path, "r", encoding=encoding, errors="strict") as f:
-                return f.read()
-        except Exception:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
             pass
+    else:
+        text, encoding = data.decode("utf-8", errors="replace"), "utf-8"
+
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, encoding
 
+def read_text_file_with_encoding(path) -> tuple:
+    """Read the file once and return (text, encoding), or (None, None) if it can't be read.
+
+    -Compressed files and zip members ("archive.zip!member.log") are decompressed while they are read, see open_binary().
+    """
+    try:
+        f, _ = open_binary(path)
+        with f:
+            data = f.read()
+    except Exception:
+        return None, None
+    return decode_text_bytes(data)
+
+def read_text_file(path) -> str:
+    text, _ = read_text_file_with_encoding(path)
+    return text
+
+def read_file_sample(path) -> bytes:
+    """Return the first UTF8_SAMPLE_SIZE bytes of the file for get_encodings_to_try(), or None if it can't be read."""
     try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
+        f, _ = open_binary(path)
+        with f:
+            return f.read(UTF8_SAMPLE_SIZE)
     except Exception:
         return None
 
+def iter_text_chunks(path, encoding, chunk_size=COPY_CHUNK_SIZE, errors="strict"):
+    """Yield the text of `path` decoded with `encoding`, `chunk_size` bytes at a time.
+
+    -The file is memory-mapped, only the current chunk is decoded and held in memory. A compressed file is
+     decompressed `chunk_size` bytes at a time instead.
+    -Line breaks are translated like reading in text mode, also when a "\r\n" is split between two chunks.
+    -Raises UnicodeDecodeError as soon as the file turns out not to be valid in `encoding`, unless `errors`
+     (a codecs error handler like "replace") says otherwise.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(errors=errors), translate=True)
+
+    if is_compressed(path):
+        f, _ = open_binary(path)
+        with f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    yield text
+    else:
+        yield from _iter_mapped_text_chunks(path, decoder, chunk_size)
+
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+def _iter_mapped_text_chunks(path, decoder, chunk_size):
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if hasattr(data, "madvise"):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                for start in range(0, size, chunk_size):
+                    text = decoder.decode(data[start:start + chunk_size])
+                    #the decoded pages are not needed anymore, drop them from the resident memory of the process
+                    released = (start + chunk_size) // mmap.PAGESIZE * mmap.PAGESIZE
+                    if hasattr(data, "madvise") and released > 0:
+                        data.madvise(mmap.MADV_DONTNEED, 0, min(released, size))
+                    if text:
+                        yield text
+
+def copy_text_file(path, target, chunk_size=COPY_CHUNK_SIZE, encodings=None, offset=0, length=None):
+    """Stream the text of `path` into the open text file `target`, `chunk_size` bytes at a time.
+
+    -Tries the same encodings as read_text_file() without holding the whole file in memory,
+     `encodings` replaces them (e.g. the encoding the start of the file was already decoded with).
+    -Only the `length` bytes (all if None) from byte `offset` on are copied, e.g. the lines appended to a log file.
+     Compressed files are decompressed while they are copied, `offset` and `length` then count decompressed bytes.
+    -Line breaks are translated like reading in text mode.
+    -If an encoding fails halfway through the file, its partial output is truncated before the next one is tried.
+    -Returns the encoding that worked, or None if the file can't be read at all (its partial output is truncated
+     as well). Errors writing `target` are raised.
+    """
+    if encodings is None:
+        sample = read_file_sample(path)
+        if sample is None:
+            return None
+        encodings = get_encodings_to_try(sample)
+
+    start = target.tell()
+
+    for encoding in encodings:
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(errors="strict"), translate=True)
+        chunks = iter_byte_range(path, chunk_size, offset, length)
+        try:
+            while True:
+                #only errors reading the source are caught here, not those of writing the target
+                try:
+                    data = next(chunks, None)
+                except READ_ERRORS:
+                    target.seek(start)
+                    target.truncate()
+                    return None
+                if data is None:
+                    break
+                target.write(decoder.decode(data))
+            target.write(decoder.decode(b"", final=True))
+            return encoding
+        except UnicodeDecodeError:
+            target.seek(start)
+            target.truncate()
+        finally:
+            chunks.close()
+
+    return None
+
+def iter_byte_range(path, chunk_size, offset=0, length=None):
+    """Yield the `length` bytes (all if None) of `path` from byte `offset` on in pieces of up to `chunk_size` bytes.
+
+    -Compressed files are decompressed (see open_binary()), `offset` and `length` then count decompressed bytes.
+    -Raises one of READ_ERRORS if the file can't be read.
+    """
+    f, _ = open_binary(path)
+    with f:
+        f.seek(offset)
+        remaining = length
+        while remaining is None or remaining > 0:
+            data = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            yield data
+
 def open_in_notepad(path) -> None:
     try:
         if platform.system() == "Windows":
@@ -26,6 +181,8 @@ def open_in_notepad(path) -> None:
         else:
             subprocess.run(["xdg-open", path])  #linux
     except Exception as e:
+        #only the GUI opens result files, so tkinter is imported here instead of slowing down every import
+        from tkinter import messagebox
         messagebox.showinfo("Hint", f"Result saved at:\n{path}\n\nCould not open directly: {e}")
 
 def get_file_extensions_from_string(string) -> list:
@@ -0,0 +1,110 @@
+import queue, threading
+
+def make_progress_callback(progress_bar):
+    """Return a callback(done, total) that moves `progress_bar` to done/total percent.
+
+    -The bar is only redrawn when the percentage actually changes.
+    """
+    last_progress = -1
+
+    def update_progress_bar(done, total):
+        nonlocal last_progress
+        progress = int((done * 100) / total) if total else 0
+        if progress != last_progress:
+            progress_bar["value"] = progress
+            progress_bar.update_idletasks()
+            last_progress = progress
+
+    return update_progress_bar
+
+class BackgroundJob:
+    """Run one tool function at a time on a worker thread while the Tk event loop keeps running.
+
+    -The worker only puts messages on a queue, the Tk thread polls it with after() every POLL_INTERVAL_MS
+     and updates the progress bar and the status label, no widget is touched from the worker thread.
+    -The function gets `progress_callback`, `status_callback` and `cancel_event` keyword arguments.
+    -cancel() sets the event, the tools then stop handing out files and finish the ones already being read.
+    -While a job runs the start button is disabled and the cancel button is enabled.
+    """
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, progress_bar, status_label, start_button, cancel_button):
+        self.progress_bar = progress_bar
+        self.status_label = status_label
+        self.start_button = start_button
+        self.cancel_button = cancel_button
+        self.cancel_event = threading.Event()
+        self.messages = queue.Queue()
+        self.thread = None
+        self.cancel_button.config(state="disabled")
+
+    def is_running(self) -> bool:
+        return self.thread is not None
+
+    def start(self, on_finished, function, *args, **kwargs):
+        """Call function(*args, **kwargs) on the worker thread, then on_finished(result, error) on the Tk thread.
+
+        -`error` is the exception the function raised (None if it returned), `result` is None in that case.
+        """
+        if self.is_running():
+            return
+        self.cancel_event.clear()
+        self.on_finished = on_finished
+        self.update_progress_bar = make_progress_callback(self.progress_bar)
+        self.start_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.status_label.config(text="Starting...")
+
+        kwargs.update(
+            progress_callback=lambda done, total: self.messages.put(("progress", (done, total))),
+            status_callback=lambda status: self.messages.put(("status", status)),
+            cancel_event=self.cancel_event
+        )
+        self.thread = threading.Thread(target=self._run, args=(function, args, kwargs), daemon=True)
+        self.thread.start()
+        self.progress_bar.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def cancel(self):
+        if self.is_running():
+            self.cancel_event.set()
+            self.cancel_button.config(state="disabled")
+            self.status_label.config(text="Cancelling...")
+
+    def _run(self, function, args, kwargs):
+        try:
+            self.messages.put(("finished", (function(*args, **kwargs), None)))
+        except Exception as e:
+            self.messages.put(("finished", (None, e)))
+
+    def _poll(self):
+        #only the newest progress and status of a batch of messages are drawn
+        progress = status = finished = None
+        try:
+            while True:
+                kind, payload = self.messages.get_nowait()
+                if kind == "progress":
+                    progress = payload
+                elif kind == "status":
+                    status = payload
+                else:
+                    finished = payload
+        except queue.Empty:
+            pass
+
+        if progress is not None:
+            self.update_progress_bar(*progress)
+        if status is not None and not self.cancel_event.is_set():
+            self.status_label.config(text=status)
+
+        if finished is None:
+            self.progress_bar.after(self.POLL_INTERVAL_MS, self._poll)
+            return
+
+        self.thread.join()
+        self.thread = None
+        self.progress_bar["value"] = 0
+        self.status_label.config(text="")
+        self.start_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        self.on_finished(*finished)
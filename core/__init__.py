@@ -1,5 +1,16 @@
 from .Theme import UI_COLORS
+from .TermMatching import TermMatcher, RegexMatcher, FuzzyMatcher
+from .Execution import ToolError, map_in_order, default_worker_count
+from .UI import make_progress_callback, BackgroundJob
 
 __all__ = [
-    "UI_COLORS"
+    "UI_COLORS",
+    "TermMatcher",
+    "RegexMatcher",
+    "FuzzyMatcher",
+    "ToolError",
+    "map_in_order",
+    "default_worker_count",
+    "make_progress_callback",
+    "BackgroundJob"
 ]
\ No newline at end of file
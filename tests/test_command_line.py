@@ -0,0 +1,74 @@
+import io, os, sys, argparse, subprocess
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.CommandLine import EXIT_ERROR, EXIT_NOTHING_FOUND, EXIT_SUCCESS, parse_size, read_multiline_argument
+from tools.concatenate_files import concatenate_files
+from tools.search_files import search_files
+
+REPOSITORY_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def create_source(tmp_path) -> tuple:
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    (source / "app.log").write_text("start\nERROR disk full\n", encoding="utf-8")
+    return source, target
+
+def test_search_exit_codes(tmp_path, capsys):
+    source, target = create_source(tmp_path)
+    arguments = [str(source), "-o", str(target), "-w", "1", "--threads"]
+    assert search_files.main(arguments + ["-t", "ERROR"]) == EXIT_SUCCESS
+    result_file_path = capsys.readouterr().out.strip()
+    assert os.path.dirname(result_file_path) == str(target)
+    assert search_files.main(arguments + ["-t", "missing", "-l"]) == EXIT_NOTHING_FOUND
+    capsys.readouterr()
+
+    assert search_files.main([str(tmp_path / "missing"), "-t", "ERROR"]) == EXIT_ERROR
+    assert "Source directory doesn't exist" in capsys.readouterr().err
+    assert search_files.main(arguments + ["-t", "(ERROR", "-r"]) == EXIT_ERROR
+    assert "Invalid regular expression:\n(ERROR" in capsys.readouterr().err
+    assert search_files.main(arguments + ["-t", "ERROR", "-r", "--fuzzy", "1"]) == EXIT_ERROR
+    #invalid arguments are reported by argparse with the same code
+    with pytest.raises(SystemExit) as exit_info:
+        search_files.main(arguments + ["-t", "ERROR", "--max-size", "lots"])
+    assert exit_info.value.code == EXIT_ERROR
+
+def test_search_terms_from_stdin(tmp_path, capsys, monkeypatch):
+    source, target = create_source(tmp_path)
+    monkeypatch.setattr(sys, "stdin", io.StringIO("missing\ndisk\n"))
+    assert search_files.main([str(source), "-o", str(target), "-w", "1", "--threads"]) == EXIT_SUCCESS
+    monkeypatch.setattr(sys, "stdin", io.StringIO(""))
+    assert search_files.main([str(source), "-o", str(target), "-w", "1", "--threads"]) == EXIT_ERROR
+    assert "No search terms specified" in capsys.readouterr().err
+
+def test_concatenation_exit_codes(tmp_path, capsys):
+    source, target = create_source(tmp_path)
+    assert concatenate_files.main([str(source), "-o", str(target), "-e", ".log", "-w", "1"]) == EXIT_SUCCESS
+    result_file_path = capsys.readouterr().out.strip()
+    with open(result_file_path, encoding="utf-8") as f:
+        assert "ERROR disk full" in f.read()
+    #without a file to concatenate there is no result
+    assert concatenate_files.main([str(source), "-o", str(target), "-e", ".csv", "-w", "1"]) == EXIT_ERROR
+    assert "No files with the following file extensions found" in capsys.readouterr().err
+    assert concatenate_files.main([str(source), "-o", str(tmp_path / "missing"), "-e", ".log"]) == EXIT_ERROR
+    assert "Target directory doesn't exist" in capsys.readouterr().err
+    assert concatenate_files.main([str(source), "-o", str(target), "-e", ".log", "--incremental", "--dedup"]) == EXIT_ERROR
+
+@pytest.mark.parametrize("terms, exit_code", [(["ERROR"], EXIT_SUCCESS), (["missing"], EXIT_NOTHING_FOUND), ([], EXIT_ERROR)])
+def test_exit_code_of_the_process(tmp_path, terms, exit_code):
+    source, target = create_source(tmp_path)
+    arguments = [str(source), "-o", str(target), "-w", "1"] + [argument for term in terms for argument in ["-t", term]]
+    process = subprocess.run(
+        [sys.executable, "-m", "tools.search_files"] + arguments, cwd=REPOSITORY_DIRECTORY,
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60
+    )
+    assert process.returncode == exit_code
+
+def test_argument_helpers():
+    assert [parse_size(size) for size in ["4096", "500K", "1.5m", "2GB", "0"]] == [4096, 500 * 1024, int(1.5 * 1024 ** 2), 2 * 1024 ** 3, 0]
+    for size in ["lots", "-1K", ""]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_size(size)
+    assert read_multiline_argument(["a", "b"], io.StringIO("ignored")) == "a\nb"
+    assert read_multiline_argument(["-"], io.StringIO("a\nb\n")) == "a\nb\n"
+    assert read_multiline_argument(None, io.StringIO("a\n")) == "a\n"
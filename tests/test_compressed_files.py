@@ -0,0 +1,70 @@
+import os, sys, gzip, json, zipfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.CompressedFiles import get_base_name, open_binary, split_member_path, stat_source
+from tools.concatenate_files import concatenate_files
+from tools.search_files import search_files
+
+def create_source(tmp_path) -> tuple:
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    (source / "plain.log").write_text("ERROR plain\n", encoding="utf-8")
+    (source / "old.log.gz").write_bytes(gzip.compress(b"ERROR gzip\n"))
+    (source / "image.png.gz").write_bytes(gzip.compress(b"ERROR not a log\n"))
+    with zipfile.ZipFile(source / "archive.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("app.log", "ERROR app\n")
+        archive.writestr("logs/nested.log", "line\nERROR nested\n")
+        archive.writestr("logs/skip.log", "ERROR excluded\n")
+        archive.writestr("image.png", "ERROR not a log\n")
+    return source, target
+
+def search(source, target, **options) -> dict:
+    result_file_path, _ = search_files.run_search(
+        str(source), str(target), "ERROR", True, workers=1, use_processes=False, output_format=search_files.OUTPUT_NDJSON, **options
+    )
+    with open(result_file_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    os.remove(result_file_path)
+    return {record["file"]: record["line"] for record in records}
+
+def test_member_paths_are_split_at_the_archive():
+    path = os.path.join("logs", "Archive.ZIP!dir/app.log")
+    assert split_member_path(path) == (os.path.join("logs", "Archive.ZIP"), "dir/app.log")
+    assert split_member_path(os.path.join("logs", "app.log")) == (os.path.join("logs", "app.log"), None)
+    #only an archive name followed by the separator starts a member
+    assert split_member_path("notes!.zip.log") == ("notes!.zip.log", None)
+    assert get_base_name(path) == "Archive.ZIP!dir/app.log"
+    assert get_base_name(os.path.join("logs", "app.log.gz")) == "app.log.gz"
+
+def test_members_are_read_from_their_archive(tmp_path):
+    source, _ = create_source(tmp_path)
+    member_path = str(source / "archive.zip") + "!logs/nested.log"
+    f, size = open_binary(member_path)
+    with f:
+        assert f.read() == b"line\nERROR nested\n"
+    assert size == len(b"line\nERROR nested\n")
+    assert stat_source(member_path).st_mtime_ns == os.stat(source / "archive.zip").st_mtime_ns
+
+def test_compressed_files_are_only_searched_when_asked_for(tmp_path):
+    source, target = create_source(tmp_path)
+    assert search(source, target) == {"plain.log": 1}
+    assert search(source, target, compressed=True, exclude_patterns=["skip.log"]) == {
+        "plain.log": 1, "old.log.gz": 1, "archive.zip!app.log": 1, "archive.zip!logs/nested.log": 2
+    }
+
+def test_compressed_files_are_only_concatenated_when_asked_for(tmp_path):
+    source, target = create_source(tmp_path)
+    with open(concatenate_files.run_concatenation(str(source), str(target), ".log", False, workers=1), encoding="utf-8") as f:
+        assert f.read().count("ERROR") == 1
+    with open(concatenate_files.run_concatenation(str(source), str(target), ".log", False, workers=1, compressed=True), encoding="utf-8") as f:
+        result = f.read()
+    assert str(source / "archive.zip") + "!logs/nested.log:\n\nline\nERROR nested\n" in result
+    assert str(source / "old.log.gz") + ":\n\nERROR gzip\n" in result
+    assert "not a log" not in result
+    assert result.count("ERROR") == 5
+
+def test_command_line_reads_compressed_files_with_the_option(tmp_path):
+    source, target = create_source(tmp_path)
+    arguments = [str(source), "-o", str(target), "-t", "nested", "-w", "1", "--threads"]
+    assert search_files.main(arguments) == 1
+    assert search_files.main(arguments + ["--compressed"]) == 0
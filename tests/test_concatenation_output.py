@@ -0,0 +1,39 @@
+import os, sys, gzip, random
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.ConcatenationOutput import ConcatenationOutput, COMPRESSION_GZIP, COMPRESSION_ZSTD, load_zstandard
+
+PART_SIZE = 3000
+
+def write_sections(output, count) -> tuple:
+    rng = random.Random(3)
+    texts = []
+    for number in range(count):
+        #hex digits compress to about half, so the compressor holds back a noticeable part of every section
+        text = f"== file{number}.log\n" + "".join(f"{rng.getrandbits(160):040x}\n" for _ in range(rng.randint(5, 20)))
+        output.start_section(f"file{number}.log")
+        output.write(text)
+        output.end_section()
+        texts.append(text)
+    output.close()
+    return texts, max(len(text.encode("utf-8")) for text in texts)
+
+def read_part(path, compression) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(data)
+    if compression == COMPRESSION_ZSTD:
+        return load_zstandard().ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+@pytest.mark.parametrize("compression", [None, COMPRESSION_GZIP, COMPRESSION_ZSTD])
+def test_parts_stay_within_the_part_size_plus_one_section(tmp_path, compression):
+    if compression == COMPRESSION_ZSTD and load_zstandard() is None:
+        pytest.skip("zstandard isn't installed")
+    output = ConcatenationOutput(str(tmp_path / "Result.txt"), compression=compression, part_size=PART_SIZE)
+    texts, largest_section = write_sections(output, 200)
+    sizes = [os.path.getsize(path) for path in output.paths]
+    assert len(sizes) > 5
+    assert all(size <= PART_SIZE + largest_section for size in sizes[:-1])
+    assert b"".join(read_part(path, compression) for path in output.paths).decode("utf-8").replace(os.linesep, "\n") == "".join(texts)
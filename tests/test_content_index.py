@@ -0,0 +1,77 @@
+import os, sys, json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.ContentIndex import ContentIndex, INDEX_FILE_NAME
+from tools.search_files import search_files
+
+def search(source, target, search_terms, case_sensitive=False, use_regex=False) -> set:
+    """Search with the index and return the files with a match as {(search_term, file)}."""
+    result_file_path, _ = search_files.run_search(
+        str(source), str(target), "\n".join(search_terms), case_sensitive, workers=1, use_processes=False,
+        use_index=True, use_regex=use_regex, output_format=search_files.OUTPUT_NDJSON, query=search_files.QUERY_FILES
+    )
+    with open(result_file_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    os.remove(result_file_path)
+    return {(record["term"], record["file"]) for record in records}
+
+def create_directories(tmp_path) -> tuple:
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    (source / "a.log").write_text("alpha beta\n", encoding="utf-8")
+    (source / "b.log").write_text("gamma delta\n", encoding="utf-8")
+    return source, target
+
+def test_changed_and_deleted_files_are_indexed_again(tmp_path):
+    source, target = create_directories(tmp_path)
+    assert search(source, target, ["alpha"]) == {("alpha", "a.log")}
+    assert (source / INDEX_FILE_NAME).exists()
+
+    #same size, only the modification time tells the change apart
+    (source / "a.log").write_text("omega beta\n", encoding="utf-8")
+    stat = os.stat(source / "a.log")
+    os.utime(source / "a.log", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    #a grown file
+    (source / "b.log").write_text("gamma delta\nomega\n", encoding="utf-8")
+    assert search(source, target, ["omega", "alpha"]) == {("omega", "a.log"), ("omega", "b.log")}
+
+    os.remove(source / "b.log")
+    assert search(source, target, ["omega"]) == {("omega", "a.log")}
+    index = ContentIndex.for_directory(str(source))
+    try:
+        assert index.stale_files({}) == set()
+        assert index.candidate_files(["omega", "gamma"]) == {"a.log"}
+    finally:
+        index.close()
+
+def test_short_terms_are_not_filtered(tmp_path):
+    source, target = create_directories(tmp_path)
+    search(source, target, ["alpha"])
+    index = ContentIndex.for_directory(str(source))
+    try:
+        assert index.candidate_files(["al"]) is None
+        assert index.candidate_files(["alpha", "a b"]) is None
+    finally:
+        index.close()
+    assert search(source, target, ["ta", "a d"]) == {("ta", "a.log"), ("ta", "b.log"), ("a d", "b.log")}
+
+def test_terms_match_the_index_in_any_case(tmp_path):
+    source, target = create_directories(tmp_path)
+    (source / "c.log").write_text("ERROR Disk Full\n", encoding="utf-8")
+    search(source, target, ["alpha"])
+    index = ContentIndex.for_directory(str(source))
+    try:
+        assert index.candidate_files(["error"]) == {"c.log"}
+        assert index.candidate_files(["DISK full"]) == {"c.log"}
+    finally:
+        index.close()
+    assert search(source, target, ["eRRor"]) == {("eRRor", "c.log")}
+    assert search(source, target, ["ERROR", "error"], case_sensitive=True) == {("ERROR", "c.log")}
+
+def test_regular_expressions_are_not_narrowed_down(tmp_path):
+    source, target = create_directories(tmp_path)
+    search(source, target, ["alpha"])
+    #the trigrams of the pattern ("ph.", "et.", ...) are in no file, the index must not be asked
+    assert search(source, target, ["alph.", "bet.", "gam+a"], use_regex=True) == {
+        ("alph.", "a.log"), ("bet.", "a.log"), ("gam+a", "b.log")
+    }
@@ -0,0 +1,54 @@
+import os, sys, gzip, zipfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.Deduplication import DuplicateIndex, find_size_collisions, hash_bytes
+from tools.concatenate_files import concatenate_files
+
+def test_duplicate_index_keeps_the_first_file_of_a_digest():
+    duplicates = DuplicateIndex()
+    assert duplicates.find_original(None) is None
+    duplicates.add("a.log", None, 10)
+    assert duplicates.find_original(hash_bytes(b"")) is None
+    digest = hash_bytes(b"content")
+    duplicates.add("a.log", digest, 7)
+    duplicates.add("b.log", digest, 7)
+    assert duplicates.find_original(digest) == "a.log"
+    duplicates.add_duplicate(digest)
+    duplicates.add_duplicate(digest)
+    assert (duplicates.duplicate_count, duplicates.saved_bytes) == (2, 14)
+
+def test_only_files_of_the_same_size_are_hashed(tmp_path):
+    for name, content in [("a.log", b"12345"), ("b.log", b"abcde"), ("c.log", b"123"), ("d.log", b"1234567")]:
+        (tmp_path / name).write_bytes(content)
+    with zipfile.ZipFile(tmp_path / "archive.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("e.log", b"1234567")
+        archive.writestr("f.log", b"1" * 100)
+    files = [str(tmp_path / name) for name in ["a.log", "b.log", "c.log", "d.log"]]
+    members = [str(tmp_path / "archive.zip") + "!" + name for name in ["e.log", "f.log"]]
+    missing = str(tmp_path / "missing.log")
+    assert find_size_collisions(files + members + [missing]) == {files[0], files[1], files[3], members[0]}
+    assert find_size_collisions(files[2:3]) == set()
+
+def test_compressed_files_are_always_hashed(tmp_path):
+    (tmp_path / "a.log").write_bytes(b"12345")
+    (tmp_path / "b.log").write_bytes(b"123")
+    (tmp_path / "c.log.gz").write_bytes(gzip.compress(b"1"))
+    files = [str(tmp_path / name) for name in ["a.log", "b.log", "c.log.gz"]]
+    assert find_size_collisions(files) == set(files)
+
+def test_gzip_members_split_differently_are_still_identical(tmp_path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    content = "".join(f"line {number}\n" for number in range(1000)).encode()
+    (source / "a.log").write_bytes(content)
+    (source / "b.log.gz").write_bytes(gzip.compress(content))
+    #the trailer of the last member only holds the size of its own part of the content
+    (source / "c.log.gz").write_bytes(gzip.compress(content[:5000]) + gzip.compress(content[5000:]))
+    (source / "d.log").write_bytes(content[:-1])
+    result_file_path = concatenate_files.run_concatenation(str(source), str(target), ".log", False, workers=1, deduplicate=True, compressed=True)
+    with open(result_file_path, encoding="utf-8") as f:
+        result = f.read()
+    #the files are listed in directory order, any of the three copies can come first
+    assert result.count(": identical to ") == 2
+    assert "Identical files:\t2 written as a reference" in result
+    assert str(source / "d.log") + ":\n\n" in result
@@ -0,0 +1,69 @@
+import os, sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.DirectoryTraversal import SYMLINKS_FILES, SYMLINKS_FOLLOW, SYMLINKS_SKIP, compile_exclude_patterns, get_extension, iter_files
+
+FILES = ["a.log", "b.txt", "skip.bak", "sub/c.log", "sub/deep/d.log", "sub/archive/g.log", "node_modules/e.log", "archive/f.log"]
+
+def create_tree(tmp_path):
+    for file in FILES:
+        path = tmp_path / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(file, encoding="utf-8")
+    return tmp_path
+
+def listed(root, **options) -> set:
+    return {os.path.relpath(path, root).replace(os.sep, "/") for path in iter_files(str(root), **options)}
+
+def test_extensions():
+    assert [get_extension(name) for name in ["a.LOG", "a.tar.gz", "README", ".bashrc", "..a", ".a.txt", "a."]] == [
+        ".log", ".gz", "", "", "", ".txt", "."
+    ]
+    assert all(get_extension(name) == os.path.splitext(name)[1].lower() for name in ["a.LOG", "x.y.z", ".hidden", "...b.c", "a."])
+
+def test_files_are_listed_in_the_order_of_os_walk(tmp_path):
+    root = create_tree(tmp_path)
+    walked = [os.path.join(path, name) for path, _, names in os.walk(root) for name in names if name.endswith(".log")]
+    assert list(iter_files(str(root), [".LOG"])) == walked
+    assert listed(root) == set(FILES)
+
+def test_max_depth_limits_the_descent(tmp_path):
+    root = create_tree(tmp_path)
+    assert listed(root, file_extensions=[".log"], max_depth=0) == {"a.log"}
+    assert listed(root, file_extensions=[".log"], max_depth=1) == {"a.log", "sub/c.log", "node_modules/e.log", "archive/f.log"}
+    assert listed(root, file_extensions=[".log"], max_depth=2) == {file for file in FILES if file.endswith(".log")}
+
+def test_exclude_patterns_match_names_and_relative_paths(tmp_path):
+    root = create_tree(tmp_path)
+    assert compile_exclude_patterns(["", ""]) is None
+    #a directory name leaves out everything below it, "archive/*" only the top-level archive directory
+    assert listed(root, exclude_patterns=["node_modules", "archive/*", "*.bak"]) == {
+        "a.log", "b.txt", "sub/c.log", "sub/deep/d.log", "sub/archive/g.log"
+    }
+    assert listed(root, file_extensions=[".log"], exclude_patterns=["deep", "c.*"]) == {
+        "a.log", "sub/archive/g.log", "node_modules/e.log", "archive/f.log"
+    }
+    assert listed(root, exclude_patterns=["sub/*/*.log"]) == set(FILES) - {"sub/deep/d.log", "sub/archive/g.log"}
+
+def test_symbolic_links(tmp_path):
+    root = create_tree(tmp_path / "root")
+    try:
+        os.symlink(root / "a.log", root / "link.log")
+        os.symlink(root / "sub", root / "linked_sub", target_is_directory=True)
+        #a cycle back to the top
+        os.symlink(root, root / "sub" / "loop", target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("symbolic links can't be created here")
+    logs = {file for file in FILES if file.endswith(".log")}
+    assert listed(root, file_extensions=[".log"], symlinks=SYMLINKS_SKIP) == logs
+    assert listed(root, file_extensions=[".log"], symlinks=SYMLINKS_FILES) == logs | {"link.log"}
+    #every directory is only visited once, "linked_sub" is the same directory as "sub"
+    followed = listed(root, file_extensions=[".log"], symlinks=SYMLINKS_FOLLOW)
+    assert len(followed) == len(logs) + 1
+    assert "link.log" in followed
+
+def test_errors(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_files(str(tmp_path), symlinks="always"))
+    with pytest.raises(OSError):
+        list(iter_files(str(tmp_path / "missing")))
@@ -0,0 +1,81 @@
+import io, os, sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.FileScreening import BINARY_SAMPLE_SIZE, SKIP_BINARY, SKIP_TOO_LARGE, FileScreen, format_size, is_binary_sample
+from tools.concatenate_files import concatenate_files
+from tools.search_files import search_files
+
+def test_binary_samples():
+    assert not is_binary_sample(b"")
+    assert not is_binary_sample("plain text, Ümlaute\r\n\ttabs\x1b[31m red\x1b[0m\f".encode())
+    assert is_binary_sample(b"text\x00")
+    #up to one control character in ten is still text
+    assert not is_binary_sample(b"\x01" + b"a" * 9)
+    assert is_binary_sample(b"\x01\x02" + b"a" * 8)
+    assert is_binary_sample(b"\x7f" * 2 + b"a" * 8)
+
+def test_screen_checks_the_size_and_the_start_of_a_file():
+    screen = FileScreen(100)
+    assert screen.check_size(100) is None
+    assert screen.check_size(101) == SKIP_TOO_LARGE
+    assert FileScreen().check_size(10**12) is None
+    #the size is checked before anything is read
+    assert screen.check(io.BytesIO(b"\x00" * 200), 200) == SKIP_TOO_LARGE
+
+    f = io.BytesIO(b"head\x00" + b"a" * 20)
+    f.seek(5)
+    assert screen.check(f, 25) is None
+    assert f.tell() == 5
+    f.seek(0)
+    assert screen.check(f, 25) == SKIP_BINARY
+    assert f.tell() == 0
+    assert FileScreen(skip_binary=False).check(f, 25) is None
+
+    #only the sample at the start counts
+    data = b"a" * BINARY_SAMPLE_SIZE + b"\x00"
+    assert FileScreen().check(io.BytesIO(data), len(data)) is None
+
+    with pytest.raises(ValueError):
+        FileScreen(-1)
+
+def test_skip_reasons_are_described():
+    assert [format_size(size) for size in [0, 1023, 1024, 1536, 100 * 1024 ** 2, 3 * 1024 ** 4]] == [
+        "0 bytes", "1023 bytes", "1 KB", "1.5 KB", "100 MB", "3072 GB"
+    ]
+    screen = FileScreen(1024)
+    assert screen.describe(SKIP_TOO_LARGE) == "larger than 1 KB"
+    assert screen.describe(SKIP_BINARY) == "binary"
+    skipped_files = [("a", SKIP_BINARY), ("b", SKIP_TOO_LARGE), ("c", SKIP_BINARY)]
+    assert screen.describe_counts(skipped_files) == "3 files (2 binary, 1 larger than 1 KB)"
+    assert screen.describe_counts(skipped_files[:1]) == "1 file (1 binary)"
+
+def create_source(tmp_path) -> tuple:
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    (source / "text.log").write_text("ERROR text\n", encoding="utf-8")
+    (source / "dump.log").write_bytes(b"ERROR\x00\x01\x02 binary\n")
+    (source / "large.log").write_text("ERROR large\n" * 200, encoding="utf-8")
+    return source, target
+
+def test_search_reports_the_skipped_files(tmp_path):
+    source, target = create_source(tmp_path)
+    result_file_path, match_count = search_files.run_search(str(source), str(target), "ERROR", True, workers=1, use_processes=False, max_file_size=1024)
+    with open(result_file_path, encoding="utf-8") as f:
+        report = f.read()
+    assert match_count == 1
+    assert " Skipped:\t2 files (" in report
+    assert "\n\tdump.log\tbinary" in report
+    assert "\n\tlarge.log\tlarger than 1 KB" in report
+
+    result_file_path, match_count = search_files.run_search(str(source), str(target), "ERROR", True, workers=1, use_processes=False, skip_binary=False)
+    assert match_count == 202
+
+def test_concatenation_lists_the_skipped_files(tmp_path):
+    source, target = create_source(tmp_path)
+    with open(concatenate_files.run_concatenation(str(source), str(target), ".log", False, workers=1, max_file_size=1024), encoding="utf-8") as f:
+        result = f.read()
+    assert "ERROR text" in result
+    assert "\x00" not in result and "ERROR large" not in result
+    assert str(source / "dump.log") + "\tbinary" in result
+    assert str(source / "large.log") + "\tlarger than 1 KB" in result
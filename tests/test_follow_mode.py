@@ -0,0 +1,102 @@
+import os, sys, time, threading
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tools.search_files import search_files
+
+def wait_until(condition, seconds=5.0):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.05)
+
+def test_report_in_the_source_directory_is_not_followed(tmp_path):
+    (tmp_path / "app.log").write_text("start\nERROR one\n", encoding="utf-8")
+    cancel_event = threading.Event()
+    statuses = []
+    result = []
+    thread = threading.Thread(target=lambda: result.append(search_files.run_follow_report(
+        str(tmp_path), str(tmp_path), "error", False, status_callback=statuses.append, cancel_event=cancel_event
+    )))
+    thread.start()
+    try:
+        wait_until(lambda: statuses)
+        with open(tmp_path / "app.log", "a", encoding="utf-8") as f:
+            f.write("ERROR two\n")
+        wait_until(lambda: len(statuses) >= 2)
+        #the report got both matches, following it would find them again in every pass
+        time.sleep(3 * search_files.FOLLOW_POLL_SECONDS)
+    finally:
+        cancel_event.set()
+        thread.join()
+    result_file_path, match_count = result[0]
+    assert match_count == 2
+    assert os.path.dirname(result_file_path) == str(tmp_path)
+    assert statuses == ["1 new matches in app.log", "1 new matches in app.log"]
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+def test_only_complete_appended_lines_are_searched(tmp_path):
+    path = tmp_path / "app.log"
+    matcher = search_files.create_matcher(["ERROR"], True, False)
+    state = search_files.new_followed_file()
+    path.write_text("ERROR one\nok\nERROR unfinished", encoding="utf-8")
+    assert search_files.search_new_lines(str(path), state, matcher) == {"ERROR": [(1, 1)]}
+    assert search_files.search_new_lines(str(path), state, matcher) == {}
+    append(path, " line\r\nx ERROR three\r\n")
+    assert search_files.search_new_lines(str(path), state, matcher) == {"ERROR": [(3, 1), (4, 3)]}
+
+    #a truncated file and one rewritten behind the offset are searched from the start again
+    path.write_text("ERROR new\n", encoding="utf-8")
+    assert search_files.search_new_lines(str(path), state, matcher) == {"ERROR": [(1, 1)]}
+    path.write_text("ERROR NEW\nok\n", encoding="utf-8")
+    assert search_files.search_new_lines(str(path), state, matcher) == {"ERROR": [(1, 1)]}
+
+    #a rotated file is another inode
+    os.rename(path, tmp_path / "app.log.1")
+    path.write_text("ok\nok\nok\nok\nERROR rotated\n", encoding="utf-8")
+    assert search_files.search_new_lines(str(path), state, matcher) == {"ERROR": [(5, 1)]}
+
+def test_existing_lines_can_be_skipped(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("ERROR old\nERROR old\nERROR unfinished", encoding="utf-8")
+    matcher = search_files.create_matcher(["ERROR"], True, False)
+    state = search_files.new_followed_file()
+    search_files.skip_existing_lines(str(path), state)
+    assert (state["offset"], state["line"]) == (20, 2)
+    append(path, "\nERROR new\n")
+    assert search_files.search_new_lines(str(path), state, matcher) == {"ERROR": [(3, 1), (4, 1)]}
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_follow_search_reports_new_matches_as_they_are_written(tmp_path, use_inotify, monkeypatch):
+    monkeypatch.setattr(search_files, "FOLLOW_POLL_SECONDS", 0.1)
+    (tmp_path / "app.log").write_text("ERROR old\n", encoding="utf-8")
+    (tmp_path / "old.log").write_text("ERROR skipped\n", encoding="utf-8")
+    (tmp_path / "excluded.log").write_text("ERROR excluded\n", encoding="utf-8")
+    cancel_event = threading.Event()
+    reported = []
+    result = []
+    thread = threading.Thread(target=lambda: result.append(search_files.follow_search(
+        str(tmp_path), "ERROR\nwarn", False, lambda file, matches: reported.append((file, matches)),
+        skip_existing=True, cancel_event=cancel_event, exclude_patterns=["excluded.*"], use_inotify=use_inotify
+    )))
+    thread.start()
+    try:
+        #the existing lines are skipped, only what is written from now on is reported
+        time.sleep(0.3)
+        append(tmp_path / "app.log", "Warn ERROR new\n")
+        wait_until(lambda: reported)
+        (tmp_path / "new.log").write_text("error in a new file\n", encoding="utf-8")
+        append(tmp_path / "excluded.log", "ERROR excluded\n")
+        wait_until(lambda: len(reported) >= 2)
+        time.sleep(0.3)
+    finally:
+        cancel_event.set()
+        thread.join()
+    assert reported == [
+        ("app.log", [(2, 1, "warn"), (2, 6, "ERROR")]),
+        ("new.log", [(1, 1, "ERROR")])
+    ]
+    assert result == [3]
@@ -0,0 +1,129 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.ConcatenationManifest import TAIL_FINGERPRINT_SIZE, ConcatenationManifest
+from core.Instrumentation import RunStats
+from tools.concatenate_files.concatenate_files import SECTION_SEPARATOR, concatenate_incrementally
+
+def concatenate(files, result_file_path) -> dict:
+    """Run an incremental concatenation and return the number of sections per action."""
+    stats = RunStats(True)
+    concatenate_incrementally([str(file) for file in files], str(result_file_path), 1, False, None, None, None, stats)
+    return {name.split(".", 1)[1]: count for name, count in stats.counters.items() if name.startswith("sections.")}
+
+def read_sections(result_file_path) -> dict:
+    """Return {file: text} of the output, the "(continued)" sections of a file are joined to its first one."""
+    with open(result_file_path, encoding="utf-8") as f:
+        output = f.read()
+    assert output.startswith(SECTION_SEPARATOR) and output.endswith(SECTION_SEPARATOR)
+    texts = {}
+    for section in output.split(SECTION_SEPARATOR)[1:-1]:
+        header, _, text = section[1:].partition("\n\n")
+        file = header.removesuffix(":").removesuffix(" (continued)")
+        texts[file] = texts.get(file, "") + text[:-1]
+    return texts
+
+def check_output(files, result_file_path):
+    """The output holds every file once and the manifest's offsets point at its sections."""
+    assert read_sections(result_file_path) == {str(file): file.read_text(encoding="utf-8") for file in files}
+    manifest = ConcatenationManifest(str(result_file_path))
+    assert manifest.valid
+    assert sorted(manifest.files) == sorted(str(file) for file in files)
+    with open(result_file_path, "rb") as f:
+        output = f.read()
+    for file, entry in manifest.files.items():
+        assert entry["size"] == os.path.getsize(file)
+        for start, end in entry["sections"]:
+            assert output[start:end].startswith(b"\n" + file.encode())
+            assert output[start:end].endswith(SECTION_SEPARATOR.encode())
+
+def write(file, text):
+    """Write `text` and move the modification time on, so even a rewrite of the same size is noticed."""
+    old_mtime_ns = file.stat().st_mtime_ns if file.exists() else 0
+    file.write_text(text, encoding="utf-8")
+    os.utime(file, ns=(old_mtime_ns + 10**9, old_mtime_ns + 10**9))
+
+def create_files(tmp_path) -> list:
+    source = tmp_path / "source"
+    source.mkdir()
+    files = [source / name for name in ["a.log", "b.log", "c.log"]]
+    for file in files:
+        write(file, "".join(f"{file.name} line {number}\n" for number in range(20)))
+    return files
+
+def test_changed_files_update_their_sections(tmp_path):
+    files = create_files(tmp_path)
+    a, b, c = files
+    result_file_path = tmp_path / "result.txt"
+    assert concatenate(files, result_file_path) == {"full": 3}
+    check_output(files, result_file_path)
+    assert concatenate(files, result_file_path) == {"unchanged": 3}
+
+    #the file of the last section grows in place, the output is the same as a fresh one
+    write(c, c.read_text(encoding="utf-8") + "c.log appended\n")
+    assert concatenate(files, result_file_path) == {"unchanged": 2, "appended": 1}
+    check_output(files, result_file_path)
+    fresh_result_file_path = tmp_path / "fresh.txt"
+    concatenate(files, fresh_result_file_path)
+    assert result_file_path.read_bytes() == fresh_result_file_path.read_bytes()
+
+    #another grown file gets a "(continued)" section
+    write(a, a.read_text(encoding="utf-8") + "a.log appended\n")
+    assert concatenate(files, result_file_path) == {"unchanged": 2, "appended": 1}
+    assert "a.log (continued):" in result_file_path.read_text(encoding="utf-8")
+    check_output(files, result_file_path)
+
+    write(b, "b.log truncated\n")
+    assert concatenate(files, result_file_path) == {"unchanged": 2, "full": 1}
+    check_output(files, result_file_path)
+
+    #rewritten with the same size
+    write(c, c.read_text(encoding="utf-8").replace("line", "LINE"))
+    assert concatenate(files, result_file_path) == {"unchanged": 2, "full": 1}
+    check_output(files, result_file_path)
+
+    #only touched, the content is compared before a section is written again
+    write(c, c.read_text(encoding="utf-8"))
+    assert concatenate(files, result_file_path) == {"unchanged": 3}
+
+    d = a.parent / "d.log"
+    write(d, "d.log added\n")
+    os.remove(a)
+    files = [b, c, d]
+    assert concatenate(files, result_file_path) == {"unchanged": 2, "full": 1}
+    check_output(files, result_file_path)
+    assert "a.log" not in result_file_path.read_text(encoding="utf-8")
+
+def test_tail_fingerprint_decides_between_appending_and_rebuilding(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    file = source / "app.log"
+    lines = "".join(f"line {number:05}\n" for number in range(1000))
+    assert len(lines) > 2 * TAIL_FINGERPRINT_SIZE
+    write(file, lines)
+    result_file_path = tmp_path / "result.txt"
+    concatenate([file], result_file_path)
+
+    #a changed line within the old tail is found, the section is written again
+    changed_tail = lines[:-20] + lines[-20:].replace("line", "LINE") + "new line\n"
+    write(file, changed_tail)
+    assert concatenate([file], result_file_path) == {"full": 1}
+    check_output([file], result_file_path)
+
+    #only the tail is compared, a change in front of it is taken for an append (the bytes in front aren't read again)
+    write(file, "LINE" + changed_tail[4:] + "another line\n")
+    assert concatenate([file], result_file_path) == {"appended": 1}
+    assert read_sections(result_file_path) == {str(file): changed_tail + "another line\n"}
+
+    #the full CRC still tells a rewrite of the same length apart from a touched file
+    write(file, file.read_text(encoding="utf-8").replace("new", "NEW"))
+    assert concatenate([file], result_file_path) == {"full": 1}
+    check_output([file], result_file_path)
+
+def test_output_changed_behind_the_manifest_is_rebuilt(tmp_path):
+    files = create_files(tmp_path)
+    result_file_path = tmp_path / "result.txt"
+    concatenate(files, result_file_path)
+    with open(result_file_path, "a", encoding="utf-8") as f:
+        f.write("edited\n")
+    assert concatenate(files, result_file_path) == {"full": 3}
+    check_output(files, result_file_path)
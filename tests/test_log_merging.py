@@ -0,0 +1,31 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import LogMerging
+from core.LogMerging import TimestampParser, iter_records, merge_records
+
+FIRST = "2024-01-01 10:00:00 start\n" + "".join(f"  at frame {number}\n" for number in range(40)) + "2024-01-01 10:00:02 end\n"
+SECOND = "2024-01-01 10:00:00 other\n2024-01-01 10:00:01 middle\n" + "".join(f"  detail {number}\n" for number in range(30))
+WITHOUT_TIMESTAMPS = "".join(f"plain line {number}\n" for number in range(500))
+
+def chunks(text, size=7):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+def merge(texts) -> str:
+    written = []
+    merge_records([(iter_records(chunks(text), TimestampParser()), None) for text in texts], written.append)
+    return "".join(written)
+
+def test_record_without_timestamps_is_split_into_bounded_pieces(monkeypatch):
+    monkeypatch.setattr(LogMerging, "MAX_RECORD_SIZE", 100)
+    records = list(iter_records(chunks(WITHOUT_TIMESTAMPS), TimestampParser()))
+    assert len(records) > 1
+    assert all(key is None for key, _ in records)
+    assert all(sum(len(line) + 1 for line in lines) < 100 + len("plain line 499\n") for _, lines in records)
+    assert "".join(line + "\n" for _, lines in records for line in lines) == WITHOUT_TIMESTAMPS
+
+def test_split_records_merge_like_whole_ones(monkeypatch):
+    texts = [FIRST, SECOND, WITHOUT_TIMESTAMPS]
+    whole = merge(texts)
+    monkeypatch.setattr(LogMerging, "MAX_RECORD_SIZE", 50)
+    assert merge(texts) == whole
+    assert whole.startswith(WITHOUT_TIMESTAMPS + "2024-01-01 10:00:00 start\n  at frame 0\n")
@@ -0,0 +1,88 @@
+import os, sys, json
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import ToolError
+from tools.search_files import search_files
+
+def create_source(tmp_path) -> tuple:
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    (source / "a.log").write_text("".join(f"{number} ERROR timeout\n" for number in range(1, 51)), encoding="utf-8")
+    (source / "b.log").write_text("ok\nERROR disk\nERROR disk\n", encoding="utf-8")
+    (source / "c.log").write_text("nothing here\n", encoding="utf-8")
+    return source, target
+
+def search(source, target, **options) -> tuple:
+    """Search "ERROR" and "timeout" and return (records of the NDJSON result, match count)."""
+    result_file_path, match_count = search_files.run_search(
+        str(source), str(target), "ERROR\ntimeout", True, workers=2, use_processes=False,
+        output_format=search_files.OUTPUT_NDJSON, **options
+    )
+    with open(result_file_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    os.remove(result_file_path)
+    return records, match_count
+
+@pytest.fixture(params=["whole", "chunked"])
+def source(request, tmp_path, monkeypatch):
+    if request.param == "chunked":
+        #every file is memory-mapped and matched in pieces of a few lines
+        monkeypatch.setattr(search_files, "CHUNKED_SEARCH_THRESHOLD", 0)
+        monkeypatch.setattr(search_files, "CHUNK_SIZE", 32)
+    return create_source(tmp_path)
+
+def test_files_with_matches(source):
+    records, match_count = search(*source, query=search_files.QUERY_FILES)
+    assert sorted((record["term"], record["file"]) for record in records) == [
+        ("ERROR", "a.log"), ("ERROR", "b.log"), ("timeout", "a.log")
+    ]
+    assert all(set(record) == {"term", "file"} for record in records)
+    #every file counts once per term
+    assert match_count == 3
+
+def test_counts(source):
+    records, match_count = search(*source, query=search_files.QUERY_COUNT)
+    assert sorted((record["term"], record["file"], record["match_count"]) for record in records) == [
+        ("ERROR", "a.log", 50), ("ERROR", "b.log", 2), ("timeout", "a.log", 50)
+    ]
+    assert match_count == 102
+
+def test_max_matches_keeps_the_first_positions_per_file_and_term(source):
+    records, match_count = search(*source, max_matches=3)
+    positions = {}
+    for record in records:
+        positions.setdefault((record["term"], record["file"]), []).append((record["line"], record["column"]))
+    assert positions == {
+        ("ERROR", "a.log"): [(1, 3), (2, 3), (3, 3)],
+        ("ERROR", "b.log"): [(2, 1), (3, 1)],
+        ("timeout", "a.log"): [(1, 9), (2, 9), (3, 9)]
+    }
+    assert match_count == 8
+
+def test_text_report_of_the_modes(tmp_path):
+    source, target = create_source(tmp_path)
+    #the files are listed in directory order
+    result_file_path, _ = search_files.run_search(str(source), str(target), "ERROR", True, workers=1, use_processes=False, query=search_files.QUERY_FILES)
+    with open(result_file_path, encoding="utf-8") as f:
+        report = f.read()
+    assert "\n2 Files:\n" in report and "\n\ta.log\n" in report and "\n\tb.log\n" in report
+    result_file_path, _ = search_files.run_search(str(source), str(target), "ERROR", True, workers=1, use_processes=False, query=search_files.QUERY_COUNT)
+    with open(result_file_path, encoding="utf-8") as f:
+        report = f.read()
+    assert "\n52 Matches in 2 files:\n" in report and "\n\ta.log:\t50\n" in report and "\n\tb.log:\t2\n" in report
+    result_file_path, _ = search_files.run_search(str(source), str(target), "ERROR", True, workers=1, use_processes=False, max_matches=1)
+    with open(result_file_path, encoding="utf-8") as f:
+        report = f.read()
+    assert " Limit:\tfirst 1 matches per file and search term\n" in report
+    assert "\n2 Matches:\n" in report
+    assert "\na.log:\n\tLine 1, Column 3\n" in report and "\nb.log:\n\tLine 2, Column 1\n" in report
+
+def test_invalid_modes_are_rejected(tmp_path):
+    source, target = create_source(tmp_path)
+    with pytest.raises(ToolError):
+        search_files.run_search(str(source), str(target), "ERROR", True, max_matches=0)
+    with pytest.raises(ToolError):
+        search_files.run_search(str(source), str(target), "ERROR", True, query="lines")
+    with pytest.raises(SystemExit):
+        search_files.main([str(source), "-t", "ERROR", "-l", "--count"])
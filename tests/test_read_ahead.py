@@ -0,0 +1,54 @@
+import os, sys, time, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import map_in_order
+from core.ReadAhead import ReadAhead
+
+ITEM_SIZE = 100 * 1024
+BUDGET = 3 * ITEM_SIZE
+THREADS = 2
+
+class HeldBytes:
+    """The bytes read and not processed yet, the memory a read-ahead really holds."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def read(self, number) -> tuple:
+        data = bytes(ITEM_SIZE)
+        with self.lock:
+            self.current += len(data)
+            self.peak = max(self.peak, self.current)
+        return (number, data), len(data)
+
+    def done(self, data):
+        with self.lock:
+            self.current -= len(data)
+
+def process(item) -> int:
+    number, data = item
+    time.sleep(0.002)
+    return number
+
+def test_items_in_flight_count_against_the_budget():
+    held = HeldBytes()
+    pipeline = ReadAhead(range(60), held.read, BUDGET, THREADS, hold_results=True)
+    numbers = []
+    for (_, data), number in map_in_order(process, pipeline, workers=4, with_items=True, read_ahead=pipeline):
+        numbers.append(number)
+        held.done(data)
+    assert numbers == list(range(60))
+    #the budget is exceeded by at most one item per reader
+    assert held.peak <= BUDGET + THREADS * ITEM_SIZE
+    assert pipeline.summary()["max_buffered_bytes"] <= BUDGET + THREADS * ITEM_SIZE
+
+def test_serial_map_releases_every_item():
+    held = HeldBytes()
+    pipeline = ReadAhead(range(20), held.read, BUDGET, THREADS, hold_results=True)
+    numbers = []
+    for (_, data), number in map_in_order(process, pipeline, workers=1, with_items=True, read_ahead=pipeline):
+        numbers.append(number)
+        held.done(data)
+    assert numbers == list(range(20))
+    assert held.peak <= BUDGET + THREADS * ITEM_SIZE
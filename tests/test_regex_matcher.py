@@ -0,0 +1,36 @@
+import os, re, sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import RegexMatcher
+from core.Execution import ToolError
+from tools.search_files import search_files
+
+def matches(matcher, text) -> list:
+    return [(index, search_terms[0], text[index:end]) for index, search_terms, _, end in matcher.iter_matches(text)]
+
+def test_patterns_with_groups_match_like_one_alternation():
+    search_terms = [r"(?P<id>\d+)-x", r"(?P<id>[a-z]+)=(?P=id)", r"(ab)\1", "ab", "b+"]
+    text = "12-x abab ab=ab ab 7-y bb"
+    assert matches(RegexMatcher(search_terms, True), text) == [
+        (0, search_terms[0], "12-x"),
+        (5, search_terms[2], "abab"),
+        (10, search_terms[1], "ab=ab"),
+        (16, search_terms[3], "ab"),
+        (23, search_terms[4], "bb"),
+    ]
+
+def test_combined_patterns_find_the_same_matches_as_separate_ones():
+    text = "Ab ab aab baa ABA\nb a"
+    for case_sensitive in (True, False):
+        combined = matches(RegexMatcher(["a+b", "b", "ba"], case_sensitive), text)
+        #a group of its own runs the first pattern as a separate regex
+        separate = matches(RegexMatcher(["(a)+b", "b", "ba"], case_sensitive), text)
+        assert [(index, found) for index, _, found in combined] == [(index, found) for index, _, found in separate]
+
+def test_invalid_pattern_is_named_in_the_error():
+    with pytest.raises(re.error) as error:
+        RegexMatcher(["ok", "(unclosed", "fine"], True)
+    assert error.value.pattern == "(unclosed"
+    with pytest.raises(ToolError) as error:
+        search_files.create_matcher(["ok", "a{2,1}"], True, "regex")
+    assert "a{2,1}" in str(error.value) and "ok" not in str(error.value)
@@ -0,0 +1,39 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import TermMatcher, RegexMatcher, FuzzyMatcher
+from core.TermMatching import extract_snippets
+
+TEXT = "first line\naaaa connection refused by peer\nİİ Connection Refused\n"
+
+def find_snippets(matcher, text, context) -> dict:
+    lengths = {}
+    positions = matcher.find_positions(text, lengths=lengths)
+    return extract_snippets(text.splitlines(), positions, lengths, context)
+
+def test_term_longer_than_context_keeps_the_match_and_the_trailing_context():
+    snippets = find_snippets(TermMatcher(["connection refused"], True), TEXT, 5)
+    assert snippets == {"connection refused": ["aaaa connection refused by p"]}
+
+def test_prefix_terms_get_their_own_length():
+    snippets = find_snippets(TermMatcher(["conn", "connection refused"], True), TEXT, 2)
+    assert snippets == {"conn": ["a connec"], "connection refused": ["a connection refused b"]}
+
+def test_case_folding_that_changes_the_length_keeps_the_original_match():
+    snippets = find_snippets(TermMatcher(["connection refused"], False), TEXT, 3)
+    assert snippets["connection refused"][1] == "İİ Connection Refused"
+
+def test_regex_snippet_holds_the_whole_match():
+    snippets = find_snippets(RegexMatcher([r"refused \w+"], True), TEXT, 1)
+    assert snippets == {r"refused \w+": [" refused by "]}
+
+def test_fuzzy_snippet_holds_the_aligned_match():
+    snippets = find_snippets(FuzzyMatcher(["conection refused"], True, 1), TEXT, 2)
+    assert snippets == {"conection refused": ["a connection refused b"]}
+
+def test_chunked_search_reports_the_same_lengths():
+    matcher = TermMatcher(["connection refused", "line"], False)
+    lengths = {}
+    matcher.find_positions(TEXT, lengths=lengths)
+    chunk_lengths = {}
+    matcher.find_positions_in_chunks([TEXT[i:i + 7] for i in range(0, len(TEXT), 7)], lengths=chunk_lengths)
+    assert chunk_lengths == lengths
@@ -0,0 +1,31 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import TermMatcher
+from core import TermMatching
+
+TEXT = "abab ababab\nİİ ABAB ab abab\n\nba"
+SEARCH_TERMS = ["abab", "ab", "ba", "İ", "i̇"]
+
+def create_matchers(search_terms, case_sensitive, monkeypatch) -> tuple:
+    monkeypatch.setattr(TermMatching, "FIND_TERM_LIMIT", len(search_terms))
+    found = TermMatcher(search_terms, case_sensitive)
+    monkeypatch.setattr(TermMatching, "FIND_TERM_LIMIT", 0)
+    return found, TermMatcher(search_terms, case_sensitive)
+
+def test_few_terms_are_found_one_at_a_time_like_the_regex_finds_them(monkeypatch):
+    for case_sensitive in (True, False):
+        found, regex = create_matchers(SEARCH_TERMS, case_sensitive, monkeypatch)
+        for max_matches in (None, 1, 3):
+            found_lengths, regex_lengths = {}, {}
+            assert found.find_positions(TEXT, max_matches, found_lengths) == regex.find_positions(TEXT, max_matches, regex_lengths)
+            assert found_lengths == regex_lengths
+        chunks = [TEXT[start:start + 4] for start in range(0, len(TEXT), 4)]
+        assert found.find_positions_in_chunks(chunks) == regex.find_positions_in_chunks(chunks)
+        prepared_text = found.prepare_text(TEXT)
+        assert list(found.iter_matches(prepared_text, 1, 20)) == list(regex.iter_matches(prepared_text, 1, 20))
+
+def test_counts_include_overlapping_occurrences(monkeypatch):
+    found, regex = create_matchers(SEARCH_TERMS, False, monkeypatch)
+    assert found.count_matches(TEXT) == regex.count_matches(TEXT)
+    assert found.count_matches(TEXT)["abab"] == 5
+    assert found.count_matches(TEXT, files_only=True) == dict.fromkeys(SEARCH_TERMS, 1)
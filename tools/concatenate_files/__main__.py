@@ -0,0 +1,4 @@
+import sys
+from .concatenate_files import main
+
+sys.exit(main())
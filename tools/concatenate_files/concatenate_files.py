@@ -1,13 +1,40 @@
-import os, sys, ctypes, tkinter
-from tkinter import filedialog, messagebox, ttk
+import os, sys, ctypes, argparse, functools, itertools, bisect, zlib
 from time import gmtime, strftime
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from core import UI_COLORS
+from core import UI_COLORS, ToolError, BackgroundJob, map_in_order, default_worker_count
 from core import TextUtilities as TU
+from core.CommandLine import create_argument_parser, parse_size, read_multiline_argument, run_tool
+from core.DirectoryTraversal import SYMLINKS_FILES, SYMLINK_POLICIES, iter_files
+from core.Instrumentation import RunStats
+from core.FileScreening import SKIP_REASONS, SKIP_TOO_LARGE, FileScreen, format_size
+from core.CompressedFiles import READ_ERRORS, is_compressed, open_binary, stat_source
+from core.ConcatenationOutput import COMPRESSION_ZSTD, COMPRESSION_LEVELS, COMPRESSION_MODES, ConcatenationOutput, load_zstandard
+from core.ConcatenationManifest import TAIL_FINGERPRINT_SIZE, ConcatenationManifest, crc32_of_stream, read_tail
+from core.Deduplication import DuplicateIndex, find_size_collisions, hash_bytes, hash_stream
+from core.LogMerging import TimestampParser, get_merge_chunk_size, iter_file_records, merge_records
+from core.ReadAhead import DEFAULT_READ_AHEAD_THREADS, ReadAhead, read_file_bytes
+
+#tkinter is only imported by the GUI functions, so the command line starts without it (e.g. on servers without a display)
 
 LINE = "-" * 150
+SECTION_SEPARATOR = "#" * 150
+
+#files above this size are streamed into the result file instead of being read in one piece
+STREAMING_THRESHOLD = 16 * 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+#an incremental concatenation always updates the same result file, the manifest next to it remembers what it contains
+INCREMENTAL_RESULT_FILE_NAME = "Concatenated.txt"
+SECTION_UNCHANGED = "unchanged"
+SECTION_APPENDED = "appended"
+SECTION_FULL = "full"
+
+#the choice of the GUI's output menu without compression
+OUTPUT_UNCOMPRESSED = "uncompressed"
 
 def select_source_directory(source_entry, target_entry):
+    import tkinter
+    from tkinter import filedialog
     directory_path = filedialog.askdirectory()
     if directory_path:
         source_entry.delete(0, tkinter.END)
@@ -17,100 +44,812 @@ def select_source_directory(source_entry, target_entry):
             target_entry.insert(0, directory_path)
 
 def select_target_directory(target_entry):
+    import tkinter
+    from tkinter import filedialog
     directory_path = filedialog.askdirectory()
     if directory_path:
         target_entry.delete(0, tkinter.END)
         target_entry.insert(0, directory_path)
 
 def collect_valid_files_from_directory(directory, include_subdirs, file_extensions):
-    collected_files = []
-    if include_subdirs:
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                _, file_extension = os.path.splitext(file)
-                if file_extension.lower() in file_extensions:
-                    collected_files.append(os.path.join(root, file))
+    return list(iter_files(directory, file_extensions, max_depth=None if include_subdirs else 0))
+
+def read_small_text_file(task, screen=None, instrument=False) -> tuple:
+    """Read the file if it is not larger than STREAMING_THRESHOLD and return (text, skip_reason, digest, file_stats).
+
+    -`task` is (file, hash_content, prefetched). `text` is None for a larger file (or one that can't be read), it is
+     streamed instead. Compressed files and zip members are decompressed while they are read, the threshold then
+     applies to the decompressed bytes.
+    -`prefetched` is the (data, skip_reason) a read-ahead thread got for the file (see read_text_task_ahead()),
+     or None if the file still has to be read.
+    -`screen` (a FileScreen) checks the size and the first bytes before the file is read, `skip_reason` is why
+     it was skipped or None.
+    -With `hash_content` `digest` is the hash of the (decompressed) bytes, a larger file is hashed as a stream,
+     otherwise it is None.
+    -With `instrument` the time spent reading and decoding and the bytes read are returned as `file_stats`
+     for RunStats.merge(), otherwise it is None.
+    """
+    file, hash_content, prefetched = task
+    stats = RunStats(instrument)
+    digest = None
+    if prefetched is not None:
+        data, skip_reason = prefetched
+        if skip_reason is not None:
+            stats.count(f"skipped.{skip_reason}")
+            return None, skip_reason, None, stats.as_dict() if instrument else None
     else:
-        for file in os.listdir(directory):
-            path = os.path.join(directory, file)
-            if os.path.isfile(path):
-                _, file_extension = os.path.splitext(path)
-                if file_extension.lower() in file_extensions:
-                    collected_files.append(path)
-    return collected_files
-
-def start(source_directory_string, target_directory_string, file_extensions_string, include_subdirs, progress_bar):
-    if source_directory_string == "":
-        messagebox.showerror("Input error", "Source directory is empty")
+        with stats.stage("read"):
+            try:
+                f, size = open_binary(file)
+                with f:
+                    skip_reason = None if screen is None else screen.check(f, size)
+                    if skip_reason is not None:
+                        stats.count(f"skipped.{skip_reason}")
+                        return None, skip_reason, None, stats.as_dict() if instrument else None
+                    if is_compressed(file):
+                        data = f.read(STREAMING_THRESHOLD + 1)
+                        if len(data) > STREAMING_THRESHOLD:
+                            return None, None, hash_stream(f, data) if hash_content else None, None
+                    elif size > STREAMING_THRESHOLD:
+                        return None, None, hash_stream(f) if hash_content else None, None
+                    else:
+                        data = f.read()
+            except Exception:
+                return None, None, None, None
+    if hash_content:
+        with stats.stage("hash"):
+            digest = hash_bytes(data)
+    with stats.stage("decode"):
+        text, encoding = TU.decode_text_bytes(data)
+    stats.count_decoded_file(data, encoding)
+    return text, None, digest, stats.as_dict() if instrument else None
+
+def read_text_task_ahead(task, screen=None) -> tuple:
+    """Read the file of a task of read_small_text_file() on a ReadAhead thread and return (task, size), `size` is the number of bytes read.
+
+    -The returned task carries the (data, skip_reason). Files that are streamed or can't be read keep their task
+     unchanged, read_small_text_file() hashes or reports them as before.
+    """
+    file, hash_content, _ = task
+    data, skip_reason = read_file_bytes(file, screen, STREAMING_THRESHOLD)
+    if data is None and skip_reason is None:
+        return task, 0
+    return (file, hash_content, (data, skip_reason)), 0 if data is None else len(data)
+
+def read_incremental_section(task, screen=None) -> tuple:
+    """Compare a file with its manifest entry and read what an incremental concatenation has to write of it.
+
+    -`task` is (file, entry), `entry` is the file's manifest entry or None for a new file.
+    -Returns (action, entry, text, offset): the action is SECTION_UNCHANGED, SECTION_APPENDED (`text` holds only the
+     bytes appended since the last run) or SECTION_FULL, `entry` describes the file after this run.
+    -`text` is None if it is larger than STREAMING_THRESHOLD, it is streamed from byte `offset` on instead.
+    -Returns (None, None, None, 0) if the file can't be read and (skip reason, None, None, 0) if `screen`
+     (a FileScreen) skips it, the first bytes of appended lines are checked instead of the start of the file.
+    -Compressed files are handled by read_compressed_section().
+    """
+    file, entry = task
+    if is_compressed(file):
+        return read_compressed_section(file, entry, screen)
+    try:
+        stat = os.stat(file)
+        if screen is not None and screen.check_size(stat.st_size) is not None:
+            return SKIP_TOO_LARGE, None, None, 0
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return SECTION_UNCHANGED, entry, None, 0
+
+        with open(file, "rb") as f:
+            #a grown file whose old last bytes are unchanged was only appended to (e.g. a log file)
+            if entry is not None and entry["encoding"] and 0 < entry["size"] < stat.st_size:
+                old_tail = read_tail(f, entry["size"])
+                if zlib.crc32(old_tail) == entry["tail_crc32"]:
+                    skip_reason = None if screen is None else screen.check(f, stat.st_size)
+                    if skip_reason is not None:
+                        return skip_reason, None, None, 0
+                    section = read_appended_bytes(f, entry, old_tail, stat)
+                    if section is not None:
+                        return section
+                f.seek(0)
+            skip_reason = None if screen is None else screen.check(f, stat.st_size)
+            if skip_reason is not None:
+                return skip_reason, None, None, 0
+            return read_whole_file(f, entry, stat)
+    except OSError:
+        return None, None, None, 0
+
+def read_compressed_section(file, entry, screen=None) -> tuple:
+    """read_incremental_section() of a compressed file or zip member, which is read completely whenever its archive changed.
+
+    -Its entry records the size and modification time of the archive and the CRC-32 of the decompressed bytes,
+     so an archive that was only rewritten with the same content stays SECTION_UNCHANGED.
+    """
+    try:
+        stat = stat_source(file)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return SECTION_UNCHANGED, entry, None, 0
+
+        f, size = open_binary(file)
+        with f:
+            skip_reason = None if screen is None else screen.check(f, size)
+            if skip_reason is not None:
+                return skip_reason, None, None, 0
+            data = f.read(STREAMING_THRESHOLD + 1)
+            if len(data) > STREAMING_THRESHOLD:
+                crc = crc32_of_stream(f, None, zlib.crc32(data))
+                text, encoding = None, None
+            else:
+                crc = zlib.crc32(data)
+                text, encoding = TU.decode_text_bytes(data)
+    except READ_ERRORS:
+        return None, None, None, 0
+
+    if entry is not None and entry["crc32"] == crc:
+        return SECTION_UNCHANGED, dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns), None, 0
+
+    new_entry = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "crc32": crc,
+        "tail_crc32": None,
+        "encoding": encoding,
+        "sections": []
+    }
+    return SECTION_FULL, new_entry, text, 0
+
+def read_appended_bytes(f, entry, old_tail, stat) -> tuple:
+    """Read the bytes appended to the file `f` since `entry` was recorded, None if they aren't valid in its encoding."""
+    offset = entry["size"]
+    length = stat.st_size - offset
+    f.seek(offset)
+    if length > STREAMING_THRESHOLD:
+        crc = crc32_of_stream(f, length, entry["crc32"])
+        new_tail = read_tail(f, stat.st_size)
+        f.seek(offset)
+        data = f.read(1)
+    else:
+        data = f.read(length)
+        length = len(data)
+        crc = zlib.crc32(data, entry["crc32"])
+        new_tail = (old_tail + data)[-TAIL_FINGERPRINT_SIZE:]
+
+    #a "\r\n" split by the last run was already written as a line break
+    skip = 1 if old_tail.endswith(b"\r") and data.startswith(b"\n") else 0
+    text = None
+    if length <= STREAMING_THRESHOLD:
+        try:
+            text = data[skip:].decode(entry["encoding"])
+        except UnicodeDecodeError:
+            return None
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    new_entry = dict(entry, size=offset + length, mtime_ns=stat.st_mtime_ns, crc32=crc, tail_crc32=zlib.crc32(new_tail))
+    return SECTION_APPENDED, new_entry, text, offset + skip
+
+def read_whole_file(f, entry, stat) -> tuple:
+    """Read the file `f` for a new section, it is SECTION_UNCHANGED if only its modification time changed."""
+    if stat.st_size > STREAMING_THRESHOLD:
+        size = stat.st_size
+        crc = crc32_of_stream(f, size)
+        tail = read_tail(f, size)
+        text, encoding = None, None
+    else:
+        data = f.read(stat.st_size)
+        size = len(data)
+        crc = zlib.crc32(data)
+        tail = data[-TAIL_FINGERPRINT_SIZE:]
+        text, encoding = TU.decode_text_bytes(data)
+
+    if entry is not None and entry["size"] == size and entry["crc32"] == crc:
+        return SECTION_UNCHANGED, dict(entry, mtime_ns=stat.st_mtime_ns), None, 0
+
+    new_entry = {
+        "size": size,
+        "mtime_ns": stat.st_mtime_ns,
+        "crc32": crc,
+        "tail_crc32": zlib.crc32(tail),
+        "encoding": encoding,
+        "sections": []
+    }
+    return SECTION_FULL, new_entry, text, 0
+
+def write_section_text(f, file, entry, text, offset) -> bool:
+    """Write `text`, or stream the bytes of `file` from `offset` on up to the size in `entry` if it is None.
+
+    -A streamed file without an encoding in `entry` gets the one that worked, returns False if the copy failed.
+    -A compressed file is always streamed completely, the size in its entry is the size of the archive.
+    """
+    if text is not None:
+        f.write(text)
+        return True
+    encodings = [entry["encoding"]] if entry["encoding"] else None
+    length = None if is_compressed(file) else entry["size"] - offset
+    encoding = TU.copy_text_file(file, f, encodings=encodings, offset=offset, length=length)
+    if encoding is None:
+        return False
+    entry["encoding"] = encoding
+    return True
+
+def write_section(f, file, header, entry, text, offset) -> int:
+    """Write a whole section with write_section_text() and return where its closing separator starts.
+
+    -A section that failed is removed from `f` again and None is returned.
+    """
+    section_start = f.tell()
+    f.write("\n" + header + "\n\n")
+    if not write_section_text(f, file, entry, text, offset):
+        f.seek(section_start)
+        f.truncate()
+        return None
+    section_end = f.tell()
+    f.write("\n" + SECTION_SEPARATOR)
+    return section_end
+
+def concatenate_incrementally(files, result_file_path, workers, use_processes, progress_callback, status_callback, cancel_event, stats=None, screen=None) -> str:
+    """Bring the result file up to date with `files` and its manifest, then return its path.
+
+    -Unchanged files are only compared with their manifest entries, new and changed files get a section at the end
+     and the outdated sections of changed, unreadable and deleted files are cut out of the result file afterwards.
+    -Lines appended to the file of the last section extend that section in place, lines appended to another file
+     get a "(continued)" section, only the appended bytes are read in both cases.
+    -A cancelled run keeps what it has written, the manifest matches it and the next run picks up the rest.
+    -Files `screen` (a FileScreen) skips are left out like unreadable ones, the manifest lists them with the reason.
+    -`stats` (a RunStats) counts the sections by action and times the removal of outdated sections.
+    """
+    if stats is None:
+        stats = RunStats(False)
+    manifest = ConcatenationManifest(result_file_path)
+    if not manifest.valid:
+        manifest.reset()
+        with open(result_file_path, "w", encoding="utf-8") as f:
+            f.write(SECTION_SEPARATOR)
+    manifest.skipped = {}
+
+    sections = map_in_order(
+        read_incremental_section,
+        ((file, manifest.files.get(file)) for file in files),
+        workers=workers,
+        use_processes=use_processes,
+        progress_callback=progress_callback,
+        cancel_event=cancel_event,
+        with_items=True,
+        shared={"screen": screen}
+    )
+
+    removed_sections = []
+    seen_files = set()
+    last_section_path, last_section_end = manifest.last_section_path, manifest.last_section_end
+    written_count = 0
+    with open(result_file_path, "r+", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        f.seek(0, os.SEEK_END)
+
+        for (file, old_entry), (action, entry, text, offset) in sections:
+            seen_files.add(file)
+            if action in SKIP_REASONS:
+                stats.count(f"skipped.{action}")
+                manifest.skipped[file] = screen.describe(action)
+                if status_callback is not None:
+                    status_callback(f"{file} skipped ({manifest.skipped[file]})")
+                action = None
+            else:
+                stats.count(f"sections.{action or 'unreadable'}")
+            if action == SECTION_UNCHANGED:
+                manifest.files[file] = entry
+                continue
+            if action is None or action == SECTION_FULL:
+                if old_entry is not None:
+                    removed_sections.extend(old_entry["sections"])
+                    del manifest.files[file]
+                if action is None:
+                    continue
+
+            written_count += 1
+            if status_callback is not None:
+                status_callback(f"{written_count}: {file}")
+
+            if action == SECTION_APPENDED:
+                if file == last_section_path:
+                    #the closing separator is overwritten and written again behind the appended lines
+                    f.seek(last_section_end)
+                    f.truncate()
+                    appended = write_section_text(f, file, entry, text, offset)
+                    last_section_end = f.tell()
+                    f.write("\n" + SECTION_SEPARATOR)
+                    if appended:
+                        entry["sections"] = old_entry["sections"][:-1] + [[old_entry["sections"][-1][0], f.tell()]]
+                        manifest.files[file] = entry
+                        continue
+                else:
+                    section_start = f.tell()
+                    section_end = write_section(f, file, file + " (continued):", entry, text, offset)
+                    if section_end is not None:
+                        last_section_path, last_section_end = file, section_end
+                        entry["sections"] = old_entry["sections"] + [[section_start, f.tell()]]
+                        manifest.files[file] = entry
+                        continue
+
+                #the appended bytes aren't valid in the encoding of the file's start, the whole file is written again
+                removed_sections.extend(old_entry["sections"])
+                del manifest.files[file]
+                entry = dict(entry, encoding=None, sections=[])
+                text, offset = None, 0
+
+            section_start = f.tell()
+            section_end = write_section(f, file, file + ":", entry, text, offset)
+            if section_end is not None:
+                last_section_path, last_section_end = file, section_end
+                entry["sections"] = [[section_start, f.tell()]]
+                manifest.files[file] = entry
+
+        #files that weren't listed are deleted (or excluded now), unless the run was cancelled before it got to them
+        if cancel_event is None or not cancel_event.is_set():
+            for file in [file for file in manifest.files if file not in seen_files]:
+                removed_sections.extend(manifest.files.pop(file)["sections"])
+
+        f.seek(0, os.SEEK_END)
+        output_size = f.tell()
+
+    if removed_sections:
+        with stats.stage("remove_sections"):
+            output_size, last_section_end = remove_sections(result_file_path, removed_sections, manifest, last_section_end)
+    stats.count("files_written", written_count)
+    stats.count("bytes_written", output_size)
+
+    #the last section can only be extended in place while it is still the end of the result file
+    last_entry = manifest.files.get(last_section_path)
+    if last_entry is None or not last_entry["sections"] or last_entry["sections"][-1][1] != output_size:
+        last_section_path, last_section_end = None, None
+
+    manifest.save(output_size, last_section_path, last_section_end)
+    return result_file_path
+
+def remove_sections(path, sections, manifest, last_section_end) -> tuple:
+    """Cut the [start, end) byte ranges `sections` out of the file `path` and move the manifest's offsets accordingly.
+
+    -The remaining bytes are copied into a temporary file that replaces `path`.
+    -Returns (new size, moved `last_section_end`).
+    """
+    sections = sorted(sections)
+    temporary_path = path + ".tmp"
+    with open(path, "rb") as source, open(temporary_path, "wb") as target:
+        size = os.fstat(source.fileno()).st_size
+        position = 0
+        for start, end in sections + [[size, size]]:
+            source.seek(position)
+            remaining = start - position
+            while remaining > 0:
+                data = source.read(min(remaining, WRITE_BUFFER_SIZE))
+                if not data:
+                    break
+                target.write(data)
+                remaining -= len(data)
+            position = end
+        new_size = target.tell()
+    os.replace(temporary_path, path)
+
+    #every offset moves forward by the length of the removed sections in front of it
+    ends = [end for _, end in sections]
+    removed_in_front = list(itertools.accumulate((end - start for start, end in sections), initial=0))
+
+    def move(offset):
+        return offset - removed_in_front[bisect.bisect_right(ends, offset)]
+
+    for entry in manifest.files.values():
+        entry["sections"] = [[move(start), move(end)] for start, end in entry["sections"]]
+    if last_section_end is not None:
+        last_section_end = move(last_section_end)
+    return new_size, last_section_end
+
+def merge_files_by_timestamp(files, f, parser, source_directory, tag_sources, progress_callback, status_callback, cancel_event, stats, screen) -> tuple:
+    """Write the lines of all `files` into the open output `f` as one timeline, merged by their timestamps (see TimestampParser).
+
+    -Every file must already be sorted by time, like a log. They are read side by side in chunks and merged with a
+     heap (see merge_records()), so memory grows with the number of files instead of their size.
+    -A line without a timestamp (e.g. of a stack trace) stays behind the line before it.
+    -With `tag_sources` every line starts with the path of its file relative to `source_directory` in brackets.
+    -Files `screen` (a FileScreen) skips and files that can't be opened are left out.
+    -Returns (merged_count, skipped_files).
+    """
+    files = list(files)
+    chunk_size = get_merge_chunk_size(len(files))
+    sources = []
+    skipped_files = []
+    total_size = 0
+    for file in files:
+        try:
+            binary_file, size = open_binary(file)
+            with binary_file:
+                skip_reason = screen.check(binary_file, size)
+                sample = binary_file.read(TU.UTF8_SAMPLE_SIZE)
+        except READ_ERRORS:
+            stats.count("unreadable_files")
+            continue
+        if skip_reason is not None:
+            skipped_files.append((file, skip_reason))
+            stats.count(f"skipped.{skip_reason}")
+            if status_callback is not None:
+                status_callback(f"{file} skipped ({screen.describe(skip_reason)})")
+            continue
+        #the text is merged as it is decoded, so the encoding is chosen from the first bytes only
+        encoding = TU.get_encodings_to_try(sample)[0]
+        tag = f"[{os.path.relpath(file, source_directory)}] " if tag_sources else None
+        sources.append((iter_file_records(file, encoding, parser, chunk_size), tag))
+        total_size += size
+
+    if status_callback is not None:
+        status_callback(f"Merging {len(sources)} files by timestamp")
+    f.write(f"\nMerged by timestamp:\t{len(sources)} files\n\n")
+
+    #the progress is the merged text compared to the size of the files (compressed files count with their size on disk)
+    written_size = 0
+    def write(text):
+        nonlocal written_size
+        f.write(text)
+        written_size += len(text)
+        if progress_callback is not None:
+            progress_callback(min(written_size, total_size), total_size)
+
+    with stats.stage("merge"):
+        counts = merge_records(sources, write, cancel_event)
+    for name, count in counts.items():
+        stats.count(name, count)
+    f.write("\n" + SECTION_SEPARATOR)
+    return len(sources), skipped_files
+
+def start(source_directory_string, target_directory_string, file_extensions_string, include_subdirs, job, workers=None, use_processes=False, partial_result=False, incremental=False, compression=None, part_size_string="", deduplicate=False, merge_by_timestamp=False, source_tags=False):
+    """Run the concatenation as a BackgroundJob, the window stays responsive and the run can be cancelled.
+
+    -`part_size_string` is the size the result is split at (e.g. "500M"), empty for one result file.
+    """
+    from tkinter import messagebox
+
+    try:
+        part_size = parse_size(part_size_string) if part_size_string.strip() else None
+    except argparse.ArgumentTypeError as e:
+        messagebox.showerror("Input error", f"Split size: {e}")
         return
+
+    def on_finished(result_file_path, error):
+        if isinstance(error, ToolError):
+            messagebox.showerror(error.title, error.message)
+        elif error is not None:
+            messagebox.showerror("Error", f"The concatenation failed:\n{error}")
+        elif result_file_path is not None:
+            TU.open_in_notepad(result_file_path)
+
+    job.start(
+        on_finished,
+        run_concatenation,
+        source_directory_string,
+        target_directory_string,
+        file_extensions_string,
+        include_subdirs,
+        workers=workers,
+        use_processes=use_processes,
+        partial_result=partial_result,
+        incremental=incremental,
+        compression=compression,
+        part_size=part_size,
+        deduplicate=deduplicate,
+        merge_by_timestamp=merge_by_timestamp,
+        source_tags=source_tags
+    )
+
+def run_concatenation(source_directory_string, target_directory_string, file_extensions_string, include_subdirs, workers=None, use_processes=False, progress_callback=None, status_callback=None, cancel_event=None, partial_result=False, max_depth=None, exclude_patterns=(), symlinks=SYMLINKS_FILES, incremental=False, max_file_size=None, skip_binary=True, compressed=False, compression=None, compression_level=None, part_size=None, deduplicate=False, merge_by_timestamp=False, timestamp_pattern=None, timestamp_format=None, source_tags=False, read_ahead=None, read_ahead_threads=DEFAULT_READ_AHEAD_THREADS, instrument=False, profile=None) -> str:
+    """Concatenate the matching files of the source directory into a result file in the target directory and return its path.
+
+    -Shared by the GUI and the command line, invalid input raises ToolError for them to report.
+    -The directory tree is traversed lazily while the files are read, `max_depth` (with `include_subdirs`),
+     `exclude_patterns`, `symlinks` and `compressed` are passed on to iter_files(). Compressed files and zip
+     members ("archive.zip!member.log") are decompressed in the workers while they are read, nothing is unpacked to disk.
+    -`status_callback(status)` gets a line about every concatenated file.
+    -Files larger than `max_file_size` bytes and, with `skip_binary`, files that look binary are skipped before
+     they are read (see FileScreen), the result file ends with a list of them and the reasons.
+    -Once `cancel_event` is set no more files are added, the result file is only kept with `partial_result`
+     (ending with a note about the missing files), otherwise it is deleted and None is returned.
+    -With `incremental` the result file is always INCREMENTAL_RESULT_FILE_NAME and only brought up to date,
+     see concatenate_incrementally().
+    -`compression` (one of COMPRESSION_MODES, at `compression_level`) compresses the result while it is written and
+     `part_size` splits it into numbered parts of about that many bytes, an index file next to them then lists
+     the part and offset of every file, see ConcatenationOutput. The path of the first part is returned.
+    -With `deduplicate` the content of byte-identical files is only written once, a later copy gets a line naming
+     the first one. The files are listed first to find the ones of the same size, only those are hashed (as a
+     stream, in the workers while they are read), with a compressed file among them every file is hashed (see
+     find_size_collisions()). The result ends with the number of copies and the bytes saved.
+    -With `merge_by_timestamp` the result is one timeline of the lines of all files (which must be sorted by time
+     already), merged by the timestamp `timestamp_pattern` finds at the start of a line and parsed with the
+     strptime() `timestamp_format` (see TimestampParser), with `source_tags` every line names its file. See
+     merge_files_by_timestamp().
+    -With a `read_ahead` budget (bytes) `read_ahead_threads` threads read the upcoming files into memory while the
+     earlier ones are decoded and written, so the disk doesn't wait for the writing (see ReadAhead). The files not
+     written yet count against the budget as well. The summary gets the queue depth and the stall times. It doesn't apply to the incremental mode and the merge by
+     timestamp, which read the files in parts.
+    -With `instrument` (or a `profile` mode, see RunStats) the time per stage and counters like the bytes read and
+     written and the encoding fallbacks are written to "<result>.summary.json".
+    """
+    if source_directory_string == "":
+        raise ToolError("Input error", "Source directory is empty")
     if target_directory_string == "":
-        messagebox.showerror("Input error", "Target directory is empty")
-        return
+        raise ToolError("Input error", "Target directory is empty")
     if file_extensions_string == "":
-        messagebox.showerror("Input error", "No file extensions specified")
-        return
+        raise ToolError("Input error", "No file extensions specified")
     if not os.path.isdir(source_directory_string):
-        messagebox.showerror("Input error", f"Source directory doesn't exist:\n{source_directory_string}")
-        return
+        raise ToolError("Input error", f"Source directory doesn't exist:\n{source_directory_string}")
     if not os.path.isdir(target_directory_string):
-        messagebox.showerror("Input error", f"Target directory doesn't exist:\n{target_directory_string}")
-        return
+        raise ToolError("Input error", f"Target directory doesn't exist:\n{target_directory_string}")
 
     #each line in the “File extensions” field is split into a file extension
     file_extensions = TU.split_multiline_text_into_terms(file_extensions_string, starts_with='.')
     if len(file_extensions) == 0:
-        messagebox.showerror("File extensions", f"No valid file extensions specified\n(e.g. \".txt\", \".json\", \".py\"...)")
-        return
+        raise ToolError("File extensions", f"No valid file extensions specified\n(e.g. \".txt\", \".json\", \".py\"...)")
+
+    if incremental and (compression is not None or part_size is not None):
+        raise ToolError("Input error", f"The incremental mode keeps one uncompressed {INCREMENTAL_RESULT_FILE_NAME}, it can't be compressed or split")
+    if incremental and deduplicate:
+        raise ToolError("Input error", f"The incremental mode updates the section of every file in {INCREMENTAL_RESULT_FILE_NAME}, it can't deduplicate them")
+    if merge_by_timestamp and (incremental or deduplicate or part_size is not None):
+        raise ToolError("Input error", "The merge by timestamp writes the lines of all files as one timeline, it can't be combined with the incremental mode, deduplication or a split result")
+    if read_ahead is not None and (incremental or merge_by_timestamp):
+        raise ToolError("Input error", "The read-ahead reads whole files in advance, the incremental mode and the merge by timestamp read the files in parts")
+    if read_ahead is not None and read_ahead <= 0:
+        raise ToolError("Input error", "The read-ahead budget must be larger than 0")
+    if read_ahead_threads < 1:
+        raise ToolError("Input error", "The read-ahead needs at least one thread")
+    if merge_by_timestamp:
+        try:
+            timestamp_parser = TimestampParser(timestamp_pattern, timestamp_format)
+        except ValueError as e:
+            raise ToolError("Input error", str(e))
+    if compression is not None and compression not in COMPRESSION_MODES:
+        raise ToolError("Input error", f"Unknown compression: {compression}")
+    if compression is not None and compression_level is not None and compression_level not in COMPRESSION_LEVELS[compression]:
+        levels = COMPRESSION_LEVELS[compression]
+        raise ToolError("Input error", f"The {compression} compression level must be between {levels.start} and {levels.stop - 1}")
+    if compression == COMPRESSION_ZSTD and load_zstandard() is None:
+        raise ToolError("Output", "zstd compression needs the \"zstandard\" package:\npip install zstandard")
+    if part_size is not None and part_size <= 0:
+        raise ToolError("Input error", "The part size must be larger than 0")
+    #zstd compresses on its own threads, as many as there are workers
+    compression_threads = workers if workers is not None else default_worker_count()
 
-    #read valid files from directory
+    screen = FileScreen(max_file_size, skip_binary)
+    stats = RunStats(instrument, profile)
+
+    #list valid files lazily, the first one is taken right away to report an unreadable or empty directory
+    files = stats.timed_iter("enumeration", iter_files(
+        source_directory_string,
+        file_extensions,
+        max_depth=max_depth if include_subdirs else 0,
+        exclude_patterns=exclude_patterns,
+        symlinks=symlinks,
+        compressed=compressed
+    ))
     try:
-        files = collect_valid_files_from_directory(source_directory_string, include_subdirs, file_extensions)
+        first_file = next(files, None)
     except Exception as e:
-        messagebox.showerror("Error", f"Directory contents could not be read:\n{e}")
-        return
+        stats.stop_profiler()
+        raise ToolError("Error", f"Directory contents could not be read:\n{e}")
 
-    file_count = len(files)
+    if first_file is None:
+        stats.stop_profiler()
+        raise ToolError("Error", f"No files with the following file extensions found:\n{str(file_extensions)}")
 
-    if file_count == 0:
-        messagebox.showerror("Error", f"No files with the following file extensions found:\n{str(file_extensions)}")
-        return
+    #create result file, every section is written to it as soon as its file has been read
+    if incremental:
+        result_file_name = INCREMENTAL_RESULT_FILE_NAME
+    else:
+        result_file_name = "Result_" + strftime("%Y%m%d_%H_%M_%S", gmtime()) + ".txt"
+    result_file_path = os.path.join(target_directory_string, result_file_name)
 
-    last_progress = -1
+    #the traversal is still running when the result file (its parts, index and manifest) appears, it must not be concatenated into itself
+    result_file_stem = os.path.splitext(result_file_name)[0]
+    result_file_key = os.path.normcase(os.path.abspath(os.path.join(target_directory_string, result_file_stem)))
+    files = (
+        file for file in itertools.chain([first_file], files)
+        if not os.path.basename(file).startswith(result_file_stem) or not os.path.normcase(os.path.abspath(file)).startswith(result_file_key)
+    )
 
-    concatenated_text = "#" * 150
+    summary_fields = {
+        "tool": "concatenate_files",
+        "source_directory": source_directory_string,
+        "file_extensions": file_extensions,
+        "include_subdirs": include_subdirs,
+        "incremental": incremental,
+        "compression": compression,
+        "part_size": part_size,
+        "deduplicate": deduplicate,
+        "merge_by_timestamp": merge_by_timestamp,
+        "workers": workers,
+        "use_processes": use_processes
+    }
 
-    #go through every file in the directory
-    for index, file in enumerate(files, start=1):
-        #update progress bar
-        progress = int((index * 100) / file_count)
-        if progress != last_progress:
-            progress_bar["value"] = progress
-            progress_bar.update_idletasks()
-            last_progress = progress
+    if incremental:
+        concatenate_incrementally(files, result_file_path, workers, use_processes, progress_callback, status_callback, cancel_event, stats, screen)
+        stats.write_summary(result_file_path, **summary_fields, cancelled=cancel_event is not None and cancel_event.is_set())
+        return result_file_path
 
-        #read file
-        text = TU.read_text_file(file)
-        if text is None:
-            continue
+    if merge_by_timestamp:
+        with ConcatenationOutput(result_file_path, compression, compression_level, None, compression_threads, SECTION_SEPARATOR) as f:
+            merged_count, skipped_files = merge_files_by_timestamp(files, f, timestamp_parser, source_directory_string, source_tags, progress_callback, status_callback, cancel_event, stats, screen)
+            if skipped_files:
+                f.write(f"\nSkipped {screen.describe_counts(skipped_files)}:\n\n")
+                f.write("\n".join([f"{file}\t{screen.describe(reason)}" for file, reason in skipped_files]))
+                f.write("\n" + SECTION_SEPARATOR)
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if cancelled and partial_result:
+                f.write(f"\nCancelled:\tthe merge of {merged_count} files stopped early\n" + SECTION_SEPARATOR)
+            stats.count("files_concatenated", merged_count)
+        if cancelled and not partial_result:
+            f.remove()
+            stats.stop_profiler()
+            return None
+        stats.count("bytes_written", f.size)
+        stats.write_summary(result_file_path, **summary_fields, parts=len(f.paths), cancelled=cancelled)
+        return f.paths[0]
 
-        #Append file contents to entire text
-        concatenated_text += "\n" + file + ":\n\n"
-        concatenated_text += text + "\n"
-        concatenated_text += "#" * 150
+    #only files of the same size can be identical, just they are hashed
+    if deduplicate:
+        files = list(files)
+        with stats.stage("deduplication"):
+            same_size_files = find_size_collisions(files)
+        tasks = ((file, file in same_size_files, None) for file in files)
+    else:
+        tasks = ((file, False, None) for file in files)
+    duplicates = DuplicateIndex()
 
-    #reset progress bar
-    progress_bar["value"] = 0
+    #the read-ahead threads read the files in directory order, the workers only hash and decode their bytes
+    pipeline = None
+    if read_ahead is not None:
+        pipeline = ReadAhead(tasks, functools.partial(read_text_task_ahead, screen=screen), read_ahead, read_ahead_threads, cancel_event, hold_results=True)
+        tasks = pipeline
 
-    #create and open result file
-    result_file_name = "Result_" + strftime("%Y%m%d_%H_%M_%S", gmtime()) + ".txt"
-    result_file_path = os.path.join(target_directory_string, result_file_name)
+    #read the small files in parallel, the texts arrive in the same order as the files
+    texts = map_in_order(
+        read_small_text_file,
+        tasks,
+        workers=workers,
+        use_processes=use_processes,
+        progress_callback=progress_callback,
+        cancel_event=cancel_event,
+        with_items=True,
+        read_ahead=pipeline,
+        shared={"screen": screen, "instrument": stats.enabled}
+    )
+
+    concatenated_count = 0
+    skipped_files = []
+    with ConcatenationOutput(result_file_path, compression, compression_level, part_size, compression_threads, SECTION_SEPARATOR) as f:
+        #go through every file in the directory
+        for (file, *_), (text, skip_reason, digest, read_stats) in texts:
+            concatenated_count += 1
+            stats.merge(read_stats)
+            if skip_reason is not None:
+                skipped_files.append((file, skip_reason))
+                if status_callback is not None:
+                    status_callback(f"{concatenated_count}: {file} skipped ({screen.describe(skip_reason)})")
+                continue
+
+            original = duplicates.find_original(digest)
+            if original is not None:
+                if status_callback is not None:
+                    status_callback(f"{concatenated_count}: {file} identical to {original}")
+                with stats.stage("write"):
+                    f.start_section(file)
+                    f.write("\n" + file + ": identical to " + original + "\n")
+                    f.end_section()
+                    f.write(SECTION_SEPARATOR)
+                duplicates.add_duplicate(digest)
+                continue
+            if status_callback is not None:
+                status_callback(f"{concatenated_count}: {file}")
+
+            if text is not None:
+                with stats.stage("write"):
+                    f.start_section(file)
+                    f.write("\n" + file + ":\n\n")
+                    content_start = f.tell()
+                    f.write(text)
+                    duplicates.add(file, digest, f.tell() - content_start)
+                    f.end_section()
+                    f.write("\n" + SECTION_SEPARATOR)
+                continue
 
-    with open(result_file_path, "w", encoding="utf-8") as f:
-        f.write(concatenated_text)
+            #large (or unreadable) files are copied in chunks, a failed copy is removed again
+            with stats.stage("stream_copy"):
+                f.start_section(file, streamed=True)
+                section_start = f.tell()
+                f.write("\n" + file + ":\n\n")
+                content_start = f.tell()
+                if not TU.copy_text_file(file, f):
+                    f.seek(section_start)
+                    f.truncate()
+                    stats.count("unreadable_files")
+                    continue
+                duplicates.add(file, digest, f.tell() - content_start)
+                f.end_section()
+                f.write("\n" + SECTION_SEPARATOR)
+            stats.count("streamed_files")
 
-    TU.open_in_notepad(result_file_path)
+        if duplicates.duplicate_count:
+            f.write(f"\nIdentical files:\t{duplicates.duplicate_count} written as a reference to their first copy, {format_size(duplicates.saved_bytes)} saved\n" + SECTION_SEPARATOR)
+
+        if skipped_files:
+            f.write(f"\nSkipped {screen.describe_counts(skipped_files)}:\n\n")
+            f.write("\n".join([f"{file}\t{screen.describe(reason)}" for file, reason in skipped_files]))
+            f.write("\n" + SECTION_SEPARATOR)
+
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        if cancelled and partial_result:
+            f.write(f"\nCancelled:\t{concatenated_count} files concatenated\n" + SECTION_SEPARATOR)
+        stats.count("files_concatenated", concatenated_count - len(skipped_files))
+        stats.count("duplicate_files", duplicates.duplicate_count)
+        stats.count("duplicate_bytes_saved", duplicates.saved_bytes)
+
+    if cancelled and not partial_result:
+        f.remove()
+        stats.stop_profiler()
+        return None
+    stats.count("bytes_written", f.size)
+    stats.write_summary(result_file_path, **summary_fields, parts=len(f.paths), read_ahead=pipeline.summary() if pipeline is not None else None, cancelled=cancelled)
+    return f.paths[0]
+
+def main(argv=None) -> int:
+    """Command line entry point (`python -m tools.concatenate_files`), prints the path of the result file."""
+    parser = create_argument_parser(
+        "python -m tools.concatenate_files",
+        "Concatenate the text files of a directory into one result file.",
+        "exit codes: 0 success, 2 error"
+    )
+    parser.add_argument("-e", "--extension", action="append", dest="extensions", metavar="EXTENSION", help="file extension like \".txt\", can be repeated (default: one per line from stdin)")
+    parser.add_argument("-s", "--include-subdirs", action="store_true", help="also concatenate the files of all subdirectories")
+    parser.add_argument("--max-depth", type=int, help="with --include-subdirs: how many directory levels to descend (default: all)")
+    parser.add_argument("--incremental", action="store_true", help=f"update {INCREMENTAL_RESULT_FILE_NAME} in the target directory, only new, changed and appended-to files are read")
+    parser.add_argument("--compress", choices=COMPRESSION_MODES, help="compress the result while it is written (zstd needs the \"zstandard\" package)")
+    parser.add_argument("--level", type=int, help="with --compress: compression level (gzip 0-9, default 6, zstd 1-22, default 3)")
+    parser.add_argument("--split", type=parse_size, metavar="SIZE", help="split the result into numbered parts of about this size, e.g. 2G (a file's section is never split)")
+    parser.add_argument("--dedup", action="store_true", help="write the content of byte-identical files only once, later copies get a line naming the first one")
+    parser.add_argument("--merge", action="store_true", help="merge the lines of all files (each sorted by time, like logs) into one timeline by their timestamps")
+    parser.add_argument("--timestamp-pattern", metavar="REGEX", help="with --merge: regular expression of the timestamp at the start of a line, its first group if it has one (default: ISO 8601 like \"2024-01-31 12:00:00.123\")")
+    parser.add_argument("--timestamp-format", metavar="FORMAT", help="with --merge: strptime() format the timestamp is parsed with, e.g. \"%%d/%%b/%%Y:%%H:%%M:%%S\" (default: compared as text)")
+    parser.add_argument("--tag-sources", action="store_true", help="with --merge: start every line with its file in brackets")
+    parser.add_argument("--symlinks", choices=SYMLINK_POLICIES, default=SYMLINKS_FILES, help="skip links, include linked files only (default) or also follow linked directories")
+    args = parser.parse_args(argv)
+
+    exit_code, result_file_path = run_tool(
+        run_concatenation,
+        args.source,
+        args.target if args.target is not None else args.source,
+        read_multiline_argument(args.extensions),
+        args.include_subdirs,
+        workers=args.workers,
+        use_processes=args.use_processes,
+        max_depth=args.max_depth,
+        exclude_patterns=args.exclude or (),
+        symlinks=args.symlinks,
+        incremental=args.incremental,
+        max_file_size=args.max_size,
+        skip_binary=not args.include_binary,
+        compressed=args.compressed,
+        compression=args.compress,
+        compression_level=args.level,
+        part_size=args.split,
+        deduplicate=args.dedup,
+        merge_by_timestamp=args.merge,
+        timestamp_pattern=args.timestamp_pattern,
+        timestamp_format=args.timestamp_format,
+        source_tags=args.tag_sources,
+        read_ahead=args.read_ahead,
+        read_ahead_threads=args.read_ahead_threads,
+        instrument=args.stats,
+        profile=args.profile
+    )
+    if result_file_path is not None:
+        print(result_file_path)
+    return exit_code
 
 def initialize_ui():
+    import tkinter
+    from tkinter import ttk
+
     #create GUI window with tkinter
     GUI_window = tkinter.Tk()
     GUI_window.config(bg=UI_COLORS["background"])
@@ -197,6 +936,117 @@ def initialize_ui():
     )
     checkbox_include_subdirs.grid(row=2, column=1, sticky="W")
 
+    #checkbox partial result
+    partial_result_var = tkinter.BooleanVar(value=False)
+    checkbox_partial_result = tkinter.Checkbutton(
+        GUI_window,
+        text="Keep the partial result when cancelled",
+        onvalue=True,
+        offvalue=False,
+        variable=partial_result_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_partial_result.grid(row=3, column=1, sticky="W")
+
+    #checkbox incremental
+    incremental_var = tkinter.BooleanVar(value=False)
+    checkbox_incremental = tkinter.Checkbutton(
+        GUI_window,
+        text=f"Only update {INCREMENTAL_RESULT_FILE_NAME} with new and changed files",
+        onvalue=True,
+        offvalue=False,
+        variable=incremental_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_incremental.grid(row=4, column=1, sticky="W")
+
+    #checkbox deduplicate
+    deduplicate_var = tkinter.BooleanVar(value=False)
+    checkbox_deduplicate = tkinter.Checkbutton(
+        GUI_window,
+        text="Write identical files only once",
+        onvalue=True,
+        offvalue=False,
+        variable=deduplicate_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_deduplicate.grid(row=5, column=1, sticky="W")
+
+    #checkboxes merge by timestamp
+    frame_merge = tkinter.Frame(GUI_window, bg=UI_COLORS["background"])
+    frame_merge.grid(row=6, column=1, sticky="W")
+    merge_var = tkinter.BooleanVar(value=False)
+    checkbox_merge = tkinter.Checkbutton(
+        frame_merge,
+        text="Merge the lines of all files by timestamp",
+        onvalue=True,
+        offvalue=False,
+        variable=merge_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_merge.grid(row=0, column=0, sticky="W")
+    source_tags_var = tkinter.BooleanVar(value=False)
+    checkbox_source_tags = tkinter.Checkbutton(
+        frame_merge,
+        text="with their file in front",
+        onvalue=True,
+        offvalue=False,
+        variable=source_tags_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_source_tags.grid(row=0, column=1, sticky="W")
+
+    #label output options
+    label_output = tkinter.Label(
+        GUI_window,
+        text="Output:",
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_output.grid(row=7, column=0, padx=5, sticky="E")
+
+    #compression and split size of the result
+    frame_output = tkinter.Frame(GUI_window, bg=UI_COLORS["background"])
+    frame_output.grid(row=7, column=1, sticky="W")
+    compression_var = tkinter.StringVar(value=OUTPUT_UNCOMPRESSED)
+    option_compression = tkinter.OptionMenu(frame_output, compression_var, OUTPUT_UNCOMPRESSED, *COMPRESSION_MODES)
+    option_compression.config(
+        bg=UI_COLORS["button"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["button"],
+        highlightthickness=0
+    )
+    option_compression.grid(row=0, column=0, sticky="W")
+    label_split = tkinter.Label(
+        frame_output,
+        text="Split at (e.g. 2G):",
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_split.grid(row=0, column=1, padx=5)
+    entry_split = tkinter.Entry(
+        frame_output,
+        bg=UI_COLORS["input"],
+        fg=UI_COLORS["text"],
+        width=10
+    )
+    entry_split.grid(row=0, column=2)
+
     #label target directory
     label_target_directory = tkinter.Label(
         GUI_window,
@@ -204,7 +1054,7 @@ def initialize_ui():
         bg=UI_COLORS["background"],
         fg=UI_COLORS["text"]
     )
-    label_target_directory.grid(row=3, column=0, padx=5, sticky="E")
+    label_target_directory.grid(row=8, column=0, padx=5, sticky="E")
 
     #input target directory
     entry_target_directory = tkinter.Entry(
@@ -213,7 +1063,7 @@ def initialize_ui():
         fg=UI_COLORS["text"],
         width=50
     )
-    entry_target_directory.grid(row=3, column=1, sticky="EW")
+    entry_target_directory.grid(row=8, column=1, sticky="EW")
 
     #selct target directory button
     select_target_directory_button = tkinter.Button(
@@ -224,14 +1074,14 @@ def initialize_ui():
         width=10,
         command=lambda: select_target_directory(entry_target_directory)
     )
-    select_target_directory_button.grid(row=3, column=2, padx=5, pady=2)
+    select_target_directory_button.grid(row=8, column=2, padx=5, pady=2)
 
     #progress bar
     progress_bar_style = ttk.Style(GUI_window)
     progress_bar_style.theme_use("default")
     progress_bar_style.configure("Custom.Horizontal.TProgressbar", background="green", troughcolor=UI_COLORS["input"])
     tk_progress_bar = ttk.Progressbar(GUI_window, style="Custom.Horizontal.TProgressbar")
-    tk_progress_bar.grid(row=4, column=1, columnspan=1, sticky="EW")
+    tk_progress_bar.grid(row=9, column=1, columnspan=1, sticky="EW")
 
     #start button
     start_button = tkinter.Button(
@@ -245,10 +1095,42 @@ def initialize_ui():
             entry_target_directory.get(),
             entry_file_extensions.get("1.0", "end-1c"),
             include_subdirs_var.get(),
-            tk_progress_bar
+            job,
+            partial_result=partial_result_var.get(),
+            incremental=incremental_var.get(),
+            compression=None if compression_var.get() == OUTPUT_UNCOMPRESSED else compression_var.get(),
+            part_size_string=entry_split.get(),
+            deduplicate=deduplicate_var.get(),
+            merge_by_timestamp=merge_var.get(),
+            source_tags=source_tags_var.get()
         )
     )
-    start_button.grid(row=4, column=0, padx=5, pady=2, sticky="EW")
+    start_button.grid(row=9, column=0, padx=5, pady=2, sticky="EW")
+
+    #cancel button
+    cancel_button = tkinter.Button(
+        GUI_window,
+        text="Cancel",
+        bg=UI_COLORS["button"],
+        fg=UI_COLORS["text"],
+        width=10,
+        command=lambda: job.cancel()
+    )
+    cancel_button.grid(row=9, column=2, padx=5, pady=2)
+
+    #status of the running concatenation
+    label_status = tkinter.Label(
+        GUI_window,
+        text="",
+        anchor="w",
+        width=50,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_status.grid(row=10, column=1, sticky="EW")
+
+    #the files are concatenated on a worker thread, the window keeps handling events meanwhile
+    job = BackgroundJob(tk_progress_bar, label_status, start_button, cancel_button)
 
     return GUI_window
 
@@ -0,0 +1,4 @@
+import sys
+from .search_files import main
+
+sys.exit(main())
@@ -1,13 +1,56 @@
-import os, sys, ctypes, tkinter
-from tkinter import filedialog, messagebox, ttk
+import os, re, csv, sys, json, ctypes, functools, itertools, sqlite3
 from time import gmtime, strftime
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from core import UI_COLORS
+from core import UI_COLORS, TermMatcher, RegexMatcher, FuzzyMatcher, ToolError, BackgroundJob, map_in_order
+from core.TermMatching import extract_snippets, iter_lines
 from core import TextUtilities as TU
+from core.ContentIndex import ContentIndex, extract_trigrams
+from core.MatchStore import MatchStore
+from core.DirectoryTraversal import iter_files, get_extension, compile_exclude_patterns
+from core.FileWatcher import DirectoryWatcher
+from core.Instrumentation import RunStats
+from core.FileScreening import FileScreen
+from core.CompressedFiles import READ_ERRORS, is_compressed, open_binary, get_base_name, stat_source
+from core.ReadAhead import DEFAULT_READ_AHEAD_THREADS, ReadAhead, read_file_bytes
+from core.CommandLine import EXIT_SUCCESS, EXIT_NOTHING_FOUND, create_argument_parser, read_multiline_argument, run_tool
+
+#tkinter is only imported by the GUI functions, so the command line starts without it (e.g. on servers without a display)
 
 LINE = "-" * 150
+SEARCH_FILE_EXTENSIONS = frozenset([".txt", ".csv", ".log", ".md", ".rtf"])
+
+#files above this size are memory-mapped and searched in chunks of CHUNK_SIZE bytes instead of being decoded in one piece
+CHUNKED_SEARCH_THRESHOLD = 64 * 1024 * 1024
+CHUNK_SIZE = 4 * 1024 * 1024
+
+#the report lines of this many positions are joined and written at once
+REPORT_WRITE_BLOCK = 64 * 1024
+
+#formats of the search result: the text report, a JSON object per match (one per line), a CSV row per match,
+#or a JSON summary of the match counts per search term and file
+OUTPUT_TEXT = "text"
+OUTPUT_NDJSON = "ndjson"
+OUTPUT_CSV = "csv"
+OUTPUT_JSON = "json"
+OUTPUT_FORMATS = (OUTPUT_TEXT, OUTPUT_NDJSON, OUTPUT_CSV, OUTPUT_JSON)
+OUTPUT_EXTENSIONS = {OUTPUT_TEXT: ".txt", OUTPUT_NDJSON: ".ndjson", OUTPUT_CSV: ".csv", OUTPUT_JSON: ".json"}
+
+#what is collected per file and search term: every match position, only the number of matches, or only whether the
+#term occurs (the file is then only read until every search term occurred)
+QUERY_MATCHES = "matches"
+QUERY_COUNT = "count"
+QUERY_FILES = "files"
+QUERY_MODES = (QUERY_MATCHES, QUERY_COUNT, QUERY_FILES)
+
+#follow mode: inotify waits are interrupted this often to check for Cancel, without inotify every file is checked this often
+FOLLOW_WAIT_SECONDS = 0.5
+FOLLOW_POLL_SECONDS = 1.0
+#the last bytes searched in a followed file, if they changed the file was rewritten and is searched from the start
+FOLLOW_FINGERPRINT_SIZE = 64
 
 def select_source_directory(source_entry, target_entry):
+    import tkinter
+    from tkinter import filedialog
     directory_path = filedialog.askdirectory()
     if directory_path:
         source_entry.delete(0, tkinter.END)
@@ -17,151 +60,898 @@ def select_source_directory(source_entry, target_entry):
             target_entry.insert(0, directory_path)
 
 def select_target_directory(target_entry):
+    import tkinter
+    from tkinter import filedialog
     directory_path = filedialog.askdirectory()
     if directory_path:
         target_entry.delete(0, tkinter.END)
         target_entry.insert(0, directory_path)
 
-def find_occurrences(text, search_term, case_sensitive):
-    text_to_search = text if case_sensitive else text.lower()
-    search_term_to_find = search_term if case_sensitive else search_term.lower()
+def search_file(task, matcher, screen=None, context=0, query=QUERY_MATCHES, max_matches=None, instrument=False):
+    """Read one file and return (positions, trigrams, skip_reason, snippets, file_stats).
 
-    positions = []
-    for line_num, line in enumerate(text_to_search.splitlines(), start=1):
-        start = 0
-        while True:
-            idx = line.find(search_term_to_find, start)
-            if idx == -1:
+    -`task` is (full_path, tokenize, prefetched), `positions` is {search_term: [(line, column), ...]} or None if the file can't be read.
+    -`prefetched` is the (data, skip_reason) a read-ahead thread got for the file (see read_search_task_ahead()),
+     or None if the file still has to be read.
+    -With `max_matches` only the first `max_matches` positions per search term are found, the search of the file
+     stops once every term has them. With `query` QUERY_COUNT `positions` is {search_term: match_count} instead,
+     with QUERY_FILES every count is 1 and the search stops once every term occurred (see Matcher.count_matches()).
+    -The trigrams for the content index are only extracted if `tokenize` is set, otherwise they are None.
+    -`screen` (a FileScreen) checks the size and the first bytes before the file is read, a skipped file returns
+     (None, None, skip_reason, None, file_stats) and stays out of the index, so it is checked again next time.
+    -With `context` the snippets ({search_term: [snippet, ...]}, see extract_snippets()) of `context` characters on
+     either side of every match are returned as well, otherwise they are None.
+    -Files larger than CHUNKED_SEARCH_THRESHOLD are searched chunk by chunk. Compressed files and zip members
+     are decompressed while they are read, up to CHUNKED_SEARCH_THRESHOLD decompressed bytes are read at once.
+    -With `instrument` the time spent reading, decoding and matching and the bytes read are returned as
+     `file_stats` for RunStats.merge(), otherwise it is None.
+    -Runs inside the worker pool, so it must stay a picklable module level function.
+    """
+    full_path, tokenize, prefetched = task
+    stats = RunStats(instrument)
+    skip_reason = None
+    if prefetched is not None:
+        data, skip_reason = prefetched
+    else:
+        with stats.stage("read"):
+            try:
+                f, size = open_binary(full_path)
+                with f:
+                    if screen is not None:
+                        skip_reason = screen.check(f, size)
+                    if skip_reason is not None:
+                        data = None
+                    elif is_compressed(full_path):
+                        #the decompressed size isn't known in advance
+                        data = f.read(CHUNKED_SEARCH_THRESHOLD + 1)
+                        if len(data) > CHUNKED_SEARCH_THRESHOLD:
+                            data = None
+                    else:
+                        data = f.read() if size <= CHUNKED_SEARCH_THRESHOLD else None
+            except Exception:
+                stats.count("unreadable_files")
+                return None, set() if tokenize else None, None, None, stats.as_dict() if instrument else None
+
+    if skip_reason is not None:
+        stats.count(f"skipped.{skip_reason}")
+        return None, None, skip_reason, None, stats.as_dict() if instrument else None
+
+    if data is None:
+        with stats.stage("chunked_search"):
+            positions, trigrams, snippets = search_file_in_chunks(full_path, matcher, tokenize, context, query, max_matches)
+        stats.count("bytes_read", size)
+        stats.count("chunked_files")
+        return positions, trigrams, None, snippets, stats.as_dict() if instrument else None
+
+    with stats.stage("decode"):
+        text, encoding = TU.decode_text_bytes(data)
+    stats.count_decoded_file(data, encoding)
+    #the snippets need the length of every match
+    lengths = {} if context and query == QUERY_MATCHES else None
+    with stats.stage("match"):
+        if query == QUERY_MATCHES:
+            positions = matcher.find_positions(text, max_matches, lengths)
+        else:
+            positions = matcher.count_matches(text, query == QUERY_FILES)
+    snippets = None
+    if context and positions and query == QUERY_MATCHES:
+        with stats.stage("context"):
+            snippets = extract_snippets(text.splitlines(), positions, lengths, context)
+    trigrams = None
+    if tokenize:
+        with stats.stage("tokenize"):
+            trigrams = extract_trigrams(text)
+    return positions, trigrams, None, snippets, stats.as_dict() if instrument else None
+
+def read_search_task_ahead(task, screen=None) -> tuple:
+    """Read the file of a search task on a ReadAhead thread and return (task, size), `size` is the number of bytes read.
+
+    -The returned task carries the (data, skip_reason) for search_file(). Files that are searched in chunks or
+     can't be read keep their task unchanged, search_file() reads them itself.
+    """
+    full_path, tokenize, _ = task
+    data, skip_reason = read_file_bytes(full_path, screen, CHUNKED_SEARCH_THRESHOLD)
+    if data is None and skip_reason is None:
+        return task, 0
+    return (full_path, tokenize, (data, skip_reason)), 0 if data is None else len(data)
+
+def search_file_in_chunks(full_path, matcher, tokenize, context=0, query=QUERY_MATCHES, max_matches=None):
+    """Search a memory-mapped file in chunks, memory use depends on the chunk size instead of the file size.
+
+    -Returns (positions, trigrams, snippets), the positions are the same as searching the whole decoded text.
+    -If the file turns out not to be valid in the detected encoding, the search starts over with the next one.
+     A search that stops early (see search_file()) only checks the encoding of the part it read.
+    -The snippets of the matches (with `context`) are taken from a second pass over the file.
+    """
+    sample = TU.read_file_sample(full_path)
+    if sample is not None:
+        for encoding in TU.get_encodings_to_try(sample):
+            trigrams = set() if tokenize else None
+            chunks = TU.iter_text_chunks(full_path, encoding, CHUNK_SIZE)
+            if tokenize:
+                chunks = tokenize_chunks(chunks, trigrams)
+            try:
+                lengths = {} if context and query == QUERY_MATCHES else None
+                if query == QUERY_MATCHES:
+                    positions = matcher.find_positions_in_chunks(chunks, max_matches, lengths)
+                else:
+                    positions = matcher.count_matches_in_chunks(chunks, query == QUERY_FILES)
+                if tokenize:
+                    #the index needs the trigrams of the whole file, also if the search stopped early
+                    for _ in chunks:
+                        pass
+                snippets = None
+                if context and positions and query == QUERY_MATCHES:
+                    snippets = extract_snippets(iter_lines(TU.iter_text_chunks(full_path, encoding, CHUNK_SIZE)), positions, lengths, context)
+                return positions, trigrams, snippets
+            except UnicodeDecodeError:
+                continue
+            except READ_ERRORS:
                 break
-            positions.append((line_num, idx + 1))
-            start = idx + 1
-    return positions
+    return None, set() if tokenize else None, None
+
+def tokenize_chunks(chunks, trigrams):
+    """Pass `chunks` through while adding their trigrams (including the ones across chunk borders) to `trigrams`."""
+    tail = ""
+    for chunk in chunks:
+        trigrams.update(extract_trigrams(tail + chunk))
+        tail = chunk[-2:]
+        yield chunk
+
+def create_matcher(search_terms, case_sensitive, use_regex, max_distance=0):
+    """Compile the search terms into one matcher, an invalid regular expression raises ToolError.
 
-def add_positions_to_results(results, search_term, file, positions):
+    -With a `max_distance` above 0 the terms are matched approximately (FuzzyMatcher), a term that isn't longer
+     than the distance raises ToolError.
     """
-    dictionary of dictionaries of list of tuples (lol)
-    results = {
-        "search_term": {
-            "file": [(line, column), (line, column),...]
-        }
-    }
+    try:
+        if max_distance > 0:
+            return FuzzyMatcher(search_terms, case_sensitive, max_distance)
+        return RegexMatcher(search_terms, case_sensitive) if use_regex else TermMatcher(search_terms, case_sensitive)
+    except re.error as e:
+        raise ToolError("Search terms", f"Invalid regular expression:\n{e.pattern}\n\n{e}")
+    except ValueError as e:
+        raise ToolError("Search terms", f"Search term too short for a fuzzy search:\n{e}")
+
+def start_search(source_directory_string, target_directory_string, search_terms_string, case_sensitive, job, workers=None, use_processes=True, use_index=False, use_regex=False, partial_report=False, follow=False, output_format=OUTPUT_TEXT, context_string="", query=QUERY_MATCHES, max_matches_string="", max_distance_string=""):
+    """Run the search as a BackgroundJob, the window stays responsive and the search can be cancelled.
+
+    -With `follow` the directory is followed (run_follow_report()) until Cancel is pressed, then the report is opened.
+    -`context_string` is the number of context characters around every match from the input field, empty for none,
+     `max_matches_string` the number of matches per file and search term, empty for all, `max_distance_string`
+     the number of edits per match of a fuzzy search, empty for exact matches.
     """
+    from tkinter import messagebox
 
-    if search_term not in results:
-        results[search_term] = {}
+    def on_finished(result, error):
+        if isinstance(error, ToolError):
+            messagebox.showerror(error.title, error.message)
+        elif error is not None:
+            messagebox.showerror("Error", f"The search failed:\n{error}")
+        elif result[0] is not None:
+            TU.open_in_notepad(result[0])
 
-    if len(positions) == 0:
-        return results
+    try:
+        context = int(context_string) if context_string.strip() else 0
+    except ValueError:
+        messagebox.showerror("Input error", f"Context is not a number:\n{context_string}")
+        return
+    try:
+        max_matches = int(max_matches_string) if max_matches_string.strip() else None
+    except ValueError:
+        messagebox.showerror("Input error", f"Max matches is not a number:\n{max_matches_string}")
+        return
+    try:
+        max_distance = int(max_distance_string) if max_distance_string.strip() else 0
+    except ValueError:
+        messagebox.showerror("Input error", f"Max edits is not a number:\n{max_distance_string}")
+        return
 
-    if file not in results[search_term]:
-        results[search_term][file] = []
+    if follow:
+        job.start(
+            on_finished,
+            run_follow_report,
+            source_directory_string,
+            target_directory_string,
+            search_terms_string,
+            case_sensitive,
+            use_regex=use_regex
+        )
+        return
 
-    for position in positions:
-        results[search_term][file].append(position)
+    job.start(
+        on_finished,
+        run_search,
+        source_directory_string,
+        target_directory_string,
+        search_terms_string,
+        case_sensitive,
+        workers=workers,
+        use_processes=use_processes,
+        use_index=use_index,
+        use_regex=use_regex,
+        partial_report=partial_report,
+        output_format=output_format,
+        context=context,
+        query=query,
+        max_matches=max_matches,
+        max_distance=max_distance
+    )
 
-    return results
+def run_search(source_directory_string, target_directory_string, search_terms_string, case_sensitive, workers=None, use_processes=True, use_index=False, use_regex=False, progress_callback=None, status_callback=None, cancel_event=None, partial_report=False, exclude_patterns=(), max_file_size=None, skip_binary=True, compressed=False, output_format=OUTPUT_TEXT, context=0, query=QUERY_MATCHES, max_matches=None, max_distance=0, read_ahead=None, read_ahead_threads=DEFAULT_READ_AHEAD_THREADS, instrument=False, profile=None) -> tuple:
+    """Search the files of the source directory, write the report into the target directory and return (result_file_path, match_count).
 
-def start_search(source_directory_string, target_directory_string, search_terms_string, case_sensitive, progress_bar):
+    -Shared by the GUI and the command line, invalid input raises ToolError for them to report.
+    -Without the index the directory is listed lazily while the files are searched, files matching one of
+     the `exclude_patterns` globs are left out.
+    -With `compressed` ".gz", ".bz2" and ".xz" files (e.g. "app.log.gz") and the members of ".zip" archives
+     (reported as "archive.zip!member.log") are searched as well, they are decompressed in the workers while being read.
+    -`status_callback(status)` gets a line about every searched file.
+    -Files larger than `max_file_size` bytes and, with `skip_binary`, files that look binary are skipped before
+     they are read (see FileScreen), the report counts them and lists them with the reason at the end.
+    -Once `cancel_event` is set no more files are searched, the report then only covers the files searched so far
+     and is only written with `partial_report`, otherwise (None, 0) is returned.
+    -`output_format` (one of OUTPUT_FORMATS) selects the text report or a machine-readable result, all of them are
+     streamed from the same MatchStore (see write_report(), write_ndjson(), write_csv() and write_json_summary()).
+    -With `context` every match gets a snippet of the match and up to `context` characters of its line on either
+     side (the JSON summary only holds the counts).
+    -`query` (one of QUERY_MODES) collects every match position, only the match counts (QUERY_COUNT) or only the
+     files that contain a search term (QUERY_FILES), `max_matches` limits the positions per file and search term.
+     Files stop being searched as soon as the answer is known, the counts skip the line and column bookkeeping.
+    -With a `max_distance` above 0 the search terms also match with up to that many edits (see FuzzyMatcher),
+     every match is reported with its distance. The index can't narrow such a search down.
+    -With a `read_ahead` budget (bytes) `read_ahead_threads` threads read the upcoming files into memory while the
+     workers search the earlier ones, so the disk and the CPUs are busy at the same time (see ReadAhead). The
+     workers then only decode and search, the files they haven't finished count against the budget as well. The
+     summary gets the queue depth and the stall times.
+    -With `instrument` (or a `profile` mode, see RunStats) the time per stage and counters like the bytes read,
+     encoding fallbacks and matches are written to "<report>.summary.json".
+    """
     if source_directory_string == "":
-        messagebox.showerror("Input error", "Source directory is empty")
-        return
+        raise ToolError("Input error", "Source directory is empty")
     if target_directory_string == "":
-        messagebox.showerror("Input error", "Target directory is empty")
-        return
+        raise ToolError("Input error", "Target directory is empty")
     if search_terms_string == "":
-        messagebox.showerror("Input error", "No search terms specified")
-        return
+        raise ToolError("Input error", "No search terms specified")
     if not os.path.isdir(source_directory_string):
-        messagebox.showerror("Input error", f"Source directory doesn't exist:\n{source_directory_string}")
-        return
+        raise ToolError("Input error", f"Source directory doesn't exist:\n{source_directory_string}")
     if not os.path.isdir(target_directory_string):
-        messagebox.showerror("Input error", f"Target directory doesn't exist:\n{target_directory_string}")
-        return
-
-    results = {}
+        raise ToolError("Input error", f"Target directory doesn't exist:\n{target_directory_string}")
+    if output_format not in OUTPUT_FORMATS:
+        raise ToolError("Input error", f"Unknown output format: {output_format}")
+    if context < 0:
+        raise ToolError("Input error", "Context can't be negative")
+    if query not in QUERY_MODES:
+        raise ToolError("Input error", f"Unknown query mode: {query}")
+    if max_matches is not None and max_matches < 1:
+        raise ToolError("Input error", "Max matches must be at least 1")
+    if max_distance < 0:
+        raise ToolError("Input error", "Max edits can't be negative")
+    if max_distance > 0 and use_regex:
+        raise ToolError("Input error", "Regular expressions can't be matched fuzzily")
+    if read_ahead is not None and read_ahead <= 0:
+        raise ToolError("Input error", "The read-ahead budget must be larger than 0")
+    if read_ahead_threads < 1:
+        raise ToolError("Input error", "The read-ahead needs at least one thread")
 
     #each line in the “Search terms” field becomes a search term.
     search_terms = TU.split_multiline_text_into_terms(search_terms_string)
 
-    #attempt to read directory
+    #all search terms are compiled once and matched in a single pass per file
+    matcher = create_matcher(search_terms, case_sensitive, use_regex, max_distance)
+
+    screen = FileScreen(max_file_size, skip_binary)
+    stats = RunStats(instrument, profile)
+
+    #skip directories and files that don't end with ".txt", ".csv", ".log", ".md" or ".rtf",
+    #the first file is taken right away to report an unreadable directory
+    paths = stats.timed_iter("enumeration", iter_files(source_directory_string, SEARCH_FILE_EXTENSIONS, max_depth=0, exclude_patterns=exclude_patterns, compressed=compressed))
     try:
-        files = os.listdir(source_directory_string)
-        file_count = len(files)
+        first_path = next(paths, None)
     except Exception as e:
-        messagebox.showerror("Error", f"Directory contents could not be read:\n{e}")
-        return
+        stats.stop_profiler()
+        raise ToolError("Error", f"Directory contents could not be read:\n{e}")
+    files = [] if first_path is None else (get_base_name(path) for path in itertools.chain([first_path], paths))
+
+    #every search term gets an entry in the report, even if no file has to be read
+    reported_terms = search_terms if first_path is not None else []
+
+    #the content index only lets candidate files through, new and changed files are read and indexed again
+    index = None
+    stale_files = set()
+    if use_index:
+        files = list(files)
+        with stats.stage("index"):
+            try:
+                index = ContentIndex.for_directory(source_directory_string)
+                file_stats = {}
+                for file in files:
+                    stat = stat_source(os.path.join(source_directory_string, file))
+                    file_stats[file] = (stat.st_size, stat.st_mtime_ns)
+                index.remove_files_except(files)
+                stale_files = index.stale_files(file_stats)
+                #regular expressions and fuzzy terms can't be narrowed down by trigrams, but the index is still kept up to date
+                candidates = None if use_regex or max_distance else index.candidate_files(search_terms)
+                if candidates is not None:
+                    files = [file for file in files if file in stale_files or file in candidates]
+            except (sqlite3.Error, OSError):
+                #searching without the index still works, e.g. in a read-only directory
+                index = None
+                stale_files = set()
+
+    #read and search the files in parallel, the results arrive in directory order
+    tasks = ((os.path.join(source_directory_string, file), file in stale_files, None) for file in files)
+    #the read-ahead threads read the files in directory order, the workers only get their bytes
+    pipeline = None
+    if read_ahead is not None:
+        pipeline = ReadAhead(tasks, functools.partial(read_search_task_ahead, screen=screen), read_ahead, read_ahead_threads, cancel_event, hold_results=True)
+        tasks = pipeline
+    #the matcher and the screen go to every worker once, the tasks only carry a file
+    file_results = map_in_order(
+        search_file,
+        tasks,
+        workers=workers,
+        use_processes=use_processes,
+        progress_callback=progress_callback,
+        cancel_event=cancel_event,
+        with_items=True,
+        read_ahead=pipeline,
+        shared={
+            "matcher": matcher,
+            "screen": screen,
+            "context": context if output_format != OUTPUT_JSON else 0,
+            "query": query,
+            "max_matches": max_matches,
+            "instrument": stats.enabled
+        }
+    )
+
+    #store the occurrences of all search terms, packed and spilled to a temporary file if there are many
+    match_store = MatchStore(with_distances=max_distance > 0)
+    searched_count = 0
+    skipped_files = []
+    for (full_path, *_), (file_positions, trigrams, skip_reason, file_snippets, search_stats) in file_results:
+        file = get_base_name(full_path)
+        searched_count += 1
+        stats.merge(search_stats)
+        if skip_reason is not None:
+            skipped_files.append((file, skip_reason))
+            if status_callback is not None:
+                status_callback(f"{searched_count}: {file} skipped ({screen.describe(skip_reason)})")
+            continue
+        if status_callback is not None:
+            status_callback(f"{searched_count}: {file}")
+        if trigrams is not None:
+            with stats.stage("index"):
+                index.store_file(file, *file_stats[file], trigrams)
+        if file_positions is None:
+            continue
+        with stats.stage("store"):
+            for search_term in search_terms:
+                if query != QUERY_MATCHES:
+                    match_store.add_count(search_term, file, file_positions.get(search_term))
+                else:
+                    match_store.add(search_term, file, file_positions.get(search_term), file_snippets.get(search_term) if file_snippets is not None else None)
+
+    if index is not None:
+        index.close()
 
-    last_progress = -1
+    cancelled = cancel_event is not None and cancel_event.is_set()
+    stats.count("files_searched", searched_count - len(skipped_files))
+    if cancelled and not partial_report:
+        match_store.close()
+        stats.stop_profiler()
+        return None, 0
 
-    #go through every file in the directory
-    for index, file in enumerate(files, start=1):
-        #update progress bar
-        progress = int((index * 100) / file_count)
-        if progress != last_progress:
-            progress_bar["value"] = progress
-            progress_bar.update_idletasks()
-            last_progress = progress
+    described_skipped_files = [(file, screen.describe(reason)) for file, reason in skipped_files]
+
+    #create result file
+    result_file_name = "Result_" + strftime("%Y%m%d_%H_%M_%S", gmtime()) + OUTPUT_EXTENSIONS[output_format]
+    result_file_path = os.path.join(target_directory_string, result_file_name)
 
-        full_path = os.path.join(source_directory_string, file)
+    try:
+        with stats.stage("report"):
+            if output_format == OUTPUT_NDJSON:
+                with open(result_file_path, "w", encoding="utf-8") as f:
+                    match_count = write_ndjson(f, reported_terms, match_store, query)
+            elif output_format == OUTPUT_CSV:
+                #the csv module writes the line breaks itself
+                with open(result_file_path, "w", encoding="utf-8", newline="") as f:
+                    match_count = write_csv(f, reported_terms, match_store, query)
+            elif output_format == OUTPUT_JSON:
+                with open(result_file_path, "w", encoding="utf-8") as f:
+                    match_count = write_json_summary(f, source_directory_string, reported_terms, match_store, searched_count - len(skipped_files), cancelled, described_skipped_files, query, max_matches, max_distance)
+            else:
+                header_lines = [
+                    LINE,
+                    f" Directory:\t{source_directory_string}\n",
+                    LINE
+                ]
+                if cancelled:
+                    header_lines.extend([f" Cancelled:\t{searched_count} files searched\n", LINE])
+                if skipped_files:
+                    header_lines.extend([f" Skipped:\t{screen.describe_counts(skipped_files)}\n", LINE])
+                if max_matches is not None and query == QUERY_MATCHES:
+                    header_lines.extend([f" Limit:\tfirst {max_matches} matches per file and search term\n", LINE])
+                if max_distance > 0:
+                    header_lines.extend([f" Fuzzy:\tup to {max_distance} edits per match\n", LINE])
+                with open(result_file_path, "w") as f:
+                    match_count = write_report(f, header_lines, reported_terms, match_store, described_skipped_files, query)
+    finally:
+        match_store.close()
+
+    stats.count("matches", match_count)
+    stats.write_summary(
+        result_file_path,
+        tool="search_files",
+        source_directory=source_directory_string,
+        search_terms=len(search_terms),
+        case_sensitive=case_sensitive,
+        use_regex=use_regex,
+        use_index=use_index,
+        workers=workers,
+        use_processes=use_processes,
+        output_format=output_format,
+        context=context,
+        query=query,
+        max_matches=max_matches,
+        max_distance=max_distance,
+        read_ahead=pipeline.summary() if pipeline is not None else None,
+        cancelled=cancelled
+    )
+    return result_file_path, match_count
 
-        #skip directories
-        if not os.path.isfile(full_path):
+def write_report(f, header_lines, search_terms, match_store, skipped_files=(), query=QUERY_MATCHES) -> int:
+    """Stream the report of `search_terms` from `match_store` into the text file `f` and return the number of matches.
+
+    -The lines are separated by "\n" without one at the end, the match positions are written in blocks,
+     so memory use doesn't depend on the number of matches.
+    -The [(file, reason), ...] `skipped_files` are listed after the search terms.
+    -If `match_store` holds context snippets, each one follows its position after a tab. Positions of a fuzzy
+     search are followed by their distance.
+    -With `query` QUERY_COUNT a line per file holds its match count, with QUERY_FILES only the files are listed
+     (each one counts as a match).
+    """
+    f.write("\n".join(header_lines))
+    match_count = 0
+
+    for search_term in search_terms:
+        f.write(f"\nSearch term:\t{search_term}\n")
+
+        file_counts = match_store.files(search_term)
+        if len(file_counts) == 0:
+            f.write("\nno matches")
+            f.write("\n" + LINE)
             continue
 
-        #skip files that don't end with ".txt", ".csv", ".log", ".md" or ".rtf"
-        _, ext = os.path.splitext(file)
-        if ext.lower() not in [".txt", ".csv", ".log", ".md", ".rtf"]:
+        total_count = match_store.match_count(search_term)
+        match_count += total_count
+        if query == QUERY_FILES:
+            f.write(f"\n{len(file_counts)} Files:\n" + "".join([f"\n\t{file}" for file, _ in file_counts]))
+            f.write("\n" + LINE)
+            continue
+        if query == QUERY_COUNT:
+            f.write(f"\n{total_count} Matches in {len(file_counts)} files:\n" + "".join([f"\n\t{file}:\t{count}" for file, count in file_counts]))
+            f.write("\n" + LINE)
             continue
+        f.write(f"\n{total_count} Matches:\n")
+
+        positions = match_store.iter_positions(search_term)
+        if match_store.with_distances:
+            #the distance is written behind the column
+            positions = ((line, f"{column}, Distance {distance}") for line, column, distance in positions)
+        snippets = match_store.iter_snippets(search_term) if match_store.has_snippets else None
+        for file, count in file_counts:
+            f.write(f"\n{file}:")
+            while count:
+                block_count = min(count, REPORT_WRITE_BLOCK)
+                if snippets is None:
+                    f.write("".join([f"\n\tLine {line}, Column {column}" for line, column in itertools.islice(positions, block_count)]))
+                else:
+                    f.write("".join([
+                        f"\n\tLine {line}, Column {column}\t{snippet}"
+                        for (line, column), snippet in zip(itertools.islice(positions, block_count), snippets)
+                    ]))
+                count -= block_count
+        f.write("\n" + LINE)
 
-        #read file
-        text = TU.read_text_file(full_path)
+    if skipped_files:
+        f.write("\nSkipped files:\n" + "".join([f"\n\t{file}\t{reason}" for file, reason in skipped_files]))
+        f.write("\n" + LINE)
 
-        #search for occurrences of the search term and write them in the results dictionary
+    return match_count
+
+def iter_match_blocks(search_terms, match_store):
+    """Yield (search_term, file, [(line, column, snippet, distance), ...]) in blocks of up to REPORT_WRITE_BLOCK matches.
+
+    -The snippet is None without context, the distance is None unless `match_store` holds the matches of a fuzzy search.
+    """
+    for search_term in search_terms:
+        positions = match_store.iter_positions(search_term)
+        snippets = match_store.iter_snippets(search_term) if match_store.has_snippets else itertools.repeat(None)
+        for file, count in match_store.files(search_term):
+            while count:
+                block_count = min(count, REPORT_WRITE_BLOCK)
+                block = zip(itertools.islice(positions, block_count), snippets)
+                if match_store.with_distances:
+                    yield search_term, file, [(line, column, snippet, distance) for (line, column, distance), snippet in block]
+                else:
+                    yield search_term, file, [(line, column, snippet, None) for (line, column), snippet in block]
+                count -= block_count
+
+def write_ndjson(f, search_terms, match_store, query=QUERY_MATCHES) -> int:
+    """Stream a JSON object per match ({"term", "file", "line", "column"[, "distance"][, "context"]}) as a line each into `f`, return the number of matches.
+
+    -The term and file are encoded once per block, so a match costs little more than formatting its numbers.
+    -With `query` QUERY_COUNT there is an object per search term and file ({"term", "file", "match_count"}),
+     with QUERY_FILES without the count.
+    """
+    match_count = 0
+    if query != QUERY_MATCHES:
         for search_term in search_terms:
-            positions = find_occurrences(text, search_term, case_sensitive)
-            results = add_positions_to_results(results, search_term, file, positions)
+            for file, count in match_store.files(search_term):
+                record = {"term": search_term, "file": file}
+                if query == QUERY_COUNT:
+                    record["match_count"] = count
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                match_count += count
+        return match_count
+    for search_term, file, matches in iter_match_blocks(search_terms, match_store):
+        prefix = '{"term": ' + json.dumps(search_term, ensure_ascii=False) + ', "file": ' + json.dumps(file, ensure_ascii=False) + ', "line": '
+        if matches[0][3] is not None:
+            #the distance is written behind the column
+            matches = [(line, f'{column}, "distance": {distance}', snippet, distance) for line, column, snippet, distance in matches]
+        if matches[0][2] is None:
+            f.write("".join([f'{prefix}{line}, "column": {column}}}\n' for line, column, _, _ in matches]))
+        else:
+            f.write("".join([
+                f'{prefix}{line}, "column": {column}, "context": {json.dumps(snippet, ensure_ascii=False)}}}\n'
+                for line, column, snippet, _ in matches
+            ]))
+        match_count += len(matches)
+    return match_count
 
-    #reset progress bar
-    progress_bar["value"] = 0
+def write_csv(f, search_terms, match_store, query=QUERY_MATCHES) -> int:
+    """Write a header and a row per match (term, file, line, column[, distance][, context]) into `f` (opened with newline=""), return the number of matches.
 
-    #assemble results
-    report_lines = [
-        LINE,
-        f" Directory:\t{source_directory_string}\n",
-        LINE
-    ]
+    -With `query` QUERY_COUNT there is a row per search term and file (term, file, match_count), with QUERY_FILES without the count.
+    """
+    writer = csv.writer(f)
+    if query != QUERY_MATCHES:
+        writer.writerow(["term", "file"] + (["match_count"] if query == QUERY_COUNT else []))
+        match_count = 0
+        for search_term in search_terms:
+            file_counts = match_store.files(search_term)
+            if query == QUERY_COUNT:
+                writer.writerows([(search_term, file, count) for file, count in file_counts])
+            else:
+                writer.writerows([(search_term, file) for file, _ in file_counts])
+            match_count += sum(count for _, count in file_counts)
+        return match_count
+    writer.writerow(["term", "file", "line", "column"] + (["distance"] if match_store.with_distances else []) + (["context"] if match_store.has_snippets else []))
+    match_count = 0
+    for search_term, file, matches in iter_match_blocks(search_terms, match_store):
+        if match_store.with_distances:
+            writer.writerows([(search_term, file, line, column, distance) + (() if snippet is None else (snippet,)) for line, column, snippet, distance in matches])
+        elif matches[0][2] is None:
+            writer.writerows([(search_term, file, line, column) for line, column, _, _ in matches])
+        else:
+            writer.writerows([(search_term, file, line, column, snippet) for line, column, snippet, _ in matches])
+        match_count += len(matches)
+    return match_count
 
-    for search_term, file_dictionary in results.items():
-        report_lines.append(f"Search term:\t{search_term}\n")
+def write_json_summary(f, source_directory, search_terms, match_store, searched_count, cancelled=False, skipped_files=(), query=QUERY_MATCHES, max_matches=None, max_distance=0) -> int:
+    """Write the match counts per search term and file as one JSON object into `f` and return the number of matches.
 
-        if len(file_dictionary) == 0:
-            report_lines.append("no matches")
-            report_lines.append(LINE)
-            continue
+    -The positions in `match_store` aren't read, only the counts.
+    -With `query` QUERY_FILES the counts aren't known, every term lists the names of the files that contain it.
+    """
+    terms = []
+    match_count = 0
+    for search_term in search_terms:
+        file_counts = match_store.files(search_term)
+        if query == QUERY_FILES:
+            terms.append({"term": search_term, "file_count": len(file_counts), "files": [file for file, _ in file_counts]})
+        else:
+            terms.append({
+                "term": search_term,
+                "match_count": match_store.match_count(search_term),
+                "files": [{"file": file, "match_count": count} for file, count in file_counts]
+            })
+        match_count += match_store.match_count(search_term)
+    json.dump({
+        "directory": source_directory,
+        "query": query,
+        "max_matches": max_matches,
+        "max_distance": max_distance,
+        "cancelled": cancelled,
+        "files_searched": searched_count,
+        "match_count": match_count,
+        "terms": terms,
+        "skipped_files": [{"file": file, "reason": reason} for file, reason in skipped_files]
+    }, f, indent=1, ensure_ascii=False)
+    return match_count
 
-        total_count = 0
-        tmp_report_lines = []
+def new_followed_file() -> dict:
+    return {"identity": None, "offset": 0, "line": 0, "encoding": None, "fingerprint": b""}
 
-        for file, positions in file_dictionary.items():
-            tmp_report_lines.append(f"{file}:")
-            for line, column in positions:
-                tmp_report_lines.append(f"\tLine {line}, Column {column}")
-                total_count += 1
-        tmp_report_lines.append(LINE)
+def skip_existing_lines(path, state):
+    """Move `state` behind the last complete line of `path` without searching it, only the line breaks are counted."""
+    stat = os.stat(path)
+    state.update(new_followed_file(), identity=(stat.st_dev, stat.st_ino))
+    with open(path, "rb") as f:
+        position = 0
+        while position < stat.st_size:
+            data = f.read(min(CHUNK_SIZE, stat.st_size - position))
+            if not data:
+                break
+            state["line"] += data.count(b"\n")
+            end = data.rfind(b"\n")
+            if end >= 0:
+                state["offset"] = position + end + 1
+            position += len(data)
+        f.seek(max(state["offset"] - FOLLOW_FINGERPRINT_SIZE, 0))
+        state["fingerprint"] = f.read(state["offset"] - f.tell())
 
-        report_lines.append(f"{total_count} Matches:\n")
-        report_lines.extend(tmp_report_lines)
+def decode_new_lines(data, state) -> str:
+    """Decode appended bytes in the encoding detected for the file, a file that turns out to use another one switches to it."""
+    if state["encoding"] is None:
+        state["encoding"] = TU.get_encodings_to_try(data)[0]
+    try:
+        text = data.decode(state["encoding"])
+    except UnicodeDecodeError:
+        text, state["encoding"] = TU.decode_text_bytes(data)
+        return text
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+def search_new_lines(path, state, matcher) -> dict:
+    """Search the complete lines appended to `path` since `state` was advanced and return their positions.
+
+    -`state` is {"identity", "offset", "line", "encoding", "fingerprint"}: the device and inode of the file, the byte
+     offset and line number up to which it was searched, its encoding and the last bytes searched.
+     The positions count from the start of the file.
+    -Only the new bytes are read, CHUNK_SIZE at a time. An unfinished last line is left for the next call.
+    -A replaced (rotated), truncated or rewritten file is searched from the start again.
+    """
+    stat = os.stat(path)
+    identity = (stat.st_dev, stat.st_ino)
+    if state["identity"] != identity or stat.st_size < state["offset"]:
+        state.update(new_followed_file(), identity=identity)
+
+    positions = {}
+    if stat.st_size == state["offset"]:
+        return positions
+
+    with open(path, "rb") as f:
+        if state["fingerprint"]:
+            f.seek(state["offset"] - len(state["fingerprint"]))
+            if f.read(len(state["fingerprint"])) != state["fingerprint"]:
+                state.update(new_followed_file(), identity=identity)
+        f.seek(state["offset"])
+        remaining = stat.st_size - state["offset"]
+        pending = b""
+        while remaining > 0:
+            data = f.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            data = pending + data
+            end = data.rfind(b"\n") + 1
+            pending = data[end:]
+            if end:
+                state["line"] = matcher.add_positions(decode_new_lines(data[:end], state), positions, state["line"])
+                state["offset"] += end
+                state["fingerprint"] = data[max(end - FOLLOW_FINGERPRINT_SIZE, 0):end]
+    return positions
+
+def follow_search(source_directory_string, search_terms_string, case_sensitive, on_matches, use_regex=False, skip_existing=False, cancel_event=None, exclude_patterns=(), use_inotify=True, skip_paths=()) -> int:
+    """Search the files of the source directory, then keep searching what is appended to them until `cancel_event` is set.
+
+    -`on_matches(file, matches)` gets the new [(line, column, search_term), ...] of a file in the order they occur,
+     lines and columns count from the start of the file.
+    -Only the bytes appended since the last read are searched, rotated or truncated files are searched from the start
+     again and new files as soon as they appear. With `skip_existing` only lines written after the start are searched.
+    -With inotify (Linux) the process sleeps until a file in the directory changes, elsewhere every file is checked
+     every FOLLOW_POLL_SECONDS.
+    -The files in `skip_paths` are never searched, e.g. the report the matches are written to (its match lines
+     contain the search terms, following it would report them again without end).
+    -Ctrl+C ends following like `cancel_event`, the number of reported matches is returned.
+    """
+    if source_directory_string == "":
+        raise ToolError("Input error", "Source directory is empty")
+    if search_terms_string == "":
+        raise ToolError("Input error", "No search terms specified")
+    if not os.path.isdir(source_directory_string):
+        raise ToolError("Input error", f"Source directory doesn't exist:\n{source_directory_string}")
+
+    search_terms = TU.split_multiline_text_into_terms(search_terms_string)
+    matcher = create_matcher(search_terms, case_sensitive, use_regex)
+    term_order = {search_term: i for i, search_term in enumerate(search_terms)}
+    exclude = compile_exclude_patterns(exclude_patterns)
+    skipped_keys = {os.path.normcase(os.path.abspath(path)) for path in skip_paths}
+
+    #the watch is set up before the first pass, so nothing written meanwhile is missed
+    watcher = DirectoryWatcher(source_directory_string, use_inotify)
+    wait_seconds = FOLLOW_WAIT_SECONDS if watcher.uses_inotify else FOLLOW_POLL_SECONDS
+    followed_files = {}
+    match_count = 0
+    changed = None
+    first_pass = True
+    try:
+        while cancel_event is None or not cancel_event.is_set():
+            if changed is None:
+                #every file is checked: the first pass, without inotify, or after the kernel's event queue overflowed
+                try:
+                    files = [os.path.basename(path) for path in iter_files(source_directory_string, SEARCH_FILE_EXTENSIONS, max_depth=0, exclude_patterns=exclude_patterns)]
+                except OSError as e:
+                    raise ToolError("Error", f"Directory contents could not be read:\n{e}")
+                files = [file for file in files if os.path.normcase(os.path.abspath(os.path.join(source_directory_string, file))) not in skipped_keys]
+                for file in set(followed_files).difference(files):
+                    del followed_files[file]
+            else:
+                files = sorted(
+                    file for file in changed
+                    if get_extension(file) in SEARCH_FILE_EXTENSIONS and (exclude is None or not exclude.match(os.path.normcase(file)))
+                    and os.path.normcase(os.path.abspath(os.path.join(source_directory_string, file))) not in skipped_keys
+                )
+
+            for file in files:
+                full_path = os.path.join(source_directory_string, file)
+                state = followed_files.get(file)
+                try:
+                    if state is None:
+                        state = followed_files[file] = new_followed_file()
+                        if skip_existing and first_pass:
+                            skip_existing_lines(full_path, state)
+                    file_positions = search_new_lines(full_path, state, matcher)
+                except OSError:
+                    #deleted (or not a regular file), it is followed again from the start if it comes back
+                    followed_files.pop(file, None)
+                    continue
+                if file_positions:
+                    matches = sorted(
+                        ((line, column, search_term) for search_term, positions in file_positions.items() for line, column in positions),
+                        key=lambda match: (match[0], match[1], term_order[match[2]])
+                    )
+                    match_count += len(matches)
+                    on_matches(file, matches)
+
+            first_pass = False
+            changed = watcher.wait(wait_seconds, cancel_event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return match_count
+
+def run_follow_report(source_directory_string, target_directory_string, search_terms_string, case_sensitive, use_regex=False, skip_existing=False, progress_callback=None, status_callback=None, cancel_event=None, exclude_patterns=()) -> tuple:
+    """Run follow_search() and append the matches to a report in the target directory as they are found.
+
+    -The report is flushed after every file with new matches, so it can be watched while following.
+    -Following only ends with `cancel_event`, `progress_callback` is accepted for BackgroundJob but never called.
+    -Returns (result_file_path, match_count).
+    """
+    if target_directory_string == "":
+        raise ToolError("Input error", "Target directory is empty")
+    if not os.path.isdir(target_directory_string):
+        raise ToolError("Input error", f"Target directory doesn't exist:\n{target_directory_string}")
 
-    #create and open result file
     result_file_name = "Result_" + strftime("%Y%m%d_%H_%M_%S", gmtime()) + ".txt"
     result_file_path = os.path.join(target_directory_string, result_file_name)
 
     with open(result_file_path, "w") as f:
-        f.write("\n".join(report_lines))
+        f.write("\n".join([
+            LINE,
+            f" Directory:\t{source_directory_string}\n",
+            LINE,
+            f" Following:\tsince {strftime('%Y-%m-%d %H:%M:%S', gmtime())} UTC\n",
+            LINE
+        ]))
+        f.flush()
 
-    TU.open_in_notepad(result_file_path)
+        def write_matches(file, matches):
+            f.write(f"\n{file}:" + "".join([f"\n\tLine {line}, Column {column}\t{search_term}" for line, column, search_term in matches]))
+            f.flush()
+            if status_callback is not None:
+                status_callback(f"{len(matches)} new matches in {file}")
+
+        match_count = follow_search(
+            source_directory_string,
+            search_terms_string,
+            case_sensitive,
+            write_matches,
+            use_regex=use_regex,
+            skip_existing=skip_existing,
+            cancel_event=cancel_event,
+            exclude_patterns=exclude_patterns,
+            skip_paths=[result_file_path]
+        )
+        f.write("\n" + LINE)
+
+    return result_file_path, match_count
+
+def main(argv=None) -> int:
+    """Command line entry point (`python -m tools.search_files`), prints the path of the report.
+
+    -With --follow the matches are printed as they are found instead, until Ctrl+C.
+    """
+    parser = create_argument_parser(
+        "python -m tools.search_files",
+        "Search text files for terms and write a report of every match.",
+        "exit codes: 0 matches found, 1 no matches, 2 error",
+        use_processes=True
+    )
+    parser.add_argument("-t", "--term", action="append", dest="terms", metavar="TERM", help="search term, can be repeated (default: one term per line from stdin)")
+    parser.add_argument("-c", "--case-sensitive", action="store_true", help="match upper and lower case exactly")
+    parser.add_argument("-r", "--regex", action="store_true", help="the search terms are regular expressions")
+    parser.add_argument("--index", action="store_true", help="use the search index stored in the source directory")
+    parser.add_argument("-f", "--follow", action="store_true", help="keep watching the directory and print new matches as they are appended, until Ctrl+C")
+    parser.add_argument("--new-only", action="store_true", help="with --follow: skip what the files contain when following starts")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=OUTPUT_TEXT, help="result file format: the text report, a JSON object per line and match, a CSV row per match or a JSON summary of the counts per term and file (default: text)")
+    parser.add_argument("--context", type=int, default=0, metavar="N", help="add up to N characters of the line on either side of every match (not in the JSON summary)")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("-l", "--files-with-matches", action="store_const", const=QUERY_FILES, dest="query", help="only list the files that contain each term, a file is read until every term occurred")
+    query.add_argument("--count", action="store_const", const=QUERY_COUNT, dest="query", help="only count the matches per file and term")
+    parser.set_defaults(query=QUERY_MATCHES)
+    parser.add_argument("-m", "--max-count", type=int, metavar="N", help="only report the first N matches per file and term, a file is read until every term has them (not with --count or -l)")
+    parser.add_argument("--fuzzy", type=int, default=0, dest="max_distance", metavar="N", help="also match the terms with up to N inserted, deleted or replaced characters, every match is reported with its distance (not with --regex or --follow)")
+    args = parser.parse_args(argv)
+
+    if args.follow:
+        def print_matches(file, matches):
+            print("\n".join(f"{file}\tLine {line}, Column {column}\t{search_term}" for line, column, search_term in matches), flush=True)
+
+        exit_code, match_count = run_tool(
+            follow_search,
+            args.source,
+            read_multiline_argument(args.terms),
+            args.case_sensitive,
+            print_matches,
+            use_regex=args.regex,
+            skip_existing=args.new_only,
+            exclude_patterns=args.exclude or ()
+        )
+        if match_count is None:
+            return exit_code
+        return EXIT_SUCCESS if match_count else EXIT_NOTHING_FOUND
+
+    exit_code, result = run_tool(
+        run_search,
+        args.source,
+        args.target if args.target is not None else args.source,
+        read_multiline_argument(args.terms),
+        args.case_sensitive,
+        workers=args.workers,
+        use_processes=args.use_processes,
+        use_index=args.index,
+        use_regex=args.regex,
+        exclude_patterns=args.exclude or (),
+        max_file_size=args.max_size,
+        skip_binary=not args.include_binary,
+        compressed=args.compressed,
+        output_format=args.format,
+        context=args.context,
+        query=args.query,
+        max_matches=args.max_count,
+        max_distance=args.max_distance,
+        read_ahead=args.read_ahead,
+        read_ahead_threads=args.read_ahead_threads,
+        instrument=args.stats,
+        profile=args.profile
+    )
+    if result is None:
+        return exit_code
+
+    result_file_path, match_count = result
+    print(result_file_path)
+    return EXIT_SUCCESS if match_count else EXIT_NOTHING_FOUND
 
 def initialize_ui():
+    import tkinter
+    from tkinter import ttk
+
     #create GUI window with tkinter
     GUI_window = tkinter.Tk()
     GUI_window.config(bg=UI_COLORS["background"])
@@ -248,6 +1038,152 @@ def initialize_ui():
     )
     checkbox_case_sensitive.grid(row=2, column=1, sticky="W")
 
+    #checkbox regular expressions
+    use_regex_var = tkinter.BooleanVar(value=False)
+    checkbox_use_regex = tkinter.Checkbutton(
+        GUI_window,
+        text="Search terms are regular expressions",
+        onvalue=True,
+        offvalue=False,
+        variable=use_regex_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_use_regex.grid(row=3, column=1, sticky="W")
+
+    #checkbox use search index
+    use_index_var = tkinter.BooleanVar(value=False)
+    checkbox_use_index = tkinter.Checkbutton(
+        GUI_window,
+        text="Use search index (stored in the source directory)",
+        onvalue=True,
+        offvalue=False,
+        variable=use_index_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_use_index.grid(row=4, column=1, sticky="W")
+
+    #checkbox partial report
+    partial_report_var = tkinter.BooleanVar(value=False)
+    checkbox_partial_report = tkinter.Checkbutton(
+        GUI_window,
+        text="Write a partial report when cancelled",
+        onvalue=True,
+        offvalue=False,
+        variable=partial_report_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_partial_report.grid(row=5, column=1, sticky="W")
+
+    #checkbox follow
+    follow_var = tkinter.BooleanVar(value=False)
+    checkbox_follow = tkinter.Checkbutton(
+        GUI_window,
+        text="Follow the directory and report new matches until cancelled",
+        onvalue=True,
+        offvalue=False,
+        variable=follow_var,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["background"],
+        selectcolor=UI_COLORS["background"]
+    )
+    checkbox_follow.grid(row=6, column=1, sticky="W")
+
+    #label output options
+    label_output = tkinter.Label(
+        GUI_window,
+        text="Output:",
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_output.grid(row=7, column=0, padx=5, sticky="E")
+
+    #format of the result and context characters around every match
+    frame_output = tkinter.Frame(GUI_window, bg=UI_COLORS["background"])
+    frame_output.grid(row=7, column=1, sticky="W")
+    output_format_var = tkinter.StringVar(value=OUTPUT_TEXT)
+    option_output_format = tkinter.OptionMenu(frame_output, output_format_var, *OUTPUT_FORMATS)
+    option_output_format.config(
+        bg=UI_COLORS["button"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["button"],
+        highlightthickness=0
+    )
+    option_output_format.grid(row=0, column=0, sticky="W")
+    label_context = tkinter.Label(
+        frame_output,
+        text="Context characters:",
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_context.grid(row=0, column=1, padx=5)
+    entry_context = tkinter.Entry(
+        frame_output,
+        bg=UI_COLORS["input"],
+        fg=UI_COLORS["text"],
+        width=10
+    )
+    entry_context.grid(row=0, column=2)
+
+    #label query mode
+    label_query = tkinter.Label(
+        GUI_window,
+        text="Report:",
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_query.grid(row=8, column=0, padx=5, sticky="E")
+
+    #every match, only the counts or only the files with matches, the matches per file and search term and the edits of a fuzzy search
+    frame_query = tkinter.Frame(GUI_window, bg=UI_COLORS["background"])
+    frame_query.grid(row=8, column=1, sticky="W")
+    query_var = tkinter.StringVar(value=QUERY_MATCHES)
+    option_query = tkinter.OptionMenu(frame_query, query_var, *QUERY_MODES)
+    option_query.config(
+        bg=UI_COLORS["button"],
+        fg=UI_COLORS["text"],
+        activebackground=UI_COLORS["button"],
+        highlightthickness=0
+    )
+    option_query.grid(row=0, column=0, sticky="W")
+    label_max_matches = tkinter.Label(
+        frame_query,
+        text="Max matches per file:",
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_max_matches.grid(row=0, column=1, padx=5)
+    entry_max_matches = tkinter.Entry(
+        frame_query,
+        bg=UI_COLORS["input"],
+        fg=UI_COLORS["text"],
+        width=10
+    )
+    entry_max_matches.grid(row=0, column=2)
+    label_max_distance = tkinter.Label(
+        frame_query,
+        text="Max edits (fuzzy):",
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_max_distance.grid(row=0, column=3, padx=5)
+    entry_max_distance = tkinter.Entry(
+        frame_query,
+        bg=UI_COLORS["input"],
+        fg=UI_COLORS["text"],
+        width=5
+    )
+    entry_max_distance.grid(row=0, column=4)
+
     #label target directory
     label_target_directory = tkinter.Label(
         GUI_window,
@@ -255,7 +1191,7 @@ def initialize_ui():
         bg=UI_COLORS["background"],
         fg=UI_COLORS["text"]
     )
-    label_target_directory.grid(row=3, column=0, padx=5, sticky="E")
+    label_target_directory.grid(row=9, column=0, padx=5, sticky="E")
 
     #input target directory
     entry_target_directory = tkinter.Entry(
@@ -264,7 +1200,7 @@ def initialize_ui():
         fg=UI_COLORS["text"],
         width=50
     )
-    entry_target_directory.grid(row=3, column=1, sticky="EW")
+    entry_target_directory.grid(row=9, column=1, sticky="EW")
 
     #select target directory button
     select_target_directory_button = tkinter.Button(
@@ -275,14 +1211,14 @@ def initialize_ui():
         width=10,
         command=lambda: select_target_directory(entry_target_directory)
     )
-    select_target_directory_button.grid(row=3, column=2, padx=5, pady=2)
+    select_target_directory_button.grid(row=9, column=2, padx=5, pady=2)
 
     #progress bar
     progress_bar_style = ttk.Style(GUI_window)
     progress_bar_style.theme_use("default")
     progress_bar_style.configure("Custom.Horizontal.TProgressbar", background="green", troughcolor=UI_COLORS["input"])
     tk_progress_bar = ttk.Progressbar(GUI_window, style="Custom.Horizontal.TProgressbar")
-    tk_progress_bar.grid(row=4, column=1, columnspan=1, sticky="EW")
+    tk_progress_bar.grid(row=10, column=1, columnspan=1, sticky="EW")
 
     #start search button
     search_button = tkinter.Button(
@@ -296,10 +1232,44 @@ def initialize_ui():
             entry_target_directory.get(),
             entry_search_terms.get("1.0", "end-1c"),
             case_sensitive_var.get(),
-            tk_progress_bar
+            job,
+            use_index=use_index_var.get(),
+            use_regex=use_regex_var.get(),
+            partial_report=partial_report_var.get(),
+            follow=follow_var.get(),
+            output_format=output_format_var.get(),
+            context_string=entry_context.get(),
+            query=query_var.get(),
+            max_matches_string=entry_max_matches.get(),
+            max_distance_string=entry_max_distance.get()
         )
     )
-    search_button.grid(row=4, column=0, padx=5, pady=2, sticky="EW")
+    search_button.grid(row=10, column=0, padx=5, pady=2, sticky="EW")
+
+    #cancel search button
+    cancel_button = tkinter.Button(
+        GUI_window,
+        text="Cancel",
+        bg=UI_COLORS["button"],
+        fg=UI_COLORS["text"],
+        width=10,
+        command=lambda: job.cancel()
+    )
+    cancel_button.grid(row=10, column=2, padx=5, pady=2)
+
+    #status of the running search
+    label_status = tkinter.Label(
+        GUI_window,
+        text="",
+        anchor="w",
+        width=50,
+        bg=UI_COLORS["background"],
+        fg=UI_COLORS["text"]
+    )
+    label_status.grid(row=11, column=1, sticky="EW")
+
+    #the search runs on a worker thread, the window keeps handling events meanwhile
+    job = BackgroundJob(tk_progress_bar, label_status, search_button, cancel_button)
 
     return GUI_window
 